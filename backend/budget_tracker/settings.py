@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 
     # Third Party Apps
     'rest_framework',
+    'rest_framework_simplejwt.token_blacklist',
     'django_filters',
     'corsheaders',
 
@@ -102,10 +103,75 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# 'finance' holds per-user computed responses (summary, budget management).
+# Set FINANCE_CACHE_BACKEND to a shared backend when running several workers, e.g.
+#   django.core.cache.backends.db.DatabaseCache  (LOCATION = table name, run `manage.py createcachetable`)
+#   django.core.cache.backends.filebased.FileBasedCache  (LOCATION = directory)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'finance': {
+        'BACKEND': os.getenv('FINANCE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('FINANCE_CACHE_LOCATION', 'finance-responses'),
+        'TIMEOUT': int(os.getenv('FINANCE_CACHE_TIMEOUT_SECONDS', '300')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('FINANCE_CACHE_MAX_ENTRIES', '10000')),
+            'CULL_FREQUENCY': 3,  # evict 1/3 of the entries when MAX_ENTRIES is reached
+        },
+    },
+}
+
+FINANCE_CACHE_ALIAS = 'finance'
+# Whether the finance cache is shared by every worker process. Unset: guessed from the
+# backend (locmem is not). Set True for a single-process deployment on locmem.
+FINANCE_CACHE_SHARED = {'True': True, 'False': False}.get(os.getenv('FINANCE_CACHE_SHARED', ''))
+# Users kept by finance.authentication.CachedJWTAuthentication per worker process
+FINANCE_AUTH_USER_CACHE_SIZE = int(os.getenv('FINANCE_AUTH_USER_CACHE_SIZE', '1024'))
+# Seconds a cached user row is trusted before it is reloaded
+FINANCE_AUTH_USER_CACHE_TTL = int(os.getenv('FINANCE_AUTH_USER_CACHE_TTL', '60'))
+# Seconds between full rebuilds of the refresh-token revocation filter (finance.revocation)
+FINANCE_REVOCATION_REBUILD_SECONDS = int(os.getenv('FINANCE_REVOCATION_REBUILD_SECONDS', '300'))
+# Token-bucket rate limits (finance.throttling): 'local' buckets per worker process, or
+# 'cache' to share them through the finance cache between workers
+FINANCE_THROTTLE_STORE = os.getenv('FINANCE_THROTTLE_STORE', 'local')
+# Bucket size / refill period per scope; a scope without a rate is not limited
+FINANCE_THROTTLE_RATES = {
+    'login': os.getenv('FINANCE_THROTTLE_LOGIN', '10/min'),              # per IP
+    'register': os.getenv('FINANCE_THROTTLE_REGISTER', '5/min'),         # per IP
+    'refresh': os.getenv('FINANCE_THROTTLE_REFRESH', '30/min'),          # per IP
+    'bulk_write': os.getenv('FINANCE_THROTTLE_BULK_WRITE', '60/min'),    # per user
+    'bulk_write_ip': os.getenv('FINANCE_THROTTLE_BULK_WRITE_IP', '120/min'),
+}
+
 # Use custom user model
 AUTH_USER_MODEL = 'finance.User'
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+
+# The first hasher hashes new passwords; hashes made by the others (or with another
+# FINANCE_PBKDF2_ITERATIONS) are rehashed on the user's next login
+PASSWORD_HASHERS = [
+    'finance.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+FINANCE_PBKDF2_ITERATIONS = int(os.getenv('FINANCE_PBKDF2_ITERATIONS', '1000000'))  # Django 5.2's default
+# Password hashing pool of each worker process (finance.passwords): hashes run at
+# once, and hashes allowed to wait before login/registration answers 429. With a
+# shared finance cache, workers + queue also caps hashes in flight across processes
+FINANCE_PASSWORD_HASH_WORKERS = int(os.getenv('FINANCE_PASSWORD_HASH_WORKERS', '2'))
+FINANCE_PASSWORD_HASH_QUEUE = int(os.getenv('FINANCE_PASSWORD_HASH_QUEUE', '8'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -150,11 +216,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # -------- REST FRAMEWORK & SIMPLE JWT --------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication with the user row cached per auth version
+        'finance.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed JSON (falls back to the stdlib encoder when orjson is not installed)
+    'DEFAULT_RENDERER_CLASSES': (
+        'finance.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': (
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Category, Income, Expense, Budget
+from .models import User, Category, Income, Expense, Budget, MonthlyCategoryTotal, UserSession
 
 
 @admin.register(User)
@@ -38,3 +38,19 @@ class BudgetAdmin(admin.ModelAdmin):
     list_filter = ('year', 'month', 'created_at')
     search_fields = ('user__username', 'user__email')
     ordering = ('-year', '-month')
+
+
+@admin.register(MonthlyCategoryTotal)
+class MonthlyCategoryTotalAdmin(admin.ModelAdmin):
+    list_display = ('user', 'category', 'year', 'month', 'income_total', 'expense_total')
+    list_filter = ('year', 'month')
+    search_fields = ('user__username', 'user__email', 'category__name')
+    ordering = ('-year', '-month')
+
+
+@admin.register(UserSession)
+class UserSessionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'user_agent', 'ip_address', 'created_at', 'last_used_at', 'expires_at')
+    list_filter = ('created_at', 'expires_at')
+    search_fields = ('user__username', 'user__email', 'jti', 'ip_address')
+    ordering = ('-last_used_at',)
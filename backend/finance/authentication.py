@@ -0,0 +1,107 @@
+"""
+JWT authentication with a cached user lookup.
+
+simplejwt's JWTAuthentication loads the user row on every request. The
+dashboard fires several requests at once, so the same row is read several
+times. CachedJWTAuthentication keeps user rows in a bounded in-process LRU,
+validated on every request against the user's auth version in the shared
+finance cache (see finance.cache). The version is bumped on logout,
+when a save changes the user's password, email, active or staff flags
+(finance.signals.AUTH_FIELDS; not last_login) and when the user is
+deleted, which drops the cached row in every worker process sharing
+that cache.
+Rows are also reloaded once older than FINANCE_AUTH_USER_CACHE_TTL seconds,
+which bounds staleness after changes that bypass the bump (queryset
+updates, raw SQL). When the finance cache is not shared between processes
+(locmem), every request loads the user row as JWTAuthentication does.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from finance import cache as response_cache
+
+
+class UserCache:
+    """
+    Thread-safe LRU of user rows, each stored with the auth version it was
+    loaded under and the time it was loaded; rows older than ttl seconds miss.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = response_cache.CacheStats()
+        self._lock = threading.Lock()
+        self._users: 'OrderedDict[Any, Tuple[int, Any, float]]' = OrderedDict()
+
+    def get(self, user_id) -> Tuple[int, Optional[Any]]:
+        """Return (current auth version, cached user or None)."""
+        version = response_cache.get_auth_version(user_id)
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] == version and time.monotonic() - entry[2] < self.ttl:
+                self._users.move_to_end(user_id)
+                user = entry[1]
+            else:
+                user = None
+        self.stats.record('users', hit=user is not None)
+        return version, user
+
+    def set(self, user_id, version: int, user):
+        with self._lock:
+            self._users[user_id] = (version, user, time.monotonic())
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        counts = self.stats.snapshot().get('users', {'hits': 0, 'misses': 0, 'hit_rate': None})
+        with self._lock:
+            return {**counts, 'size': len(self._users), 'max_size': self.max_size, 'ttl': self.ttl}
+
+
+user_cache = UserCache(
+    getattr(settings, 'FINANCE_AUTH_USER_CACHE_SIZE', 1024),
+    getattr(settings, 'FINANCE_AUTH_USER_CACHE_TTL', 60),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves the user row from user_cache while its auth version is current."""
+
+    def get_user(self, validated_token):
+        if not response_cache.is_shared():
+            # Other workers' version bumps would go unseen
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        # Read the version before loading, so a concurrent bump makes the stored row stale
+        version, user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, version, user)
+        elif api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # Requests must not share (and mutate) one instance
+        return copy.copy(user)
@@ -0,0 +1,167 @@
+"""
+Per-user response cache for computed payloads (summary, budget management).
+
+Cached payloads are keyed by user and a per-user data version. The version
+is bumped after every committed write made through OwnerModelViewSet (and
+the bulk write paths), so a payload is served until the user's data changes.
+The backing store is the Django cache named by settings.FINANCE_CACHE_ALIAS,
+which bounds size (MAX_ENTRIES) and lifetime (TIMEOUT). Use a shared backend
+(db, file, ...) when running several worker processes.
+
+The same store holds the per-user auth versions that invalidate the user
+rows cached by finance.authentication, and the global revocation version
+that tells finance.revocation filters to pick up newly blacklisted tokens.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+KEY_PREFIX = 'finance'
+
+
+class CacheStats:
+    """Thread-safe, per-process hit/miss counters grouped by namespace."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+    def record(self, namespace: str, hit: bool):
+        with self._lock:
+            self._counts[namespace]['hits' if hit else 'misses'] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {}
+            for namespace, counts in self._counts.items():
+                total = counts['hits'] + counts['misses']
+                snapshot[namespace] = {
+                    **counts,
+                    'hit_rate': round(counts['hits'] / total, 4) if total else None,
+                }
+            return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'FINANCE_CACHE_ALIAS', 'default')]
+
+
+def is_shared() -> bool:
+    """
+    Whether every worker process sees the same cache, so a version bump in
+    one is seen by all. FINANCE_CACHE_SHARED overrides the guess from the
+    backend (locmem is per process; set True for a single-process deployment).
+    """
+    configured = getattr(settings, 'FINANCE_CACHE_SHARED', None)
+    if configured is not None:
+        return configured
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def _version_key(user_id) -> str:
+    return f'{KEY_PREFIX}:data-version:{user_id}'
+
+
+def _auth_version_key(user_id) -> str:
+    return f'{KEY_PREFIX}:auth-version:{user_id}'
+
+
+def _revocation_version_key() -> str:
+    return f'{KEY_PREFIX}:revocation-version'
+
+
+def _get_version(key) -> int:
+    """
+    Return the version stored under key.
+    A missing (new or evicted) version is seeded from the clock, so it never
+    repeats a value that older cached entries were stored under.
+    """
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def _bump_version(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_data_version(user_id) -> int:
+    """Return the user's current data version."""
+    return _get_version(_version_key(user_id))
+
+
+def bump_data_version(user_id):
+    """Invalidate every cached payload of the user."""
+    _bump_version(_version_key(user_id))
+
+
+def bump_data_version_on_commit(user_id):
+    """Bump the user's data version once the current transaction commits."""
+    transaction.on_commit(lambda: bump_data_version(user_id))
+
+
+def get_auth_version(user_id) -> int:
+    """Return the version of the user's cached authentication state (see finance.authentication)."""
+    return _get_version(_auth_version_key(user_id))
+
+
+def bump_auth_version(user_id):
+    """Drop the user's cached user row in every process sharing this cache."""
+    _bump_version(_auth_version_key(user_id))
+
+
+def bump_auth_version_on_commit(user_id):
+    """Bump the user's auth version once the current transaction commits."""
+    transaction.on_commit(lambda: bump_auth_version(user_id))
+
+
+def get_revocation_version() -> int:
+    """Return the version of the refresh-token blacklist (see finance.revocation)."""
+    return _get_version(_revocation_version_key())
+
+
+def bump_revocation_version_on_commit():
+    """Tell every process's revocation filter to sync once the current transaction commits."""
+    transaction.on_commit(lambda: _bump_version(_revocation_version_key()))
+
+
+def get_or_build(namespace: str, user_id, build: Callable[[], Any], *key_parts) -> Any:
+    """
+    Return the cached payload for (namespace, user, data version, key_parts),
+    calling build() and storing its result on a miss.
+    """
+    cache = get_cache()
+    parts = ':'.join(str(part) for part in key_parts)
+    key = f'{KEY_PREFIX}:{namespace}:{user_id}:{get_data_version(user_id)}:{parts}'
+
+    payload = cache.get(key)
+    if payload is not None:
+        stats.record(namespace, hit=True)
+        return payload
+
+    stats.record(namespace, hit=False)
+    payload = build()
+    cache.set(key, payload)
+    return payload
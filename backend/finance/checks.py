@@ -0,0 +1,26 @@
+"""
+System checks for the finance app (run by manage.py check, migrate and runserver).
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from finance import cache as response_cache
+
+
+@register(Tags.caches)
+def check_finance_cache_is_shared(app_configs, **kwargs):
+    """
+    The data, auth and revocation versions live in the finance cache. A
+    per-process backend leaves other workers serving cached summaries for
+    up to the cache TIMEOUT after a write.
+    """
+    if settings.DEBUG or response_cache.is_shared():
+        return []
+    return [Warning(
+        f"The '{getattr(settings, 'FINANCE_CACHE_ALIAS', 'default')}' cache is not shared between worker "
+        "processes. With several workers, cached summaries can be stale after writes handled by another "
+        "worker; cached JWT users and the token revocation filter are disabled.",
+        hint="Set FINANCE_CACHE_BACKEND to a shared backend (e.g. django.core.cache.backends.db.DatabaseCache "
+             "and run createcachetable), or FINANCE_CACHE_SHARED=True if only one worker process runs.",
+        id='finance.W001',
+    )]
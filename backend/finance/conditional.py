@@ -0,0 +1,87 @@
+"""
+Conditional GET support (ETag / If-None-Match) for owner-scoped read endpoints.
+
+The ETag is derived from per-user change metadata of the models a response
+depends on (row count and max(updated_at) per model), fetched in a single
+query, so a matching If-None-Match is answered with 304 Not Modified before
+any payload is built or serialized.
+"""
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Bump when the shape of a response changes, so clients drop stale bodies
+ETAG_VERSION = '1'
+
+
+def get_change_stamp(user, models: Iterable) -> Tuple:
+    """
+    Return (count, last updated_at) for each model's rows owned by the user.
+    Any create, update or delete of an owned row changes at least one value.
+    """
+    annotations = {}
+    for model in models:
+        owned = model.objects.filter(user=OuterRef('pk')).order_by().values('user')
+        label = model._meta.model_name
+        annotations[f'{label}_count'] = Subquery(owned.annotate(n=Count('pk')).values('n'))
+        annotations[f'{label}_updated'] = Subquery(owned.annotate(m=Max('updated_at')).values('m'))
+
+    stamp = get_user_model().objects.filter(pk=user.pk).values(**annotations).get()
+    return tuple(stamp[key] for key in annotations)
+
+
+def compute_etag(request, models: Iterable, *extra) -> str:
+    """Build a strong ETag for the user's view of request's path and query string."""
+    parts = [
+        ETAG_VERSION,
+        str(request.user.pk),
+        request.get_full_path(),
+        *(str(value) for value in get_change_stamp(request.user, models)),
+        *(str(value) for value in extra),
+    ]
+    return '"%s"' % hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def etag_matches(request, etag: str) -> bool:
+    """Return True when the request's If-None-Match header covers the ETag."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return '*' in etags or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in etags]
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / If-None-Match handling to a read endpoint.
+
+    Views list the models their response depends on in `etag_models` and
+    call check_not_modified() first thing in their GET handler; the ETag is
+    attached to the final response in finalize_response().
+    """
+    etag_models = ()
+
+    def get_etag_extra(self) -> Tuple:
+        """Additional values the response depends on (e.g. today's date)."""
+        return ()
+
+    def check_not_modified(self, request) -> Optional[Response]:
+        """Return a 304 response when the client's copy is current, else None."""
+        self.etag = compute_etag(request, self.etag_models, *self.get_etag_extra())
+        if etag_matches(request, self.etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+        return response
@@ -0,0 +1,64 @@
+"""
+Duplicate detection for imported and bulk-created Income/Expense entries.
+
+Entries are compared by fingerprint (see finance.utils.entry_fingerprint)
+against the rows the user already had when the write started, with one
+grouped query per model and chunk on the (user, fingerprint) index.
+Matching is by count: a statement containing the same coffee twice on one
+day is only a duplicate of two stored rows, not of one.
+"""
+from collections import Counter
+from typing import List, Sequence, Tuple
+
+from django.db.models import Count
+from django.utils import timezone
+
+from finance.models import Expense, Income
+
+
+SKIP = 'skip'
+FLAG = 'flag'
+DUPLICATE_POLICIES = (SKIP, FLAG)
+
+
+class DuplicateFinder:
+    """
+    Split chunks of unsaved entries into new ones and duplicates of stored rows.
+
+    Rows created after the finder (e.g. by earlier chunks of the same import)
+    are ignored, and every stored row matches at most one incoming entry.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.started_at = timezone.now()
+        # Stored rows already matched, per (model, fingerprint)
+        self.matched = Counter()
+
+    def split(self, entries: Sequence) -> Tuple[List[int], List[int]]:
+        """
+        Set the entries' fingerprints and return (new, duplicate) positions
+        in the entries sequence.
+        """
+        for entry in entries:
+            entry.fingerprint = entry.compute_fingerprint()
+
+        stored = Counter()
+        for model in (Income, Expense):
+            fingerprints = {entry.fingerprint for entry in entries if isinstance(entry, model)}
+            if not fingerprints:
+                continue
+            rows = model.objects.filter(
+                user=self.user, fingerprint__in=fingerprints, created_at__lt=self.started_at
+            ).order_by().values('fingerprint').annotate(count=Count('id')).values_list('fingerprint', 'count')
+            stored.update({(model, fingerprint): count for fingerprint, count in rows})
+
+        new, duplicates = [], []
+        for position, entry in enumerate(entries):
+            key = (type(entry), entry.fingerprint)
+            if self.matched[key] < stored[key]:
+                self.matched[key] += 1
+                duplicates.append(position)
+            else:
+                new.append(position)
+        return new, duplicates
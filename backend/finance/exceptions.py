@@ -62,11 +62,15 @@ def custom_exception_handler(exc, context):
                 error = error_data
         
         # Return standardized error response
-        return error_response(
+        standardized = error_response(
             error=error,
             message=message,
             status_code=status_code
         )
+        # Keep the wait hint of throttled (429) and unavailable (503) responses
+        if 'Retry-After' in response:
+            standardized['Retry-After'] = response['Retry-After']
+        return standardized
     
     # If response is None, let Django handle it (500 errors, etc.)
     return response
@@ -0,0 +1,195 @@
+"""
+Streaming exports of the user's data: transaction files (CSV and NDJSON)
+and full-account ZIP archives.
+
+Rows are read with QuerySet.iterator(), which uses a server-side cursor on
+PostgreSQL, and encoded one chunk at a time into the response or archive.
+Peak memory is bounded by the cursor chunk size instead of the history
+size, and the first bytes reach the client as soon as the first chunk is read.
+"""
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.negotiation import DefaultContentNegotiation
+
+from finance.models import Budget, Category, Expense, Income
+from finance.serializers import FastListSerializer, TransactionSerializer
+
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+CONTENT_TYPES = {
+    CSV: 'text/csv; charset=utf-8',
+    NDJSON: 'application/x-ndjson',
+}
+FORMATS = tuple(CONTENT_TYPES)
+
+# Rows fetched per round trip of the server-side cursor
+DEFAULT_CHUNK_SIZE = 2000
+
+# Same column names as the statement importer, so an export can be re-imported
+TRANSACTION_CSV_COLUMNS = ('id', 'date', 'type', 'category', 'amount', 'note')
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    Always pick the first renderer. Export endpoints use the `format` query
+    parameter to choose the file format, which DRF would otherwise treat as
+    a renderer override and answer with 404.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class Echo:
+    """File-like object that hands back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def transaction_csv_values(row: Dict) -> Sequence:
+    return (
+        row['id'],
+        row['date'].isoformat(),
+        'income' if row['is_income'] else 'expense',
+        row['category_name'],
+        row['amount'],
+        row['note'],
+    )
+
+
+def stream_transactions_csv(rows: Iterable[Dict]) -> Iterator[str]:
+    """Yield a CSV header line, then one line per transaction row."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(TRANSACTION_CSV_COLUMNS)
+    for row in rows:
+        yield writer.writerow(transaction_csv_values(row))
+
+
+def stream_transactions_ndjson(rows: Iterable[Dict]) -> Iterator[str]:
+    """Yield one JSON object per line and transaction row, shaped like TransactionSerializer."""
+    for record in FastListSerializer.for_serializer(TransactionSerializer).iter_representation(rows):
+        yield json.dumps(record) + '\n'
+
+
+TRANSACTION_STREAMS = {
+    CSV: stream_transactions_csv,
+    NDJSON: stream_transactions_ndjson,
+}
+
+
+# Files of the account archive, one per model; category__name is joined in the query
+ARCHIVE_VERSION = 1
+ARCHIVE_TABLES = (
+    ('categories.csv', Category, ('id', 'name', 'is_income', 'updated_at')),
+    ('incomes.csv', Income, (
+        'id', 'date', 'category_id', 'category__name', 'amount', 'note', 'created_at', 'updated_at'
+    )),
+    ('expenses.csv', Expense, (
+        'id', 'date', 'category_id', 'category__name', 'amount', 'note', 'created_at', 'updated_at'
+    )),
+    ('budgets.csv', Budget, (
+        'id', 'year', 'month', 'category_id', 'category__name', 'amount', 'created_at', 'updated_at'
+    )),
+)
+
+
+class ArchiveBuffer(io.RawIOBase):
+    """
+    Unseekable sink for zipfile.ZipFile. zipfile then writes sizes in data
+    descriptors after each entry, so the archive can be handed out in pieces
+    with pop() while it is being written.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def archive_value(value):
+    if isinstance(value, date):  # also datetime
+        return value.isoformat()
+    return value
+
+
+def archive_filename(user) -> str:
+    return f'budget-tracker-user-{user.pk}.zip'
+
+
+def _archive_pieces(user, chunk_size: int) -> Iterator[bytes]:
+    buffer = ArchiveBuffer()
+    counts = {}
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, model, columns in ARCHIVE_TABLES:
+            writer = csv.writer(Echo())
+            rows = model.objects.filter(user=user).order_by('id').values_list(*columns)
+            counts[name] = 0
+            # Sizes are unknown up front, so allow entries past 2 GiB
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                lines = [writer.writerow([column.replace('__name', '') for column in columns])]
+                for row in rows.iterator(chunk_size=chunk_size):
+                    lines.append(writer.writerow([archive_value(value) for value in row]))
+                    counts[name] += 1
+                    if len(lines) >= chunk_size:
+                        entry.write(''.join(lines).encode('utf-8'))
+                        lines = []
+                        yield buffer.pop()
+                entry.write(''.join(lines).encode('utf-8'))
+            yield buffer.pop()
+
+        account = {
+            'version': ARCHIVE_VERSION,
+            'exported_at': timezone.now().isoformat(),
+            'user': {
+                'id': user.pk,
+                'email': user.email,
+                'username': user.username,
+                'date_joined': user.date_joined.isoformat(),
+            },
+            'files': counts,
+        }
+        archive.writestr('account.json', json.dumps(account, indent=2))
+    yield buffer.pop()
+
+
+def iter_user_archive(user, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield the bytes of a ZIP archive with one CSV file per model (categories,
+    incomes, expenses, budgets) and account.json with the profile and row counts.
+    """
+    return (piece for piece in _archive_pieces(user, max(1, chunk_size)) if piece)
+
+
+def write_user_archive(user, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Write the user's archive to a file and return its path."""
+    with open(path, 'wb') as fileobj:
+        for piece in iter_user_archive(user, chunk_size):
+            fileobj.write(piece)
+    return path
+
+
+def export_user_archive(user_id: int, directory: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Write one user's archive into a directory (module level, so process pools can run it)."""
+    user = get_user_model().objects.get(pk=user_id)
+    return write_user_archive(user, os.path.join(directory, archive_filename(user)), chunk_size)
@@ -0,0 +1,33 @@
+"""
+FilterSets for list endpoints (used by DjangoFilterBackend)
+"""
+import django_filters
+
+from finance.models import Expense, Income
+
+
+class EntryFilter(django_filters.FilterSet):
+    """
+    Date, amount and category filters shared by the Income and Expense lists.
+    /api/expenses?date_from=2025-01-01&date_to=2025-01-31&amount_min=10&category=3
+    """
+    date = django_filters.DateFilter(field_name='date')
+    date_from = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_to = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+    amount_min = django_filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    amount_max = django_filters.NumberFilter(field_name='amount', lookup_expr='lte')
+    # Filters on the foreign key column, so no category lookup query is needed
+    category = django_filters.NumberFilter(field_name='category_id')
+    category_name = django_filters.CharFilter(field_name='category__name', lookup_expr='iexact')
+
+
+class IncomeFilter(EntryFilter):
+    class Meta:
+        model = Income
+        fields = []
+
+
+class ExpenseFilter(EntryFilter):
+    class Meta:
+        model = Expense
+        fields = []
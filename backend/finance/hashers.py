@@ -0,0 +1,18 @@
+"""
+PBKDF2 password hasher whose iteration count comes from settings.
+
+FINANCE_PBKDF2_ITERATIONS sets the cost of new hashes. Hashes stored with
+another count (or another hasher from PASSWORD_HASHERS) still verify, and
+are rewritten with the current profile on the user's next successful login
+(see finance.passwords.verify_password).
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """Drop-in for PBKDF2PasswordHasher (same "pbkdf2_sha256" hashes) with configurable iterations."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'FINANCE_PBKDF2_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
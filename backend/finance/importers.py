@@ -0,0 +1,314 @@
+"""
+Streaming bank statement import (CSV and OFX) into Income/Expense.
+
+Statements are read row by row from a text stream, mapped to the user's
+categories through an in-memory name index, and inserted with bulk_create
+in bounded chunks. Each chunk commits in its own short transaction, so
+memory stays flat regardless of file size and concurrent writers are only
+blocked for the duration of one chunk.
+
+CSV files need a header row with the columns date, amount and category
+(optional: note/description, type). Without a type column, negative
+amounts are imported as expenses and positive ones as income.
+
+Rows matching entries the user already had (same date, amount and note,
+see finance.duplicates) are skipped, or imported and reported with
+on_duplicate='flag', so overlapping statements can be re-imported.
+"""
+import csv
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from django.db import IntegrityError, transaction
+
+from finance import cache as response_cache
+from finance import rollups
+from finance.duplicates import SKIP, DuplicateFinder
+from finance.models import Category, Expense, Income
+
+
+DEFAULT_CHUNK_SIZE = 1000
+# Only the first errors are kept, so a broken file cannot grow memory
+MAX_REPORTED_ERRORS = 100
+# Income/Expense.amount has max_digits=12, decimal_places=2
+MAX_AMOUNT = Decimal('9999999999.99')
+
+CSV = 'csv'
+OFX = 'ofx'
+FORMATS = (CSV, OFX)
+
+INCOME_TYPES = {'income', 'credit', 'cr', 'dep', 'deposit', 'int', 'div'}
+EXPENSE_TYPES = {'expense', 'debit', 'dr', 'payment', 'pos', 'atm', 'fee', 'srvchg', 'check'}
+
+# Accepted spellings of the CSV columns
+CSV_COLUMNS = {
+    'date': ('date', 'posted', 'transaction date'),
+    'amount': ('amount', 'value'),
+    'category': ('category',),
+    'note': ('note', 'description', 'memo', 'details'),
+    'type': ('type', 'kind'),
+}
+
+
+class StatementError(ValueError):
+    """A statement file that cannot be read."""
+
+
+class RowError(ValueError):
+    """A statement row that cannot be imported."""
+
+
+def detect_format(filename: str) -> str:
+    """Guess the statement format from a file name."""
+    return OFX if filename.lower().endswith(('.ofx', '.qfx')) else CSV
+
+
+def read_csv_rows(stream: TextIO) -> Iterator[Dict[str, str]]:
+    """Yield CSV rows as {line, date, amount, category, note, type} strings."""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    positions = {}
+    normalized = [column.strip().lower() for column in header]
+    for key, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in normalized:
+                positions[key] = normalized.index(name)
+                break
+    missing = [key for key in ('date', 'amount') if key not in positions]
+    if missing:
+        raise StatementError(f"Missing CSV column(s): {', '.join(missing)}.")
+
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        values = {key: (row[index] if index < len(row) else '') for key, index in positions.items()}
+        values['line'] = reader.line_num
+        yield values
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def read_ofx_rows(stream: TextIO, block_size: int = 64 * 1024) -> Iterator[Dict[str, str]]:
+    """
+    Yield OFX <STMTTRN> records as {line, date, amount, note, type} strings.
+    Handles both SGML (unclosed leaf tags) and XML files, reading in blocks.
+    """
+    buffer = ''
+    transaction_number = 0
+    current: Optional[Dict[str, str]] = None
+
+    while True:
+        block = stream.read(block_size)
+        buffer += block
+        # Keep a possibly incomplete trailing tag for the next block
+        cut = buffer.rfind('<') if block else len(buffer)
+        complete, buffer = buffer[:cut], buffer[cut:]
+
+        for closing, tag, value in OFX_TAG.findall(complete):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    transaction_number += 1
+                    yield {
+                        'line': transaction_number,
+                        'date': current.get('DTPOSTED', '')[:8],
+                        'amount': current.get('TRNAMT', ''),
+                        'note': ' - '.join(filter(None, [current.get('NAME'), current.get('MEMO')])),
+                        'type': '',
+                    }
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+
+        if not block:
+            return
+
+
+@dataclass
+class ImportResult:
+    """Running totals of an import, passed to the progress callback after each chunk."""
+    rows: int = 0
+    created: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    chunks: int = 0
+    errors: List[Dict] = field(default_factory=list)
+    duplicate_lines: List = field(default_factory=list)
+
+    def add_error(self, line, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def add_duplicate(self, line):
+        self.duplicates += 1
+        if len(self.duplicate_lines) < MAX_REPORTED_ERRORS:
+            self.duplicate_lines.append(line)
+
+    def as_dict(self) -> Dict:
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+            'duplicates': self.duplicates,
+            'chunks': self.chunks,
+            'errors': self.errors,
+            'duplicateLines': self.duplicate_lines,
+        }
+
+
+class StatementImporter:
+    """
+    Import parsed statement rows for one user.
+
+    Args:
+        user: Owner of the imported entries
+        chunk_size: Rows inserted (and committed) per transaction
+        default_category: Category name for rows without one (e.g. all OFX rows)
+        create_categories: Create missing categories instead of rejecting the rows
+        date_format: strptime format of CSV dates (OFX dates are always YYYYMMDD)
+        on_duplicate: 'skip' rows matching stored entries, or 'flag' (import and report) them
+        progress: Called with the ImportResult after every committed chunk
+    """
+
+    def __init__(
+        self,
+        user,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        default_category: Optional[str] = None,
+        create_categories: bool = False,
+        date_format: str = '%Y-%m-%d',
+        on_duplicate: str = SKIP,
+        progress: Optional[Callable[[ImportResult], None]] = None,
+    ):
+        self.user = user
+        self.chunk_size = max(1, chunk_size)
+        self.default_category = (default_category or '').strip()
+        self.create_categories = create_categories
+        self.date_format = date_format
+        self.on_duplicate = on_duplicate
+        self.progress = progress
+        self.duplicates = DuplicateFinder(user)
+        # Category name index: one query up front instead of a lookup per row
+        self.categories = {category.name.lower(): category for category in Category.objects.filter(user=user)}
+
+    def run(self, rows: Iterable[Dict[str, str]], file_format: str = CSV) -> ImportResult:
+        result = ImportResult()
+        date_format = '%Y%m%d' if file_format == OFX else self.date_format
+        chunk = []
+        try:
+            for row in rows:
+                result.rows += 1
+                try:
+                    chunk.append((row['line'], self.build_entry(row, date_format)))
+                except RowError as exc:
+                    result.add_error(row['line'], str(exc))
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    self.flush(chunk, result)
+                    chunk = []
+            if chunk:
+                self.flush(chunk, result)
+        finally:
+            # Chunks committed before a failure are kept, so invalidate for them too
+            if result.created:
+                response_cache.bump_data_version(self.user.pk)
+        return result
+
+    def flush(self, chunk: List, result: ImportResult):
+        """Insert one chunk of (line, entry) pairs in its own transaction and report progress."""
+        entries = [entry for _, entry in chunk]
+        new, duplicates = self.duplicates.split(entries)
+        for position in duplicates:
+            result.add_duplicate(chunk[position][0])
+        if self.on_duplicate == SKIP:
+            entries = [entries[position] for position in new]
+
+        incomes = [entry for entry in entries if isinstance(entry, Income)]
+        expenses = [entry for entry in entries if isinstance(entry, Expense)]
+        with transaction.atomic():
+            Income.objects.bulk_create(incomes)
+            Expense.objects.bulk_create(expenses)
+            # bulk_create sends no signals, so maintain the rollup here
+            rollups.record_entries(entries)
+
+        result.created += len(entries)
+        result.chunks += 1
+        if self.progress is not None:
+            self.progress(result)
+
+    def build_entry(self, row: Dict[str, str], date_format: str):
+        """Convert one parsed row into an unsaved Income or Expense."""
+        try:
+            entry_date = datetime.strptime(row.get('date', '').strip(), date_format).date()
+        except ValueError:
+            raise RowError(f"Invalid date '{row.get('date', '')}'.")
+
+        raw_amount = row.get('amount', '').strip().replace(',', '')
+        try:
+            amount = Decimal(raw_amount).quantize(Decimal('0.01'))
+            if not amount.is_finite():  # NaN passes quantize() but breaks every comparison
+                raise InvalidOperation
+        except InvalidOperation:
+            raise RowError(f"Invalid amount '{raw_amount}'.")
+        if not amount or abs(amount) > MAX_AMOUNT:
+            raise RowError(f"Amount must be non-zero and at most {MAX_AMOUNT}.")
+
+        kind = row.get('type', '').strip().lower()
+        if kind in INCOME_TYPES:
+            is_income = True
+        elif kind in EXPENSE_TYPES:
+            is_income = False
+        elif not kind:
+            is_income = amount > 0
+        else:
+            raise RowError(f"Unknown type '{kind}'.")
+
+        category = self.get_category(row.get('category', '').strip() or self.default_category, is_income)
+        model = Income if is_income else Expense
+        return model(
+            user=self.user,
+            category=category,
+            amount=abs(amount),
+            date=entry_date,
+            note=row.get('note', '').strip(),
+        )
+
+    def get_category(self, name: str, is_income: bool) -> Category:
+        """Resolve a category name through the index, creating it when allowed."""
+        if not name:
+            raise RowError("Missing category.")
+
+        category = self.categories.get(name.lower())
+        if category is None:
+            if not self.create_categories:
+                raise RowError(f"Unknown category '{name}'.")
+            try:
+                with transaction.atomic():
+                    category = Category.objects.create(user=self.user, name=name[:100], is_income=is_income)
+            except IntegrityError:
+                # Created concurrently under another spelling; load the stored one
+                category = Category.objects.filter(user=self.user, name__iexact=name[:100]).first()
+                if category is None:
+                    raise RowError(f"Could not create category '{name}'.")
+            self.categories[name.lower()] = category
+
+        if category.is_income != is_income:
+            kind = 'an income' if category.is_income else 'an expense'
+            raise RowError(f"Category '{category.name}' is {kind} category.")
+        return category
+
+
+def import_statement(user, stream: TextIO, file_format: str = CSV, **options) -> ImportResult:
+    """Parse a statement stream and import it for the user (see StatementImporter for options)."""
+    rows = read_ofx_rows(stream) if file_format == OFX else read_csv_rows(stream)
+    return StatementImporter(user, **options).run(rows, file_format=file_format)
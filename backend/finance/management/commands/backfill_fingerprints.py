@@ -0,0 +1,50 @@
+"""
+Fill the duplicate-detection fingerprint of existing Income/Expense rows.
+
+Rows are processed in primary-key batches, each updated with one statement
+in its own transaction, so the backfill can run on a live database.
+
+Usage:
+    python manage.py backfill_fingerprints
+    python manage.py backfill_fingerprints --all --batch-size 5000
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from finance.models import Expense, Income
+
+
+class Command(BaseCommand):
+    help = "Compute missing (or, with --all, every) Income/Expense fingerprint in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows updated per transaction.')
+        parser.add_argument('--all', action='store_true', help='Recompute fingerprints that are already set.')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        for model in (Income, Expense):
+            queryset = model.objects.order_by('pk').only('id', 'user_id', 'date', 'amount', 'note', 'fingerprint')
+            if not options['all']:
+                queryset = queryset.filter(fingerprint='')
+
+            updated = 0
+            last_pk = 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+
+                changed = []
+                for entry in batch:
+                    fingerprint = entry.compute_fingerprint()
+                    if fingerprint != entry.fingerprint:
+                        entry.fingerprint = fingerprint
+                        changed.append(entry)
+                with transaction.atomic():
+                    model.objects.bulk_update(changed, ['fingerprint'])
+                updated += len(changed)
+                self.stdout.write(f"  {model.__name__}: {updated} row(s) updated (up to id {last_pk})")
+
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: {updated} fingerprint(s) backfilled."))
@@ -0,0 +1,68 @@
+"""
+Measure password checks (logins) per second of one worker process for
+PBKDF2 iteration profiles, on the request thread and through a bounded
+hashing pool (finance.passwords) driven by concurrent request threads.
+No database access.
+
+Usage:
+    python manage.py benchmark_logins
+    python manage.py benchmark_logins --iterations 1000000 600000 --logins 40 --threads 8 --workers 4
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.exceptions import Throttled
+
+from finance import passwords
+
+PASSWORD = 'benchmark-password-123'
+
+
+class Command(BaseCommand):
+    help = "Benchmark logins/sec per worker for PBKDF2 iteration counts, inline and through the hashing pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, nargs='+', default=[settings.FINANCE_PBKDF2_ITERATIONS],
+                            help='PBKDF2 iteration counts to compare.')
+        parser.add_argument('--logins', type=int, default=20, help='Password checks per measurement.')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent request threads for the pool run.')
+        parser.add_argument('--workers', type=int, default=settings.FINANCE_PASSWORD_HASH_WORKERS,
+                            help='Hashing pool workers.')
+        parser.add_argument('--queue', type=int, default=settings.FINANCE_PASSWORD_HASH_QUEUE,
+                            help='Hashing pool queue size.')
+
+    def handle(self, *args, **options):
+        logins = max(1, options['logins'])
+        for iterations in options['iterations']:
+            with override_settings(FINANCE_PBKDF2_ITERATIONS=iterations):
+                encoded = make_password(PASSWORD)
+
+                started = time.perf_counter()
+                for _ in range(logins):
+                    check_password(PASSWORD, encoded)
+                inline = logins / (time.perf_counter() - started)
+
+                pool = passwords.HashingPool(options['workers'], options['queue'])
+
+                def login(_):
+                    try:
+                        return pool.run(check_password, PASSWORD, encoded)
+                    except Throttled:
+                        return None
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=max(1, options['threads'])) as threads:
+                    results = list(threads.map(login, range(logins)))
+                elapsed = time.perf_counter() - started
+                rejected = results.count(None)
+                pooled = (logins - rejected) / elapsed
+
+            self.stdout.write(
+                f"{iterations:>9} iterations: inline {inline:7.1f} logins/s, "
+                f"pool ({pool.workers} workers, {options['threads']} threads) {pooled:7.1f} logins/s, "
+                f"{rejected} rejected with 429"
+            )
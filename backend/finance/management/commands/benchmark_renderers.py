@@ -0,0 +1,76 @@
+"""
+Compare JSON encode time of DRF's JSONRenderer and FastJSONRenderer on an
+expense list response (in-memory rows, no database access).
+
+Usage:
+    python manage.py benchmark_renderers
+    python manage.py benchmark_renderers --rows 50000 --repeat 10
+"""
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from finance.models import Category, Expense
+from finance.renderers import FastJSONRenderer, orjson
+from finance.serializers import ExpenseSerializer
+from finance.utils import success_response
+
+
+def best_of(repeat, func):
+    """Return (best wall time in seconds, result of the last call)."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = "Benchmark JSON rendering of a large expense list with the stdlib and orjson renderers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Expenses in the list.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per renderer; the best is reported.')
+
+    def handle(self, *args, **options):
+        user = get_user_model()(id=1, username='bench@example.com')
+        categories = [
+            Category(id=index, user=user, name=f'Category {index}', is_income=False, updated_at=timezone.now())
+            for index in range(1, 21)
+        ]
+        now = timezone.now()
+        expenses = [
+            Expense(
+                id=index,
+                user=user,
+                category=categories[index % len(categories)],
+                amount=Decimal(index % 50000) / 100 + 1,
+                date=date(2025, 1, 1) + timedelta(days=index % 365),
+                note=f'Expense number {index}',
+                created_at=now,
+            )
+            for index in range(1, options['rows'] + 1)
+        ]
+
+        serialize_time, data = best_of(1, lambda: ExpenseSerializer(expenses, many=True).data)
+        payload = success_response(data=data, message='Items retrieved successfully').data
+        self.stdout.write(f"{len(expenses)} rows serialized in {serialize_time * 1000:.1f} ms")
+
+        repeat = max(1, options['repeat'])
+        stdlib_time, stdlib_content = best_of(repeat, lambda: JSONRenderer().render(payload))
+        fast_time, fast_content = best_of(repeat, lambda: FastJSONRenderer().render(payload))
+
+        self.stdout.write(f"JSONRenderer:     {stdlib_time * 1000:8.1f} ms  ({len(stdlib_content)} bytes)")
+        self.stdout.write(f"FastJSONRenderer: {fast_time * 1000:8.1f} ms  ({len(fast_content)} bytes)")
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer used the stdlib encoder."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Speedup: {stdlib_time / fast_time:.1f}x, identical output: {stdlib_content == fast_content}"
+        ))
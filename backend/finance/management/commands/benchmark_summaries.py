@@ -0,0 +1,99 @@
+"""
+Measure the CPU time the summary and budget-management payloads spend in
+the serializer validation round trip the views used to run on them.
+
+A throwaway user with --categories expense/income categories and
+--months months of budgets and rollup rows is created inside a transaction
+that is rolled back afterwards.
+
+Usage:
+    python manage.py benchmark_summaries
+    python manage.py benchmark_summaries --categories 100 --months 24 --repeat 50
+"""
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from finance.models import Budget, Category, MonthlyCategoryTotal
+from finance.serializers import BudgetManagementSerializer, FinancialSummarySerializer
+from finance.utils import shift_month
+from finance.views import BudgetManagementView, FinancialSummaryView
+
+
+def mean_time(repeat, func):
+    """Return the mean CPU time of func in seconds."""
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - started) / repeat
+
+
+def validate(serializer):
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+class Command(BaseCommand):
+    help = "Benchmark building the summary payloads with and without serializer re-validation."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=100, help='Categories of each kind.')
+        parser.add_argument('--months', type=int, default=24, help='Months of budgets and rollup rows.')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement.')
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        today = date.today()
+        with transaction.atomic():
+            user = self.create_data(options['categories'], options['months'], today)
+
+            summary = FinancialSummaryView().build_summary(user, today)
+            rows = BudgetManagementView().build_rows(user, today)
+            results = [
+                ('summary', mean_time(repeat, lambda: FinancialSummaryView().build_summary(user, today)),
+                 mean_time(repeat, lambda: validate(FinancialSummarySerializer(data=summary)))),
+                ('budget-management', mean_time(repeat, lambda: BudgetManagementView().build_rows(user, today)),
+                 mean_time(repeat, lambda: validate(BudgetManagementSerializer(data=rows, many=True)))),
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{options['categories']} categories x {options['months']} months, mean of {repeat} run(s), CPU time:"
+        )
+        for label, build_time, validate_time in results:
+            self.stdout.write(
+                f"  {label:18} build {build_time * 1000:7.2f} ms, "
+                f"re-validation {validate_time * 1000:7.2f} ms "
+                f"({validate_time / (build_time + validate_time):.0%} of the old request)"
+            )
+
+    def create_data(self, categories, months, today):
+        """Create a user with categories, budgets and rollup rows for the last months."""
+        email = 'benchmark@example.invalid'
+        user = get_user_model().objects.create_user(username=email, email=email)
+        created = Category.objects.bulk_create(
+            [Category(user=user, name=f'Expense {index}', is_income=False) for index in range(categories)]
+            + [Category(user=user, name=f'Income {index}', is_income=True) for index in range(categories)]
+        )
+        window = [shift_month(today.year, today.month, -offset) for offset in range(months)]
+        Budget.objects.bulk_create([
+            Budget(user=user, category=category, year=year, month=month, amount=Decimal('250.00'))
+            for category in created if not category.is_income
+            for year, month in window
+        ])
+        MonthlyCategoryTotal.objects.bulk_create([
+            MonthlyCategoryTotal(
+                user=user, category=category, year=year, month=month,
+                income_total=Decimal('1200.50') if category.is_income else 0,
+                income_count=3 if category.is_income else 0,
+                expense_total=0 if category.is_income else Decimal('187.25'),
+                expense_count=0 if category.is_income else 5,
+            )
+            for category in created
+            for year, month in window
+        ])
+        return user
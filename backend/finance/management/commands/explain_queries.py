@@ -0,0 +1,75 @@
+"""
+Print PostgreSQL EXPLAIN plans for the queries issued by each API endpoint.
+
+Usage:
+    python manage.py explain_queries --email user@example.com
+    python manage.py explain_queries --email user@example.com --analyze --endpoint transactions
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+
+# (label, url name, query params) for every read endpoint worth checking
+ENDPOINTS = [
+    ('categories', 'category-list', {}),
+    ('incomes', 'income-list', {}),
+    ('expenses', 'expense-list', {}),
+    ('budgets', 'budget-list', {}),
+    ('summary', 'financial_summary', {}),
+    ('transactions', 'transactions', {}),
+    ('transactions-date-range', 'transactions', {'date_from': '2025-01-01', 'date_to': '2025-12-31'}),
+    ('transactions-category-search', 'transactions', {'category': 'foo'}),
+    ('transactions-cursor', 'transactions', {'pagination': 'cursor', 'include_count': 'false'}),
+    ('budget-management', 'budget-management', {}),
+]
+
+
+class Command(BaseCommand):
+    help = "Run each endpoint for a user and print the EXPLAIN plan of every SELECT it issues."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Email of the user to run the endpoints as.')
+        parser.add_argument('--analyze', action='store_true', help='Use EXPLAIN (ANALYZE, BUFFERS).')
+        parser.add_argument('--endpoint', action='append', help='Only explain the given endpoint label(s).')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['email'].lower())
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email '{options['email']}'.")
+
+        explain_prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if options['analyze'] else 'EXPLAIN '
+        selected = options['endpoint']
+        factory = APIRequestFactory()
+
+        for label, url_name, params in ENDPOINTS:
+            if selected and label not in selected:
+                continue
+
+            path = reverse(url_name)
+            request = factory.get(path, params)
+            force_authenticate(request, user=user)
+            match = resolve(path)
+
+            with CaptureQueriesContext(connection) as captured:
+                response = match.func(request, *match.args, **match.kwargs)
+                response.render()
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"=== {label} (GET {path}) -> {response.status_code}, {len(captured)} queries ==="
+            ))
+            for index, query in enumerate(captured.captured_queries, start=1):
+                sql = query['sql']
+                self.stdout.write(self.style.SQL_KEYWORD(f"-- [{index}] {sql}"))
+                if not sql.lstrip().upper().startswith(('SELECT', '(SELECT')):
+                    continue
+                with connection.cursor() as cursor:
+                    cursor.execute(explain_prefix + sql)
+                    for (line,) in cursor.fetchall():
+                        self.stdout.write(f"   {line}")
+            self.stdout.write('')
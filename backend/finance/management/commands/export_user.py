@@ -0,0 +1,68 @@
+"""
+Write full-account ZIP archives (categories, incomes, expenses, budgets).
+
+Each archive is streamed from chunked queryset iteration straight into the
+ZIP file. With several users and --workers > 1 the archives are written in
+parallel by a process pool, each worker with its own database connection.
+
+Usage:
+    python manage.py export_user --email user@example.com
+    python manage.py export_user --email a@example.com --email b@example.com --output-dir backups
+    python manage.py export_user --all --workers 4 --output-dir backups
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from finance import exports
+
+
+class Command(BaseCommand):
+    help = "Export users' data to ZIP archives with one CSV file per model."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', action='append', default=[], help='User to export (repeatable).')
+        parser.add_argument('--all', action='store_true', help='Export every active user.')
+        parser.add_argument('--output-dir', default='.', help='Directory the archives are written to.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes exporting users in parallel (1 exports in this process).')
+        parser.add_argument('--chunk-size', type=int, default=exports.DEFAULT_CHUNK_SIZE,
+                            help='Rows fetched per round trip of the database cursor.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['all']:
+            users = User.objects.filter(is_active=True)
+        elif options['email']:
+            emails = [email.lower() for email in options['email']]
+            users = User.objects.filter(email__in=emails)
+            missing = set(emails) - set(users.values_list('email', flat=True))
+            if missing:
+                raise CommandError(f"No user with email {', '.join(sorted(missing))}.")
+        else:
+            raise CommandError("Pass --email or --all.")
+
+        user_ids = list(users.order_by('pk').values_list('pk', flat=True))
+        directory = options['output_dir']
+        os.makedirs(directory, exist_ok=True)
+        chunk_size = options['chunk_size']
+
+        if options['workers'] <= 1 or len(user_ids) <= 1:
+            for user_id in user_ids:
+                self.stdout.write(f"  {exports.export_user_archive(user_id, directory, chunk_size)}")
+        else:
+            # Forked workers must not share this process's database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+                futures = [
+                    pool.submit(exports.export_user_archive, user_id, directory, chunk_size)
+                    for user_id in user_ids
+                ]
+                for future in as_completed(futures):
+                    self.stdout.write(f"  {future.result()}")
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {len(user_ids)} user(s) to {directory}."))
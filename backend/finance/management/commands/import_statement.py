@@ -0,0 +1,74 @@
+"""
+Import a CSV or OFX bank statement into a user's incomes and expenses.
+
+Usage:
+    python manage.py import_statement statement.csv --email user@example.com
+    python manage.py import_statement export.ofx --email user@example.com --default-category Bank
+    python manage.py import_statement statement.csv --email user@example.com --create-categories --chunk-size 5000
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance import importers
+from finance.duplicates import DUPLICATE_POLICIES, SKIP
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV/OFX statement into Income and Expense rows, inserting in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Statement file to import.')
+        parser.add_argument('--email', required=True, help='Owner of the imported entries.')
+        parser.add_argument('--format', dest='file_format', choices=importers.FORMATS,
+                            help='Statement format (default: from the file extension).')
+        parser.add_argument('--chunk-size', type=int, default=importers.DEFAULT_CHUNK_SIZE,
+                            help='Rows inserted per transaction.')
+        parser.add_argument('--default-category', help='Category for rows without one (required for OFX).')
+        parser.add_argument('--create-categories', action='store_true',
+                            help='Create missing categories instead of skipping their rows.')
+        parser.add_argument('--date-format', default='%Y-%m-%d', help='strptime format of CSV dates.')
+        parser.add_argument('--on-duplicate', choices=DUPLICATE_POLICIES, default=SKIP,
+                            help='Skip rows matching stored entries, or import and flag them.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['email'].lower())
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email '{options['email']}'.")
+
+        file_format = options['file_format'] or importers.detect_format(options['path'])
+
+        def report_progress(result):
+            self.stdout.write(
+                f"  chunk {result.chunks}: {result.rows} rows read, "
+                f"{result.created} created, {result.duplicates} duplicate(s), {result.failed} failed"
+            )
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                result = importers.import_statement(
+                    user,
+                    stream,
+                    file_format=file_format,
+                    chunk_size=options['chunk_size'],
+                    default_category=options['default_category'],
+                    create_categories=options['create_categories'],
+                    date_format=options['date_format'],
+                    on_duplicate=options['on_duplicate'],
+                    progress=report_progress,
+                )
+        except OSError as exc:
+            raise CommandError(f"Could not open '{options['path']}': {exc}")
+        except (importers.StatementError, UnicodeDecodeError) as exc:
+            raise CommandError(f"Could not read the statement: {exc}")
+
+        for error in result.errors:
+            self.stderr.write(f"  line {error['line']}: {error['error']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"  ... {result.failed - len(result.errors)} more failed row(s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} of {result.rows} row(s) for {user.email} in {result.chunks} chunk(s); "
+            f"{result.duplicates} duplicate(s) {'skipped' if options['on_duplicate'] == SKIP else 'flagged'}."
+        ))
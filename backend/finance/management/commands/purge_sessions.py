@@ -0,0 +1,25 @@
+"""
+Delete device sessions whose refresh token has expired.
+
+Rows are deleted in batches, one autocommitted DELETE per batch, so the
+purge can run on a live database (e.g. from cron) without long locks.
+
+Usage:
+    python manage.py purge_sessions
+    python manage.py purge_sessions --batch-size 5000
+"""
+from django.core.management.base import BaseCommand
+
+from finance import sessions
+
+
+class Command(BaseCommand):
+    help = "Delete expired user sessions in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=sessions.DEFAULT_PURGE_BATCH_SIZE,
+                            help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        deleted = sessions.purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired session(s)."))
@@ -0,0 +1,46 @@
+"""
+Delete expired rows of simplejwt's outstanding and blacklisted token tables.
+
+The outstanding-token table is walked in primary-key order and expired rows
+are deleted in batches, each batch (blacklist rows first, then the
+outstanding rows) in its own short transaction, so the purge can run on a
+live database without holding long locks. simplejwt's own
+flushexpiredtokens command deletes everything in one statement instead.
+
+Usage:
+    python manage.py purge_tokens
+    python manage.py purge_tokens --batch-size 5000
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding/blacklisted JWT rows in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tokens deleted per transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        now = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('pk')
+
+        outstanding = blacklisted = 0
+        last_pk = 0
+        while True:
+            ids = list(expired.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_pk = ids[-1]
+            with transaction.atomic():
+                deleted, _ = BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                blacklisted += deleted
+                deleted, _ = OutstandingToken.objects.filter(pk__in=ids).delete()
+                outstanding += deleted
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {outstanding} expired outstanding token(s), {blacklisted} of them blacklisted."
+        ))
@@ -0,0 +1,40 @@
+"""
+Rebuild the MonthlyCategoryTotal rollup from the raw Income/Expense rows.
+Cached summaries of the rebuilt users are invalidated.
+
+Usage:
+    python manage.py rebuild_rollups
+    python manage.py rebuild_rollups --email user@example.com
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from finance import rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-user monthly category rollup from Income and Expense rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Only rebuild the rollup of this user.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['email']:
+            try:
+                users = [User.objects.get(email=options['email'].lower())]
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email '{options['email']}'.")
+        else:
+            users = User.objects.order_by('id').iterator()
+
+        # One short transaction per user keeps locks on the rollup table brief
+        rebuilt_users = 0
+        written_rows = 0
+        for user in users:
+            written_rows += rollups.rebuild(user)
+            rebuilt_users += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt rollups for {rebuilt_users} user(s): {written_rows} row(s) written."
+        ))
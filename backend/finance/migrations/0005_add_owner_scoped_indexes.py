@@ -0,0 +1,51 @@
+# Generated migration
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Indexes on the entry tables are built CONCURRENTLY so writers are not blocked
+    atomic = False
+
+    dependencies = [
+        ('finance', '0004_add_expense_and_budget_data'),
+    ]
+
+    operations = [
+        # Step 1: (user, date DESC, created_at DESC) for owner-scoped date filters and ordering
+        AddIndexConcurrently(
+            model_name='income',
+            index=models.Index(fields=['user', '-date', '-created_at'], name='finance_income_user_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='expense',
+            index=models.Index(fields=['user', '-date', '-created_at'], name='finance_expense_user_date_idx'),
+        ),
+
+        # Step 2: Case-insensitive unique category names per user
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(
+                models.F('user'),
+                django.db.models.functions.text.Lower('name'),
+                name='finance_category_user_lower_name_uniq'
+            ),
+        ),
+
+        # Step 3: Trigram index for category name search (icontains)
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='category',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('name'),
+                    name='gin_trgm_ops'
+                ),
+                name='finance_category_name_trgm'
+            ),
+        ),
+    ]
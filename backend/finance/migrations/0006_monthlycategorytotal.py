@@ -0,0 +1,64 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_monthly_totals(apps, schema_editor):
+    """Build the rollup from the existing Income and Expense rows."""
+    MonthlyCategoryTotal = apps.get_model('finance', 'MonthlyCategoryTotal')
+    totals = {}
+    for model_name, offset in (('Income', 0), ('Expense', 2)):
+        model = apps.get_model('finance', model_name)
+        rows = model.objects.order_by().annotate(
+            year=ExtractYear('date'), month=ExtractMonth('date')
+        ).values('user_id', 'category_id', 'year', 'month').annotate(total=Sum('amount'), count=Count('id'))
+        for row in rows:
+            key = (row['user_id'], row['category_id'], row['year'], row['month'])
+            values = totals.setdefault(key, [0, 0, 0, 0])
+            values[offset] = row['total']
+            values[offset + 1] = row['count']
+
+    MonthlyCategoryTotal.objects.bulk_create(
+        [
+            MonthlyCategoryTotal(
+                user_id=user_id, category_id=category_id, year=year, month=month,
+                income_total=values[0], income_count=values[1],
+                expense_total=values[2], expense_count=values[3],
+            )
+            for (user_id, category_id, year, month), values in totals.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_add_owner_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCategoryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('income_count', models.IntegerField(default=0)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='finance.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+                'unique_together': {('user', 'category', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_monthly_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated migration
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Indexes on the entry tables are built CONCURRENTLY so writers are not blocked
+    atomic = False
+
+    dependencies = [
+        ('finance', '0007_add_updated_at'),
+    ]
+
+    operations = [
+        # Step 1: Fingerprint columns (existing rows are filled by `manage.py backfill_fingerprints`)
+        migrations.AddField(
+            model_name='income',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+
+        # Step 2: (user, fingerprint) indexes for set-based duplicate lookups
+        AddIndexConcurrently(
+            model_name='income',
+            index=models.Index(fields=['user', 'fingerprint'], name='finance_income_user_fp_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='expense',
+            index=models.Index(fields=['user', 'fingerprint'], name='finance_expense_user_fp_idx'),
+        ),
+    ]
@@ -1,12 +1,15 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower, Upper
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from finance.utils import entry_fingerprint
 
 
 class User(AbstractUser):
     email = models.EmailField(_('email address'), unique=True)
-    refresh_token = models.CharField(max_length=512, blank=True, null=True)
     
     # Explicitly remove first_name and last_name fields inherited from AbstractUser
     first_name = None
@@ -40,17 +43,44 @@ class Category(models.Model):
     name = models.CharField(max_length=100)
     is_income = models.BooleanField(default=False)  # true = income, false = expense
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         unique_together = ("user", "name")  # ensures each user cannot duplicate names
         ordering = ["name"]
+        constraints = [
+            # Case-insensitive uniqueness; also serves the name lookups in CategorySerializer
+            models.UniqueConstraint(F("user"), Lower("name"), name="finance_category_user_lower_name_uniq"),
+        ]
+        indexes = [
+            # Trigram index for category__name__icontains (compiled to UPPER(name) LIKE ...)
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="finance_category_name_trgm"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({'Income' if self.is_income else 'Expense'})"
 
+class FingerprintedEntry:
+    """
+    Keeps the duplicate-detection fingerprint of Income/Expense in sync on save().
+    Paths that bypass save() (bulk_create, queryset.update) set it themselves.
+    """
+
+    def compute_fingerprint(self) -> str:
+        return entry_fingerprint(self.user_id, self.date, self.amount, self.note)
+
+    def save(self, *args, **kwargs):
+        self.fingerprint = self.compute_fingerprint()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "fingerprint"}
+        super().save(*args, **kwargs)
+
+
 # ------------------------------------------------------------
 # 3. Income model
 # ------------------------------------------------------------
-class Income(models.Model):
+class Income(FingerprintedEntry, models.Model):
     """
     Stores every INCOME entry for a user.
     Example:
@@ -74,9 +104,20 @@ class Income(models.Model):
     note = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # sha256 of (user, date, amount, normalized note), see finance.utils.entry_fingerprint
+    fingerprint = models.CharField(max_length=64, blank=True, default="", editable=False)
 
     class Meta:
         ordering = ["-date", "-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-date", "-created_at"], name="finance_income_user_date_idx"),
+            # Serves the per-user max(updated_at) behind conditional GET ETags
+            models.Index(fields=["user", "updated_at"], name="finance_income_user_upd_idx"),
+            # Set-based duplicate lookups during imports and bulk creates
+            models.Index(fields=["user", "fingerprint"], name="finance_income_user_fp_idx"),
+        ]
 
     def __str__(self):
         return f"Income {self.amount} on {self.date}"
@@ -85,7 +126,7 @@ class Income(models.Model):
 # ------------------------------------------------------------
 # 4. Expense model
 # ------------------------------------------------------------
-class Expense(models.Model):
+class Expense(FingerprintedEntry, models.Model):
     """
     Stores every EXPENSE entry for a user.
     Example:
@@ -109,9 +150,20 @@ class Expense(models.Model):
     note = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # sha256 of (user, date, amount, normalized note), see finance.utils.entry_fingerprint
+    fingerprint = models.CharField(max_length=64, blank=True, default="", editable=False)
 
     class Meta:
         ordering = ["-date", "-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-date", "-created_at"], name="finance_expense_user_date_idx"),
+            # Serves the per-user max(updated_at) behind conditional GET ETags
+            models.Index(fields=["user", "updated_at"], name="finance_expense_user_upd_idx"),
+            # Set-based duplicate lookups during imports and bulk creates
+            models.Index(fields=["user", "fingerprint"], name="finance_expense_user_fp_idx"),
+        ]
 
     def __str__(self):
         return f"Expense {self.amount} on {self.date}"
@@ -146,6 +198,7 @@ class Budget(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("user", "category", "year", "month")  # only 1 budget per category per month
@@ -168,3 +221,68 @@ class Budget(models.Model):
         return f"Budget {self.month}/{self.year} = {self.amount}"
 
 
+# ------------------------------------------------------------
+# 6. Monthly category rollup
+# ------------------------------------------------------------
+class MonthlyCategoryTotal(models.Model):
+    """
+    Per-user monthly totals of Income and Expense entries per category.
+    Kept in sync incrementally by finance.rollups whenever entries are
+    created, updated or deleted, so dashboard reads cost depend on the
+    number of months and categories rather than on transaction volume.
+    Rebuild with: python manage.py rebuild_rollups
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_totals"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name="monthly_totals"
+    )
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1 to 12
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    income_count = models.IntegerField(default=0)
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "category", "year", "month")  # one row per category per month
+        ordering = ["-year", "-month"]
+
+    def __str__(self):
+        return f"Totals {self.month}/{self.year} for category {self.category_id}"
+
+
+# ------------------------------------------------------------
+# 7. User session model
+# ------------------------------------------------------------
+class UserSession(models.Model):
+    """
+    One row per signed-in device, keyed by the jti of its current refresh
+    token. Login inserts a row, refresh rotates the jti in place and logout
+    deletes it, so token traffic never rewrites the User row.
+    Expired rows are removed with: python manage.py purge_sessions
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="sessions"
+    )
+    jti = models.CharField(max_length=255, unique=True)  # jti of the current refresh token
+    user_agent = models.CharField(max_length=255, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)  # expiry of the current refresh token
+
+    class Meta:
+        ordering = ["-last_used_at"]
+
+    def __str__(self):
+        return f"Session {self.jti} for user {self.user_id}"
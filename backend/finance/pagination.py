@@ -0,0 +1,240 @@
+"""
+Pagination classes for list endpoints
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TransactionPagination(PageNumberPagination):
+    """Custom pagination for transactions."""
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TransactionCursorPagination:
+    """
+    Keyset (cursor) pagination for the merged Income/Expense transaction list.
+
+    Rows are ordered by (date, created_at, kind, id) descending, where kind is
+    1 for income and 0 for expense. A cursor encodes the position of the
+    boundary row, and each page is fetched with a "row comes after the cursor"
+    filter on both sides of the UNION ALL instead of an OFFSET, so deep pages
+    cost the same as the first one.
+
+    Enabled with ?pagination=cursor (or any ?cursor=...). Pass
+    ?include_count=false to skip the total count query.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    include_count_query_param = 'include_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request) -> bool:
+        """Return True when the request asks for cursor pagination."""
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def get_page_size(self, request) -> int:
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def encode_cursor(self, row: Dict[str, Any], reverse: bool) -> str:
+        """Encode the position of a row into an opaque cursor string."""
+        position = {
+            'd': row['date'].isoformat(),
+            'c': row['created_at'].isoformat(),
+            'k': 1 if row['is_income'] else 0,
+            'i': row['id'],
+            'r': 1 if reverse else 0,
+        }
+        return urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode()
+
+    def decode_cursor(self, request) -> Optional[Dict[str, Any]]:
+        """Decode the cursor from the request, or return None on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            return {
+                'date': date.fromisoformat(position['d']),
+                'created_at': datetime.fromisoformat(position['c']),
+                'kind': int(position['k']),
+                'id': int(position['i']),
+                'reverse': bool(position['r']),
+            }
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_keyset_filter(self, position: Dict[str, Any], kind: int, reverse: bool) -> Q:
+        """
+        Build the "row comes after the cursor" condition for one side of the
+        union. The kind is constant within each side, so the kind comparison
+        is resolved here instead of in SQL.
+        """
+        lookup = 'gt' if reverse else 'lt'
+        condition = Q(**{f'date__{lookup}': position['date']}) | Q(**{
+            'date': position['date'],
+            f'created_at__{lookup}': position['created_at'],
+        })
+
+        kind_after_cursor = kind > position['kind'] if reverse else kind < position['kind']
+        if kind_after_cursor:
+            condition |= Q(date=position['date'], created_at=position['created_at'])
+        elif kind == position['kind']:
+            condition |= Q(**{
+                'date': position['date'],
+                'created_at': position['created_at'],
+                f'id__{lookup}': position['id'],
+            })
+        return condition
+
+    def paginate(self, view, request) -> List[Dict[str, Any]]:
+        """Fetch a single page of transactions for the view."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        reverse = bool(position and position['reverse'])
+
+        income_queryset, expense_queryset = view.get_entry_querysets()
+        if self.include_count():
+            self.count = view.merge_entry_querysets(income_queryset, expense_queryset).count()
+
+        if position is not None:
+            income_queryset = income_queryset.filter(self.get_keyset_filter(position, 1, reverse))
+            expense_queryset = expense_queryset.filter(self.get_keyset_filter(position, 0, reverse))
+
+        # Fetch one extra row to find out whether another page follows
+        limit = self.page_size + 1
+        rows = list(view.merge_entry_querysets(
+            income_queryset, expense_queryset, reverse=reverse, limit=limit
+        )[:limit])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            # Walking backwards: there is always a newer page to return to
+            self.next_position = rows[-1] if rows else None
+            self.previous_position = rows[0] if rows and has_more else None
+        else:
+            self.next_position = rows[-1] if rows and has_more else None
+            self.previous_position = rows[0] if rows and position is not None else None
+        return rows
+
+    def include_count(self) -> bool:
+        value = self.request.query_params.get(self.include_count_query_param, 'true')
+        return value.lower() not in ['false', '0']
+
+    def get_link(self, row: Optional[Dict[str, Any]], reverse: bool) -> Optional[str]:
+        if row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def get_paginated_data(self, data) -> Dict[str, Any]:
+        """Return the page in the same shape as the page-number mode."""
+        paginated = {
+            'data': data,
+            'next': self.get_link(self.next_position, reverse=False),
+            'previous': self.get_link(self.previous_position, reverse=True),
+        }
+        if self.include_count():
+            paginated['count'] = self.count
+        return paginated
+
+
+class EntryPageNumberPagination(PageNumberPagination):
+    """Page-number mode of the Income/Expense lists."""
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_paginated_data(self, data) -> Dict[str, Any]:
+        return {
+            'data': data,
+            'count': self.page.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class EntryCursorPagination(CursorPagination):
+    """
+    Cursor mode of the Income/Expense lists. Follows the ?ordering= of the
+    view (OrderingFilter) and skips the total count query.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-date', '-created_at', '-id')
+
+    def get_paginated_data(self, data) -> Dict[str, Any]:
+        return {
+            'data': data,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class EntryPagination:
+    """
+    Opt-in pagination for the Income/Expense lists. Without paging
+    parameters the full list is returned, as the frontend expects.
+    - ?page=N and/or ?page_size=N (or ?pagination=page) -> page-number mode
+    - ?pagination=cursor or ?cursor=...                  -> cursor mode
+    """
+    mode_query_param = 'pagination'
+    display_page_controls = False
+
+    def __init__(self):
+        self.paginator = None
+
+    def get_paginator(self, request):
+        """Return the paginator the request asks for, or None."""
+        params = request.query_params
+        mode = params.get(self.mode_query_param)
+        if mode == 'cursor' or EntryCursorPagination.cursor_query_param in params:
+            return EntryCursorPagination()
+        if (mode == 'page' or EntryPageNumberPagination.page_query_param in params
+                or EntryPageNumberPagination.page_size_query_param in params):
+            return EntryPageNumberPagination()
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        if self.paginator is None:
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_data(self, data):
+        return self.paginator.get_paginated_data(data)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
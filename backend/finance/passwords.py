@@ -0,0 +1,156 @@
+"""
+Password hashing off the request thread, with backpressure.
+
+Login and registration hash passwords (PBKDF2, ~1M iterations by default)
+in a bounded thread pool shared by the worker process. hashlib releases
+the GIL while it hashes, so the pool runs on spare cores while other
+request threads keep serving reads. At most
+FINANCE_PASSWORD_HASH_WORKERS hashes run at once and at most
+FINANCE_PASSWORD_HASH_QUEUE more wait; beyond that the request is
+rejected with 429 instead of queueing unbounded CPU work.
+
+A process only fills its own pool when it serves requests on several
+threads (e.g. gunicorn --threads). Sync workers hash one password at a
+time each, so the same limit (workers + queue) is also enforced across
+processes with an in-flight counter in the finance cache, when that
+cache is shared (finance.cache.is_shared()). The counter is atomic on
+Redis and Memcached; DatabaseCache may let a racing request through.
+
+Only CPU work runs in the pool. Reads and writes of the user row stay on
+the request thread (and its database connection).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import Throttled
+
+from finance import cache as response_cache
+from finance.cache import KEY_PREFIX
+
+
+class SharedSlots:
+    """
+    Count of running hashes across every process using the finance cache.
+    Each job counts under the key of the minute it started; the current and
+    previous minute are summed, so a count left by a killed process expires.
+    """
+    window = 60
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+
+    def _key(self, window: int) -> str:
+        return f'{KEY_PREFIX}:password-hash-inflight:{window}'
+
+    def acquire(self) -> Optional[str]:
+        """Take a slot and return its key, or None when every slot is taken."""
+        cache = response_cache.get_cache()
+        window = int(time.time() // self.window)
+        key = self._key(window)
+        cache.add(key, 0, timeout=3 * self.window)
+        try:
+            running = cache.incr(key)
+        except ValueError:  # expired between add and incr
+            cache.add(key, 1, timeout=3 * self.window)
+            running = 1
+        if running + cache.get(self._key(window - 1), 0) <= self.capacity:
+            return key
+        self.release(key)
+        return None
+
+    def release(self, key: str):
+        try:
+            response_cache.get_cache().decr(key)
+        except ValueError:
+            pass  # expired; nothing left to give back
+
+
+class HashingPool:
+    """ThreadPoolExecutor with a cap on running plus waiting jobs."""
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int = 1):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._shared_slots = SharedSlots(self.capacity)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._counts = {'completed': 0, 'rejected': 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so forked (pre-fork server) workers start their own threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            return self._executor
+
+    def _reject(self):
+        with self._lock:
+            self._counts['rejected'] += 1
+        raise Throttled(wait=self.retry_after, detail=_('Too many sign-ins in progress. Try again shortly.'))
+
+    def run(self, func: Callable, *args):
+        """Run func(*args) in the pool and return its result; raise Throttled (429) when full."""
+        if not self._slots.acquire(blocking=False):
+            self._reject()
+        shared_key = None
+        try:
+            if response_cache.is_shared():
+                shared_key = self._shared_slots.acquire()
+                if shared_key is None:
+                    self._reject()
+            try:
+                return self._get_executor().submit(func, *args).result()
+            finally:
+                with self._lock:
+                    self._counts['completed'] += 1
+        finally:
+            if shared_key is not None:
+                self._shared_slots.release(shared_key)
+            self._slots.release()
+
+    def snapshot(self):
+        with self._lock:
+            return {**self._counts, 'workers': self.workers, 'capacity': self.capacity,
+                    'shared': response_cache.is_shared()}
+
+
+pool = HashingPool(
+    getattr(settings, 'FINANCE_PASSWORD_HASH_WORKERS', 2),
+    getattr(settings, 'FINANCE_PASSWORD_HASH_QUEUE', 8),
+)
+
+
+def _check(raw_password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+    rehashed = []
+    # The setter runs when the hash uses another hasher or cost than the
+    # preferred one (PASSWORD_HASHERS[0]), so the new hash is made here too
+    valid = check_password(raw_password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return valid, rehashed[0] if rehashed else None
+
+
+def hash_password(raw_password: str) -> str:
+    """Return the encoded hash of a password with the preferred hasher."""
+    return pool.run(make_password, raw_password)
+
+
+def verify_password(user, raw_password: str) -> bool:
+    """
+    Check a user's password. A valid password stored with an outdated
+    hasher or cost is rehashed and saved (password column only).
+    Pass user=None to spend the same time on unknown accounts.
+    """
+    if user is None:
+        pool.run(make_password, raw_password)
+        return False
+    valid, rehashed = pool.run(_check, raw_password, user.password)
+    if rehashed is not None:
+        user.password = rehashed
+        user.save(update_fields=['password'])
+    return valid
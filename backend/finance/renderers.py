@@ -0,0 +1,45 @@
+"""
+JSON renderer backed by orjson.
+
+orjson encodes dicts, lists, strings, numbers, dates and datetimes in C.
+Anything else (Decimal, lazy translation strings, querysets, ...) goes
+through DRF's own JSONEncoder.default. For the payloads this API returns
+(serializer data: strings, Decimals, 64-bit ints, dates and datetimes)
+the output matches rest_framework.renderers.JSONRenderer byte for byte.
+Data orjson cannot encode, such as integers beyond 64 bits, is rendered
+by the parent class instead. Not covered: non-finite floats, which
+orjson writes as null where JSONRenderer (STRICT_JSON) raises
+ValueError. When orjson is not installed, or the client asks for
+indented output, the stdlib encoder of the parent class is used.
+
+Enable in settings:
+    REST_FRAMEWORK = {'DEFAULT_RENDERER_CLASSES': ('finance.renderers.FastJSONRenderer', ...)}
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+# DRF writes UTC datetimes with a 'Z' suffix and stringifies non-string keys
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in replacement for JSONRenderer that encodes with orjson when available."""
+    encoder_default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(data, default=self.encoder_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by JSONRenderer too, so the output is also valid JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
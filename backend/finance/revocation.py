@@ -0,0 +1,198 @@
+"""
+In-process revocation filter for refresh tokens.
+
+With ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION, simplejwt checks
+the token blacklist with a JOIN query on every refresh, and nearly every
+answer is "not revoked". RevocationFilter keeps a Bloom filter of the jtis
+of blacklisted, unexpired tokens in each worker process, so a token whose
+jti is not in the filter is accepted without a query. Possible hits are
+confirmed against the database.
+
+The filter is rebuilt from the database every
+FINANCE_REVOCATION_REBUILD_SECONDS (dropping expired tokens). In between,
+blacklisting bumps a shared revocation version in the finance cache (see
+finance.cache); a process that sees a new version reads only the
+blacklist rows added since its last sync, by primary key range.
+
+A filter miss is only trusted while that version is shared by every
+worker (finance.cache.is_shared()) and can be read. Otherwise each check
+asks the database, as simplejwt does.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from finance import cache as response_cache
+
+logger = logging.getLogger(__name__)
+
+FALSE_POSITIVE_RATE = 0.001
+MIN_CAPACITY = 1024
+# Blacklist ids are allocated before commit, so a row can become visible after
+# a higher id was already synced. Catch-ups re-read this many ids below the
+# watermark to pick such rows up.
+CATCH_UP_OVERLAP = 100
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings (double hashing over one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float = FALSE_POSITIVE_RATE):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationFilter:
+    """Per-process filter answering "is this jti blacklisted?" mostly without a query."""
+
+    def __init__(self, rebuild_seconds: int):
+        self.rebuild_seconds = rebuild_seconds
+        self._lock = threading.Lock()
+        self._bloom: Optional[BloomFilter] = None
+        self._built_at = 0.0
+        self._version = None
+        self._watermark = 0  # highest BlacklistedToken id read so far
+        self._counts = {'checks': 0, 'db_checks': 0, 'revoked': 0, 'rebuilds': 0, 'catch_ups': 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _add_rows(self, bloom: BloomFilter, rows) -> int:
+        watermark = self._watermark
+        for row_id, jti in rows:
+            if jti not in bloom:  # overlapping catch-ups re-read rows
+                bloom.add(jti)
+            watermark = max(watermark, row_id)
+        return watermark
+
+    def _rebuild_due(self) -> bool:
+        bloom = self._bloom
+        return (bloom is None or bloom.count > bloom.capacity
+                or time.monotonic() - self._built_at >= self.rebuild_seconds)
+
+    def _rebuild(self):
+        # Read the version first: a bump during the query triggers a catch-up
+        version = response_cache.get_revocation_version()
+        rows = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            .values_list('id', 'token__jti')
+        )
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(rows)))
+        self._watermark = self._add_rows(bloom, rows)
+        self._bloom, self._version, self._built_at = bloom, version, time.monotonic()
+        self._counts['rebuilds'] += 1
+
+    def rebuild(self):
+        """Reload the filter with every blacklisted token that has not expired yet."""
+        with self._lock:
+            self._rebuild()
+
+    def sync(self):
+        """Rebuild when due, otherwise read the blacklist rows added since the last sync."""
+        if self._rebuild_due():
+            with self._lock:
+                if self._rebuild_due():
+                    self._rebuild()
+            return
+        version = response_cache.get_revocation_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            rows = BlacklistedToken.objects.filter(
+                id__gt=self._watermark - CATCH_UP_OVERLAP
+            ).values_list('id', 'token__jti')
+            self._watermark = self._add_rows(self._bloom, rows)
+            self._version = version
+            self._counts['catch_ups'] += 1
+
+    def _synced(self) -> bool:
+        """Sync and return whether a miss in the filter can be trusted."""
+        if not response_cache.is_shared():
+            # Blacklisting in other workers would never reach this filter
+            return False
+        try:
+            self.sync()
+        except Exception:
+            logger.warning('Revocation filter sync failed; checking the blacklist table', exc_info=True)
+            return False
+        return True
+
+    def add(self, jti: str):
+        """Add a token this process just blacklisted."""
+        if self._synced() and jti not in self._bloom:
+            self._bloom.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        self._count('checks')
+        if self._synced() and jti not in self._bloom:
+            return False
+        self._count('db_checks')
+        revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if revoked:
+            self._count('revoked')
+        return revoked
+
+    def clear(self):
+        with self._lock:
+            self._bloom, self._version, self._watermark = None, None, 0
+            self._counts = dict.fromkeys(self._counts, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            bloom = self._bloom
+            return {
+                **self._counts,
+                'size': bloom.count if bloom else 0,
+                'capacity': bloom.capacity if bloom else 0,
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if bloom else None,
+            }
+
+
+revocation_filter = RevocationFilter(getattr(settings, 'FINANCE_REVOCATION_REBUILD_SECONDS', 300))
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check asks revocation_filter first."""
+
+    def check_blacklist(self):
+        if revocation_filter.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+
+def blacklist(token):
+    """Blacklist a refresh token and make every process's filter aware of it."""
+    blacklisted = token.blacklist()
+    revocation_filter.add(token[api_settings.JTI_CLAIM])
+    response_cache.bump_revocation_version_on_commit()
+    return blacklisted
@@ -0,0 +1,192 @@
+"""
+Incremental maintenance of the MonthlyCategoryTotal rollup table.
+
+Every write to Income/Expense is turned into signed deltas keyed by
+(user, category, year, month) and applied with a single
+INSERT ... ON CONFLICT DO UPDATE statement, so concurrent writers add to
+the same row atomically instead of overwriting each other.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from finance import cache as response_cache
+from finance.models import Expense, Income, MonthlyCategoryTotal
+
+
+RollupKey = Tuple[int, int, int, int]  # (user_id, category_id, year, month)
+# [income_total, income_count, expense_total, expense_count]
+RollupDeltas = Dict[RollupKey, List]
+
+# Set while a bulk write applies grouped deltas itself (see deferred())
+_deferred = ContextVar('rollups_deferred', default=False)
+
+
+def new_deltas() -> RollupDeltas:
+    return defaultdict(lambda: [Decimal('0.00'), 0, Decimal('0.00'), 0])
+
+
+def add_delta(deltas: RollupDeltas, user_id, category_id, entry_date, amount, is_income: bool, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) one entry's contribution to the deltas."""
+    totals = deltas[(user_id, category_id, entry_date.year, entry_date.month)]
+    offset = 0 if is_income else 2
+    totals[offset] += sign * Decimal(amount)
+    totals[offset + 1] += sign
+
+
+def add_grouped_delta(deltas: RollupDeltas, rows: Iterable[dict], is_income: bool, sign: int = 1):
+    """Add rows produced by grouped_entry_totals() to the deltas."""
+    offset = 0 if is_income else 2
+    for row in rows:
+        totals = deltas[(row['user_id'], row['category_id'], row['year'], row['month'])]
+        totals[offset] += sign * row['total']
+        totals[offset + 1] += sign * row['count']
+
+
+def add_queryset_delta(deltas: RollupDeltas, queryset, sign: int = 1):
+    """Add the grouped contribution of an Income/Expense queryset to the deltas."""
+    add_grouped_delta(deltas, grouped_entry_totals(queryset), queryset.model is Income, sign=sign)
+
+
+def grouped_entry_totals(queryset):
+    """Group an Income/Expense queryset into per (user, category, year, month) totals."""
+    return queryset.order_by().annotate(
+        year=ExtractYear('date'),
+        month=ExtractMonth('date')
+    ).values('user_id', 'category_id', 'year', 'month').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    )
+
+
+def apply_deltas(deltas: RollupDeltas):
+    """
+    Apply deltas to the rollup table in one upsert statement.
+    Keys are sorted so concurrent writers lock rows in the same order.
+    """
+    rows = [
+        (key, totals) for key, totals in sorted(deltas.items())
+        if totals[1] or totals[3] or totals[0] or totals[2]
+    ]
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(MonthlyCategoryTotal._meta.db_table)
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+    params = []
+    for key, totals in rows:
+        params.extend(key)
+        params.extend(totals)
+
+    sql = f"""
+        INSERT INTO {table}
+            (user_id, category_id, year, month, income_total, income_count, expense_total, expense_count)
+        VALUES {placeholders}
+        ON CONFLICT (user_id, category_id, year, month) DO UPDATE SET
+            income_total = {table}.income_total + EXCLUDED.income_total,
+            income_count = {table}.income_count + EXCLUDED.income_count,
+            expense_total = {table}.expense_total + EXCLUDED.expense_total,
+            expense_count = {table}.expense_count + EXCLUDED.expense_count
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+@contextmanager
+def deferred():
+    """
+    Make the per-row signal handlers skip rollup maintenance, for bulk
+    writes (queryset.delete()) that apply grouped deltas themselves.
+    """
+    token = _deferred.set(True)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+
+
+def is_deferred() -> bool:
+    return _deferred.get()
+
+
+def record_entry_change(instance, previous: Optional[dict] = None, deleted: bool = False):
+    """
+    Update the rollup for a single Income/Expense write.
+
+    Args:
+        instance: The saved or deleted entry
+        previous: The entry's stored (user_id, category_id, date, amount) before
+            an update or delete; None for a new entry or one already deleted
+        deleted: True when the entry was deleted
+    """
+    is_income = isinstance(instance, Income)
+    deltas = new_deltas()
+    if previous is not None:
+        add_delta(
+            deltas, previous['user_id'], previous['category_id'], previous['date'], previous['amount'],
+            is_income, sign=-1
+        )
+    if not deleted:
+        add_delta(deltas, instance.user_id, instance.category_id, instance.date, instance.amount, is_income)
+    apply_deltas(deltas)
+
+
+def record_entries(instances: Iterable, sign: int = 1):
+    """
+    Update the rollup for entries written without model signals
+    (bulk_create); sign=-1 removes their contribution.
+    """
+    deltas = new_deltas()
+    for instance in instances:
+        add_delta(
+            deltas, instance.user_id, instance.category_id, instance.date, instance.amount,
+            isinstance(instance, Income), sign=sign
+        )
+    apply_deltas(deltas)
+
+
+def rebuild(user=None) -> int:
+    """
+    Recompute the rollup from the raw Income/Expense rows.
+    Rebuilds a single user when given, otherwise every user.
+    Returns the number of rollup rows written.
+
+    The rollup rows are locked before the entries are read, so upserts of
+    concurrent writes wait for the rebuild and apply their delta on top of
+    it. Cached summaries of the rebuilt users are invalidated on commit.
+    """
+    incomes = Income.objects.all()
+    expenses = Expense.objects.all()
+    rollups = MonthlyCategoryTotal.objects.all()
+    if user is not None:
+        incomes = incomes.filter(user=user)
+        expenses = expenses.filter(user=user)
+        rollups = rollups.filter(user=user)
+
+    with transaction.atomic():
+        user_ids = set(rollups.select_for_update().values_list('user_id', flat=True))
+        deltas = new_deltas()
+        add_grouped_delta(deltas, grouped_entry_totals(incomes), is_income=True)
+        add_grouped_delta(deltas, grouped_entry_totals(expenses), is_income=False)
+
+        rollups.delete()
+        MonthlyCategoryTotal.objects.bulk_create(
+            [
+                MonthlyCategoryTotal(
+                    user_id=user_id, category_id=category_id, year=year, month=month,
+                    income_total=totals[0], income_count=totals[1],
+                    expense_total=totals[2], expense_count=totals[3],
+                )
+                for (user_id, category_id, year, month), totals in sorted(deltas.items())
+            ],
+            batch_size=1000
+        )
+        for user_id in sorted(user_ids | {key[0] for key in deltas}):
+            response_cache.bump_data_version_on_commit(user_id)
+    return len(deltas)
@@ -2,13 +2,23 @@
 # 1. User & Authentication serializers
 #
 
-from rest_framework import serializers
+import decimal
+from datetime import date
+
+from rest_framework import ISO_8601, serializers
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from django.db.models import Value
+from django.db.models.functions import Lower
 from calendar import month_name
 from .models import Category, Expense, Income, Budget
+from . import passwords, revocation
+from .revocation import FilteredRefreshToken
 
 
 User = get_user_model()
@@ -31,13 +41,12 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     Accepts email and password, sets username = email automatically.
     """
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
-    refresh_token = serializers.CharField(read_only=True)
     email = serializers.EmailField(required=True)
 
     class Meta:
         model = User
-        fields = ("id", "email", "password", "refresh_token") 
-        read_only_fields = ("id", "refresh_token", "username")
+        fields = ("id", "email", "password")
+        read_only_fields = ("id", "username")
         
         extra_kwargs = {
             "email": {"required": True, "allow_blank": False},
@@ -72,18 +81,19 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         # Set username = email
         validated_data["username"] = email
         
-        user = User.objects.create(email=email, **validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        # Hash in the bounded pool (429 when saturated), then insert the row once
+        encoded = passwords.hash_password(password)
+        return User.objects.create(email=email, password=encoded, **validated_data)
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom JWT token serializer that accepts email instead of username.
-    Converts email to username for authentication (since username = email).
-    Includes username in the token payload.
+    Fetches the user by email once and checks the password on that row.
+    Includes username in the token payload; the issued refresh token is
+    kept on self.token for the session table.
     """
+    token_class = FilteredRefreshToken
     email = serializers.EmailField(required=True, write_only=True)
     username = serializers.CharField(required=False, read_only=True)
 
@@ -101,19 +111,22 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         if not email or not password:
             raise serializers.ValidationError("Email and password are required.")
         
-        # Find user by email (username = email)
+        # Single lookup by email; authenticate() would fetch the user again by username
         User = get_user_model()
-        try:
-            user = User.objects.get(email=email)
-            # Replace email with username for authentication
-            attrs['username'] = user.username
-            attrs.pop('email', None)
-        except User.DoesNotExist:
+        self.user = User.objects.filter(email=email).first()
+        # Hashes in the bounded pool (429 when saturated); unknown emails are hashed
+        # too so they take as long as wrong passwords, outdated hashes are upgraded
+        if not passwords.verify_password(self.user, password):
+            self.user = None
+        
+        if not jwt_settings.USER_AUTHENTICATION_RULE(self.user):
             # Raise AuthenticationFailed to return 401 instead of 400
             raise AuthenticationFailed("No active account found with the given credentials.")
         
-        # Call parent validate with username
-        return super().validate(attrs)
+        self.token = self.get_token(self.user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
+        return {'refresh': str(self.token), 'access': str(self.token.access_token)}
 
     @classmethod
     def get_token(cls, user):
@@ -123,6 +136,32 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh serializer that keeps the jti and user of the presented
+    refresh token (previous_jti, user_id) and the rotated token (token),
+    so the view can move the device session to the new jti. The blacklist
+    check of the presented token goes through finance.revocation.
+    """
+    token_class = FilteredRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        self.previous_jti = refresh[jwt_settings.JTI_CLAIM]
+        self.user_id = refresh[jwt_settings.USER_ID_CLAIM]
+
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                revocation.blacklist(refresh)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        self.token = refresh
+        return data
+
+
 #
 # 2. Category serializer
 #
@@ -146,7 +185,10 @@ class CategorySerializer(serializers.ModelSerializer):
         user = request.user
         name = data.get("name")
 
-        queryset = Category.objects.filter(user=user, name__iexact=name)
+        # Compare on Lower(name) so the lookup uses the (user, lower(name)) unique index
+        queryset = Category.objects.annotate(name_lower=Lower("name")).filter(
+            user=user, name_lower=Lower(Value(name))
+        )
 
         if self.instance:
             queryset = queryset.exclude(id=self.instance.pk)
@@ -161,12 +203,33 @@ class CategorySerializer(serializers.ModelSerializer):
 # 3 Income & Expense serializers
 #
 
+class CategoryIdField(serializers.PrimaryKeyRelatedField):
+    """
+    Category primary key field.
+    When the serializer context carries preloaded 'categories' (id -> Category),
+    ids are resolved from it instead of running one query per value.
+    """
+    def to_internal_value(self, data):
+        categories = self.context.get("categories")
+        if categories is None:
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return categories[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
 class IncomeExpenseBaseSerializer(serializers.ModelSerializer):
     """
     Base serializer for Income and Expense models.
     Handles common fields and validation.
     """
-    category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), source="category", write_only=True)
+    category_id = CategoryIdField(queryset=Category.objects.all(), source="category", write_only=True)
     
     category = CategorySerializer(read_only=True)
 
@@ -179,16 +242,23 @@ class IncomeExpenseBaseSerializer(serializers.ModelSerializer):
     def get_is_income_entry(self, obj):
         return isinstance(obj, Income)
 
+    @classmethod
+    def get_values_annotations(cls):
+        """is_income_entry as a database value, for FastListSerializer."""
+        return {"is_income_entry": Value(cls.Meta.model == Income)}
+
     def validate(self, attrs):
         """
         Custom validation to ensure 'amount' is greater than 0 and category matches entry type.
         """
         request = self.context.get("request")
         user = request.user
-        category = attrs.get("category")
+        # Partial updates may omit the category; fall back to the stored one
+        category = attrs.get("category", getattr(self.instance, "category", None))
         amount = attrs.get("amount")
         
-        if category.user != user:
+        # Compare ids so the category's user is not loaded
+        if category is not None and category.user_id != user.id:
             raise serializers.ValidationError("You are not authorized to access this category.")
 
         # Validate amount is positive
@@ -198,6 +268,9 @@ class IncomeExpenseBaseSerializer(serializers.ModelSerializer):
         # Check if this is an Income or Expense serializer based on the model
         is_income_entry = self.Meta.model == Income
 
+        if category is None:
+            return attrs
+
         if is_income_entry and not category.is_income:
             raise serializers.ValidationError({"category_id": "The selected category must be an Income category."})
         elif not is_income_entry and category.is_income:
@@ -260,19 +333,21 @@ class BudgetSerializer(serializers.ModelSerializer):
         year = attrs.get("year")
         month = attrs.get("month")
         amount = attrs.get("amount")
-        category = attrs.get("category")
+        # Partial updates may omit the category; fall back to the stored one
+        category = attrs.get("category", getattr(self.instance, "category", None))
         
         # Category is required
-        if not category:
+        if not category and not self.partial:
             raise serializers.ValidationError({"category_id": "Category is required for budgets."})
         
-        # Validate category belongs to user
-        if category.user != user:
-            raise serializers.ValidationError({"category_id": "You are not authorized to access this category."})
-        
-        # Validate category is an expense category
-        if category.is_income:
-            raise serializers.ValidationError({"category_id": "Budget can only be associated with expense categories (is_income=False)."})
+        if category:
+            # Validate category belongs to user
+            if category.user_id != user.id:
+                raise serializers.ValidationError({"category_id": "You are not authorized to access this category."})
+
+            # Validate category is an expense category
+            if category.is_income:
+                raise serializers.ValidationError({"category_id": "Budget can only be associated with expense categories (is_income=False)."})
         
         # Validate amount is positive
         if amount is not None and amount <= 0:
@@ -287,6 +362,9 @@ class BudgetSerializer(serializers.ModelSerializer):
         if not (2000 <= year <= 2100):
             raise serializers.ValidationError({"year": "Invalid year. Must be between 2000 and 2100."})
         
+        if category is None:
+            return attrs
+
         # Check for duplicate budget: same user, category, year, and month
         queryset = Budget.objects.filter(user=user, category=category, year=year, month=month)
 
@@ -324,6 +402,8 @@ class ExpenseCategorySerializer(serializers.Serializer):
 class FinancialSummarySerializer(serializers.Serializer):
     """
     Serializer for the financial summary.
+    Describes the payload FinancialSummaryView builds from aggregates; the
+    view returns that payload directly instead of validating it again.
     """
     budgetStats = BudgetStatSerializer(many=True)
     incomeCategories = IncomeCategorySerializer(many=True)
@@ -338,7 +418,7 @@ class TransactionSerializer(serializers.Serializer):
     """Serializer for unified transaction (Income/Expense) response."""
     id = serializers.IntegerField()
     note = serializers.CharField()
-    category = serializers.CharField()
+    category = serializers.CharField(source='category_name')
     amount = serializers.DecimalField(max_digits=12, decimal_places=2)
     date = serializers.DateField()
     is_income = serializers.BooleanField()
@@ -347,8 +427,157 @@ class TransactionSerializer(serializers.Serializer):
 # 7 Budget Management Serializer
 
 class BudgetManagementSerializer(serializers.Serializer):
-    """Serializer for budget management data per category."""
+    """Serializer for budget management data per category (the shape of BudgetManagementView rows)."""
     category = serializers.CharField()
     budgetAmt = serializers.DecimalField(max_digits=12, decimal_places=2)
     expenseAmt = serializers.DecimalField(max_digits=12, decimal_places=2)
 
+
+
+# 8 Statement Import Serializer
+
+class StatementImportSerializer(serializers.Serializer):
+    """
+    Serializer for statement upload options.
+    file_format defaults to the file extension (.ofx/.qfx -> ofx, otherwise csv).
+    """
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=["csv", "ofx"], required=False)
+    default_category = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    create_categories = serializers.BooleanField(default=False)
+    date_format = serializers.CharField(max_length=32, default="%Y-%m-%d")
+    on_duplicate = serializers.ChoiceField(choices=["skip", "flag"], default="skip")
+
+
+# 9 Fast list serializers
+
+class FastListSerializer:
+    """
+    Output-only serializer for large lists.
+
+    Reads rows from .values() instead of model instances and converts them
+    with converters compiled once from the fields of a regular serializer
+    class, so no field objects run per row. Decimal, date, datetime, integer,
+    string and boolean fields get a direct converter; any other field falls
+    back to its own to_representation(). Nested serializers read the joined
+    'relation__field' columns. SerializerMethodFields are read from
+    annotations the serializer declares in get_values_annotations().
+
+    The output is identical to serializer_class(instances, many=True).data.
+    """
+    _compiled = {}
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        serializer = serializer_class()
+        annotations = getattr(serializer_class, "get_values_annotations", dict)()
+        self.annotations = annotations
+        self.fields = self.compile_fields(serializer, "", annotations)
+        self.paths = [path for path in self.iter_paths(self.fields) if path not in annotations]
+
+    @classmethod
+    def for_serializer(cls, serializer_class):
+        """Return the (cached) fast serializer of a serializer class."""
+        fast = cls._compiled.get(serializer_class)
+        if fast is None:
+            fast = cls._compiled[serializer_class] = cls(serializer_class)
+        return fast
+
+    def compile_fields(self, serializer, prefix, annotations):
+        """Return (name, column or nested fields, converter factory) for every readable field."""
+        compiled = []
+        for field in serializer._readable_fields:
+            if isinstance(field, serializers.BaseSerializer):
+                nested = self.compile_fields(field, f"{prefix}{field.source}__", annotations)
+                compiled.append((field.field_name, nested, None))
+            elif isinstance(field, serializers.SerializerMethodField):
+                if field.field_name not in annotations:
+                    raise ValueError(f"{type(serializer).__name__}.{field.field_name} needs a values annotation.")
+                compiled.append((field.field_name, field.field_name, lambda: None))
+            else:
+                compiled.append((field.field_name, prefix + field.source, self.converter_factory(field)))
+        return compiled
+
+    def iter_paths(self, fields):
+        for _, column, _ in fields:
+            if isinstance(column, list):
+                yield from self.iter_paths(column)
+            else:
+                yield column
+
+    @staticmethod
+    def converter_factory(field):
+        """Return a callable building the value converter of a field (None: use the value as is)."""
+        if isinstance(field, serializers.DecimalField):
+            if not getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING) or \
+                    field.localize or field.normalize_output:
+                return lambda: field.to_representation
+            quantum = decimal.Decimal(".1") ** field.decimal_places
+            context = decimal.getcontext().copy()
+            if field.max_digits is not None:
+                context.prec = field.max_digits
+            return lambda: lambda value: "{:f}".format(
+                value.quantize(quantum, rounding=field.rounding, context=context)
+            )
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+            if output_format is None or output_format.lower() != ISO_8601:
+                return lambda: field.to_representation
+
+            def datetime_converter():
+                # Resolved per call: DRF converts to the timezone active for the request
+                field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+                def convert(value):
+                    if field_timezone is not None:
+                        value = value.astimezone(field_timezone)
+                    value = value.isoformat()
+                    return value[:-6] + "Z" if value.endswith("+00:00") else value
+                return convert
+            return datetime_converter
+        if isinstance(field, serializers.DateField):
+            output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+            if output_format is None or output_format.lower() != ISO_8601:
+                return lambda: field.to_representation
+            return lambda: date.isoformat
+        if type(field) in (serializers.IntegerField, serializers.CharField, serializers.BooleanField):
+            # Values read from integer, text and boolean columns already have the output type
+            return lambda: None
+        return lambda: field.to_representation
+
+    def values(self, queryset):
+        """Select the columns (and annotations) the representation needs."""
+        return queryset.values(*self.paths, **self.annotations)
+
+    def build_row_converter(self, fields):
+        """Bind the converters of one call (e.g. to the active timezone) into a row -> dict function."""
+        plan = []
+        for name, column, factory in fields:
+            if isinstance(column, list):
+                # The relation is None when its first (primary key) column is empty
+                plan.append((name, column[0][1], self.build_row_converter(column), True))
+            else:
+                plan.append((name, column, factory(), False))
+
+        def convert_row(row):
+            data = {}
+            for name, column, convert, is_nested in plan:
+                value = row[column]
+                if value is None:
+                    data[name] = None
+                elif is_nested:
+                    data[name] = convert(row)
+                else:
+                    data[name] = value if convert is None else convert(value)
+            return data
+        return convert_row
+
+    def to_representation(self, rows):
+        """Convert an iterable of .values() rows into a list of dicts."""
+        convert_row = self.build_row_converter(self.fields)
+        return [convert_row(row) for row in rows]
+
+    def iter_representation(self, rows):
+        """Like to_representation(), but lazily for streamed rows."""
+        convert_row = self.build_row_converter(self.fields)
+        return (convert_row(row) for row in rows)
@@ -0,0 +1,93 @@
+"""
+Per-device refresh-token sessions (finance.models.UserSession).
+
+Login inserts one row, token refresh rotates the row's jti with a single
+UPDATE on the unique jti index, and logout deletes rows. None of these
+touch the User table, so refresh traffic neither locks the user row nor
+invalidates the cached user of finance.authentication.
+"""
+from datetime import datetime, timezone as dt_timezone
+from typing import Optional
+
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from finance.models import UserSession
+
+
+# Rows deleted per statement by purge_expired()
+DEFAULT_PURGE_BATCH_SIZE = 1000
+
+USER_AGENT_MAX_LENGTH = UserSession._meta.get_field('user_agent').max_length
+
+
+def token_expiry(token) -> datetime:
+    return datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+
+
+def device_info(request) -> dict:
+    """User agent and client address of the request (REMOTE_ADDR, set by the proxy)."""
+    if request is None:
+        return {'user_agent': '', 'ip_address': None}
+    return {
+        'user_agent': request.META.get('HTTP_USER_AGENT', '')[:USER_AGENT_MAX_LENGTH],
+        'ip_address': request.META.get('REMOTE_ADDR') or None,
+    }
+
+
+def start_session(user_id: int, refresh, request=None) -> UserSession:
+    """Record a new device session for a freshly issued refresh token."""
+    return UserSession.objects.create(
+        user_id=user_id,
+        jti=refresh[jwt_settings.JTI_CLAIM],
+        expires_at=token_expiry(refresh),
+        **device_info(request),
+    )
+
+
+def rotate_session(previous_jti: str, user_id: int, refresh, request=None) -> None:
+    """
+    Point the session of previous_jti at the rotated refresh token. Only
+    jti, last_used_at and expires_at are written. Tokens issued before
+    sessions were recorded get a new row.
+    """
+    updated = UserSession.objects.filter(jti=previous_jti, user_id=user_id).update(
+        jti=refresh[jwt_settings.JTI_CLAIM],
+        last_used_at=timezone.now(),
+        expires_at=token_expiry(refresh),
+    )
+    if not updated:
+        start_session(user_id, refresh, request)
+
+
+def end_sessions(user_id: int, jti: Optional[str] = None) -> int:
+    """Delete the session of one refresh token, or every session of the user."""
+    sessions = UserSession.objects.filter(user_id=user_id)
+    if jti is not None:
+        sessions = sessions.filter(jti=jti)
+    deleted, _ = sessions.delete()
+    return deleted
+
+
+def purge_expired(batch_size: int = DEFAULT_PURGE_BATCH_SIZE, now: Optional[datetime] = None) -> int:
+    """
+    Delete sessions whose refresh token has expired, batch_size rows per
+    DELETE so each statement holds its row locks only briefly.
+    Returns the number of rows deleted.
+    """
+    now = now or timezone.now()
+    batch_size = max(1, batch_size)
+    total = 0
+    while True:
+        ids = list(
+            UserSession.objects.filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        # Nothing references UserSession, so this is a single DELETE ... WHERE id IN (...)
+        deleted, _ = UserSession.objects.filter(pk__in=ids).delete()
+        total += deleted
+        if len(ids) < batch_size:
+            return total
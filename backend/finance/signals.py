@@ -0,0 +1,97 @@
+"""
+Signal handlers that keep the MonthlyCategoryTotal rollup in sync with
+single-row Income/Expense writes. Bulk paths (bulk_create, queryset
+update/delete) bypass signals and apply rollup deltas themselves.
+
+The stored values an update or delete replaces are read with
+SELECT ... FOR UPDATE, so concurrent writes of the same entry (inside a
+transaction, as the API views do) take turns and each removes the values
+the other left rather than the same stale ones.
+
+Saving a user's auth-relevant fields (AUTH_FIELDS) or deleting the user
+also invalidates the user row cached by finance.authentication.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from finance import cache as response_cache
+from finance import rollups
+from finance.models import Expense, Income, User
+
+
+def stored_entry(sender, instance, using):
+    """The entry's stored (user_id, category_id, date, amount), locked when inside a transaction."""
+    entries = sender._default_manager.using(using).filter(pk=instance.pk)
+    if transaction.get_connection(using).in_atomic_block:
+        entries = entries.select_for_update()
+    return entries.values('user_id', 'category_id', 'date', 'amount').first()
+
+
+@receiver(pre_save, sender=Income)
+@receiver(pre_save, sender=Expense)
+def remember_previous_entry(sender, instance, raw=False, using=None, **kwargs):
+    """Load the stored values of an entry that is about to be updated."""
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = stored_entry(sender, instance, using)
+
+
+@receiver(pre_delete, sender=Income)
+@receiver(pre_delete, sender=Expense)
+def remember_deleted_entry(sender, instance, using=None, **kwargs):
+    """Load the stored values of an entry that is about to be deleted (None if already gone)."""
+    instance._rollup_previous = None
+    if rollups.is_deferred():
+        return
+    instance._rollup_previous = stored_entry(sender, instance, using)
+
+
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw or rollups.is_deferred():
+        return
+    rollups.record_entry_change(instance, previous=getattr(instance, '_rollup_previous', None))
+
+
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    if rollups.is_deferred():
+        return
+    rollups.record_entry_change(instance, previous=getattr(instance, '_rollup_previous', None), deleted=True)
+
+
+# User fields that authentication and permission checks read from the cached row
+AUTH_FIELDS = frozenset({'password', 'is_active', 'email', 'is_staff', 'is_superuser'})
+
+
+@receiver(pre_save, sender=User)
+def remember_auth_change(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """Note whether a save of an existing user changes any of AUTH_FIELDS."""
+    instance._auth_changed = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None:
+        # e.g. update_last_login() saves only last_login
+        instance._auth_changed = not AUTH_FIELDS.isdisjoint(update_fields)
+        return
+    stored = sender._default_manager.using(using).filter(pk=instance.pk).values(*AUTH_FIELDS).first()
+    instance._auth_changed = stored is None or any(
+        stored[field] != getattr(instance, field) for field in AUTH_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_on_save(sender, instance, raw=False, **kwargs):
+    """Password changes, deactivation and other auth-relevant writes drop the cached row."""
+    if raw or not getattr(instance, '_auth_changed', True):
+        return
+    response_cache.bump_auth_version_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_delete(sender, instance, **kwargs):
+    response_cache.bump_auth_version_on_commit(instance.pk)
@@ -1,15 +1,66 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from django.urls import reverse
 from rest_framework.test import APIClient
-from rest_framework import status
+from rest_framework import serializers, status
+from rest_framework.exceptions import Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
 from decimal import Decimal
 from datetime import date, timedelta
+from io import BytesIO, StringIO
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from unittest import mock
 
-from .models import Category, Income, Expense, Budget
+from .models import Category, Income, Expense, Budget, MonthlyCategoryTotal, UserSession
+from .utils import entry_fingerprint, shift_month
+from . import cache as response_cache
+from . import exports, passwords
+from .authentication import UserCache, user_cache
+from .checks import check_finance_cache_is_shared
+from .renderers import FastJSONRenderer
+from .passwords import HashingPool
+from .revocation import BloomFilter, revocation_filter
+from . import throttling
+from .throttling import LocalBucketStore
+from .serializers import (
+    BudgetManagementSerializer, ExpenseSerializer, FastListSerializer, FinancialSummarySerializer,
+    IncomeSerializer, TransactionSerializer
+)
+from .views import TransactionView
 
 User = get_user_model()
 
+# Rate limits are exercised by ThrottleTests only; the other tests log in and
+# bulk-write far more often from one address than the default rates allow
+_no_throttling = override_settings(FINANCE_THROTTLE_RATES={})
+
+
+def setUpModule():
+    _no_throttling.enable()
+
+
+def tearDownModule():
+    _no_throttling.disable()
+
 
 class AuthenticationTests(TestCase):
     """Test cases for authentication endpoints."""
@@ -38,7 +89,7 @@ class AuthenticationTests(TestCase):
         # Verify user was created
         user = User.objects.get(email='test@example.com')
         self.assertEqual(user.username, 'test@example.com')
-        self.assertIsNotNone(user.refresh_token)
+        self.assertTrue(UserSession.objects.filter(user=user).exists())
 
     def test_user_registration_duplicate_email(self):
         """Test that duplicate email registration fails."""
@@ -72,9 +123,8 @@ class AuthenticationTests(TestCase):
         self.assertIn('access', response.data)
         self.assertIn('refresh', response.data)
         
-        # Verify refresh_token was stored
-        user.refresh_from_db()
-        self.assertIsNotNone(user.refresh_token)
+        # Verify a session was recorded for the refresh token
+        self.assertTrue(UserSession.objects.filter(user=user).exists())
 
     def test_user_login_invalid_credentials(self):
         """Test login with invalid credentials."""
@@ -86,15 +136,14 @@ class AuthenticationTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_user_logout(self):
-        """Test user logout clears refresh_token."""
+        """Test user logout ends the user's sessions."""
         # Create and login user
         user = User.objects.create_user(
             username='test@example.com',
             email='test@example.com',
             password='testpass123'
         )
-        user.refresh_token = 'test_refresh_token'
-        user.save()
+        UserSession.objects.create(user=user, jti='test_jti', expires_at=timezone.now() + timedelta(days=1))
         
         # Authenticate
         self.client.force_authenticate(user=user)
@@ -105,9 +154,8 @@ class AuthenticationTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('message', response.data)
         
-        # Verify refresh_token was cleared
-        user.refresh_from_db()
-        self.assertIsNone(user.refresh_token)
+        # Verify the session was deleted
+        self.assertFalse(UserSession.objects.filter(user=user).exists())
 
     def test_user_logout_requires_authentication(self):
         """Test that logout requires authentication."""
@@ -203,6 +251,36 @@ class CategoryTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Category.objects.filter(pk=category.pk).exists())
 
+    def test_bulk_delete_categories(self):
+        """Test bulk deleting categories, and that categories in use are kept."""
+        unused = [
+            Category.objects.create(user=self.user, name=f'Unused {index}', is_income=False)
+            for index in range(3)
+        ]
+        in_use = Category.objects.create(user=self.user, name='In use', is_income=False)
+        Expense.objects.create(user=self.user, category=in_use, amount=Decimal('1.00'), date=date.today())
+        bulk_url = reverse('category-bulk')
+
+        response = self.client.delete(bulk_url, {'ids': [unused[0].id, in_use.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Category.objects.filter(user=self.user).count(), 4)
+
+        response = self.client.delete(bulk_url, {'ids': [category.id for category in unused]}, format='json')
+        self.assertEqual(response.data['data'], {'deleted': 3})
+        self.assertEqual(list(Category.objects.filter(user=self.user).values_list('name', flat=True)), ['In use'])
+
+        # Categories have no fields that can be updated in bulk
+        response = self.client.patch(bulk_url, {'ids': [in_use.id], 'data': {'name': 'X'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_create_category_duplicate_name_case_insensitive(self):
+        """Test that category names are unique per user regardless of case."""
+        Category.objects.create(user=self.user, name='Groceries', is_income=False)
+
+        response = self.client.post(self.categories_url, {'name': 'GROCERIES', 'is_income': False}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_category_isolation(self):
         """Test that users can only see their own categories."""
         other_user = User.objects.create_user(
@@ -293,6 +371,18 @@ class IncomeTests(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_bulk_create_incomes(self):
+        """Test creating several income entries in one request."""
+        items = [
+            {'category_id': self.income_category.id, 'amount': '100.00', 'date': str(date.today())},
+            {'category_id': self.income_category.id, 'amount': '200.00', 'date': str(date.today())},
+        ]
+        response = self.client.post(reverse('income-bulk'), items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(all(row['is_income_entry'] for row in response.data['data']['created']))
+        self.assertEqual(Income.objects.filter(user=self.user).count(), 2)
+
 
 class ExpenseTests(TestCase):
     """Test cases for Expense endpoints."""
@@ -351,10 +441,226 @@ class ExpenseTests(TestCase):
         )
         
         response = self.client.get(self.expenses_url)
-        
+
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    def create_expenses(self, count):
+        """Create one expense per day ending today, with amounts 1.00 .. count.00."""
+        return [
+            Expense.objects.create(
+                user=self.user,
+                category=self.expense_category,
+                amount=Decimal(index + 1),
+                date=date.today() - timedelta(days=index)
+            )
+            for index in range(count)
+        ]
+
+    def test_list_expenses_unpaginated_by_default(self):
+        """Test that the list stays a flat, newest-first list without paging parameters."""
+        self.create_expenses(12)
+
+        response = self.client.get(self.expenses_url)
+
+        self.assertEqual(len(response.data['data']), 12)
+        self.assertEqual(response.data['data'][0]['date'], str(date.today()))
+
+    def test_list_expenses_page_mode(self):
+        """Test page-number pagination of the expense list."""
+        self.create_expenses(12)
+
+        response = self.client.get(self.expenses_url, {'page': 2, 'page_size': 5})
+
+        page = response.data['data']
+        self.assertEqual(page['count'], 12)
+        self.assertEqual([Decimal(row['amount']) for row in page['data']], [Decimal(n) for n in range(6, 11)])
+        self.assertIsNotNone(page['next'])
+        self.assertIsNotNone(page['previous'])
+
+    def test_list_expenses_cursor_mode(self):
+        """Test that walking the cursor pages returns every row once."""
+        self.create_expenses(7)
+
+        amounts = []
+        response = self.client.get(self.expenses_url, {'pagination': 'cursor', 'page_size': 3})
+        while True:
+            page = response.data['data']
+            amounts.extend(Decimal(row['amount']) for row in page['data'])
+            if page['next'] is None:
+                break
+            response = self.client.get(page['next'])
+
+        self.assertEqual(amounts, [Decimal(n) for n in range(1, 8)])
+
+    def test_filter_and_order_expenses(self):
+        """Test the amount/date/category filters and whitelisted ordering."""
+        self.create_expenses(6)
+        other_category = Category.objects.create(user=self.user, name='Rent', is_income=False)
+        Expense.objects.create(user=self.user, category=other_category, amount=Decimal('500.00'), date=date.today())
+
+        response = self.client.get(self.expenses_url, {
+            'amount_min': '2', 'amount_max': '5', 'category': self.expense_category.id, 'ordering': 'amount'
+        })
+        self.assertEqual([Decimal(row['amount']) for row in response.data['data']], [Decimal(n) for n in range(2, 6)])
+
+        response = self.client.get(self.expenses_url, {'date_from': str(date.today()), 'category_name': 'rent'})
+        self.assertEqual([row['category']['name'] for row in response.data['data']], ['Rent'])
+
+        # Fields outside ordering_fields are ignored
+        response = self.client.get(self.expenses_url, {'ordering': 'user__password'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'][0]['date'], str(date.today()))
+
+    def test_count_only_and_head(self):
+        """Test that count requests return the filtered total without rows."""
+        self.create_expenses(4)
+
+        response = self.client.get(self.expenses_url, {'count_only': 'true', 'amount_min': '3'})
+        self.assertEqual(response.data['data'], {'count': 2})
+        self.assertEqual(response['X-Total-Count'], '2')
+
+        response = self.client.head(self.expenses_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Total-Count'], '4')
+
+    def test_bulk_create_expenses(self):
+        """Test that valid items are created and invalid ones reported by index."""
+        income_category = Category.objects.create(user=self.user, name='Salary', is_income=True)
+        other_user = User.objects.create_user(username='other@example.com', email='other@example.com', password='x')
+        foreign_category = Category.objects.create(user=other_user, name='Groceries', is_income=False)
+        items = [
+            {'category_id': self.expense_category.id, 'amount': '10.00', 'date': '2025-03-01', 'note': 'A'},
+            {'category_id': income_category.id, 'amount': '10.00', 'date': '2025-03-01'},
+            {'category_id': self.expense_category.id, 'amount': '-5.00', 'date': '2025-03-01'},
+            {'category_id': foreign_category.id, 'amount': '10.00', 'date': '2025-03-01'},
+            {'category_id': self.expense_category.id, 'amount': '15.00', 'date': '2025-03-02', 'note': 'B'},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('expense-bulk'), items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([row['note'] for row in response.data['data']['created']], ['A', 'B'])
+        self.assertEqual([error['index'] for error in response.data['data']['errors']], [1, 2, 3])
+        self.assertIn('category_id', response.data['data']['errors'][0]['errors'])
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+
+        rollup = MonthlyCategoryTotal.objects.get(user=self.user, category=self.expense_category, year=2025, month=3)
+        self.assertEqual((rollup.expense_total, rollup.expense_count), (Decimal('25.00'), 2))
+
+    def test_bulk_create_query_count_does_not_grow(self):
+        """Test that validation and inserts are batched instead of run per item."""
+        def post(count):
+            items = [
+                {'category_id': self.expense_category.id, 'amount': '1.00', 'date': str(date.today())}
+            ] * count
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(reverse('expense-bulk'), items, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context.captured_queries)
+
+        self.assertEqual(post(2), post(50))
+
+    def test_bulk_create_rejects_invalid_payloads(self):
+        """Test that a non-list body or a list without valid items is rejected."""
+        response = self.client.post(reverse('expense-bulk'), {'amount': '1.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('expense-bulk'), [{'category_id': 'x'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'][0]['index'], 0)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_partial_update_keeps_category(self):
+        """Test that a PATCH without category_id validates against the stored category."""
+        expense = self.create_expenses(1)[0]
+
+        response = self.client.patch(
+            reverse('expense-detail', args=[expense.id]), {'amount': '12.00'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expense.refresh_from_db()
+        self.assertEqual((expense.amount, expense.category), (Decimal('12.00'), self.expense_category))
+
+    def test_partial_update_envelope(self):
+        """Test that a PATCH response carries the standard envelope once."""
+        expense = self.create_expenses(1)[0]
+
+        response = self.client.patch(
+            reverse('expense-detail', args=[expense.id]), {'note': 'Lunch'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(body['message'], 'Item updated successfully')
+        self.assertEqual(body['data']['id'], expense.id)
+        self.assertEqual(body['data']['note'], 'Lunch')
+
+    def test_bulk_update_expenses(self):
+        """Test recategorizing many expenses with one UPDATE, keeping the rollup in sync."""
+        expenses = self.create_expenses(3)
+        rent = Category.objects.create(user=self.user, name='Rent', is_income=False)
+        ids = [expense.id for expense in expenses[:2]]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                reverse('expense-bulk'), {'ids': ids, 'data': {'category_id': rent.id}}, format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], {'updated': 2})
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in context.captured_queries), 1)
+        self.assertEqual(Expense.objects.filter(category=rent).count(), 2)
+        moved = MonthlyCategoryTotal.objects.filter(category=rent).aggregate(total=Sum('expense_total'))
+        self.assertEqual(moved['total'], Decimal('3.00'))
+        kept = MonthlyCategoryTotal.objects.filter(category=self.expense_category).aggregate(total=Sum('expense_total'))
+        self.assertEqual(kept['total'], Decimal('3.00'))
+
+    def test_bulk_update_applies_serializer_rules(self):
+        """Test that bulk updates are validated like single updates and are all-or-nothing."""
+        expense = self.create_expenses(1)[0]
+        income_category = Category.objects.create(user=self.user, name='Salary', is_income=True)
+        bulk_url = reverse('expense-bulk')
+
+        invalid = [
+            {'ids': [expense.id], 'data': {'category_id': income_category.id}},
+            {'ids': [expense.id], 'data': {'amount': '0'}},
+            {'ids': [expense.id], 'data': {'user': 5}},
+            {'ids': 'all', 'data': {'amount': '5.00'}},
+        ]
+        for payload in invalid:
+            with self.subTest(payload=payload):
+                response = self.client.patch(bulk_url, payload, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(bulk_url, {'ids': [expense.id, 999999], 'data': {'amount': '5.00'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['error'], {'ids': [999999]})
+        expense.refresh_from_db()
+        self.assertEqual(expense.amount, Decimal('1.00'))
+
+    def test_bulk_delete_expenses(self):
+        """Test deleting many expenses, only for the owner, with the rollup kept in sync."""
+        expenses = self.create_expenses(4)
+        other_user = User.objects.create_user(username='other@example.com', email='other@example.com', password='x')
+        other_category = Category.objects.create(user=other_user, name='Groceries', is_income=False)
+        foreign = Expense.objects.create(user=other_user, category=other_category, amount=Decimal('1.00'), date=date.today())
+        bulk_url = reverse('expense-bulk')
+
+        response = self.client.delete(bulk_url, {'ids': [expenses[0].id, foreign.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Expense.objects.filter(pk=foreign.pk).exists())
+
+        response = self.client.delete(bulk_url, {'ids': [expense.id for expense in expenses[:3]]}, format='json')
+        self.assertEqual(response.data['data'], {'deleted': 3})
+        self.assertEqual(list(Expense.objects.filter(user=self.user)), [expenses[3]])
+        totals = MonthlyCategoryTotal.objects.filter(user=self.user).aggregate(
+            total=Sum('expense_total'), count=Sum('expense_count')
+        )
+        self.assertEqual((totals['total'], totals['count']), (Decimal('4.00'), 1))
+
 
 class BudgetTests(TestCase):
     """Test cases for Budget endpoints."""
@@ -421,6 +727,26 @@ class BudgetTests(TestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['month'], 1)
 
+    def test_bulk_update_budget_amounts(self):
+        """Test setting the same amount on several budgets."""
+        category = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        budgets = [
+            Budget.objects.create(user=self.user, category=category, year=2025, month=month, amount=Decimal('100.00'))
+            for month in (1, 2)
+        ]
+        bulk_url = reverse('budget-bulk')
+        ids = [budget.id for budget in budgets]
+
+        response = self.client.patch(bulk_url, {'ids': ids, 'data': {'month': 3}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(bulk_url, {'ids': ids, 'data': {'amount': '250.00'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(Budget.objects.filter(user=self.user).values_list('amount', flat=True)),
+            [Decimal('250.00'), Decimal('250.00')]
+        )
+
     def test_budget_amount_validation(self):
         """Test that budget amount must be positive."""
         data = {
@@ -519,6 +845,85 @@ class FinancialSummaryTests(TestCase):
         self.assertEqual(Decimal(response.data['monthly_budget_spent']), Decimal('1500.00'))
         self.assertIn('budget_comparison', response.data)
 
+    def test_financial_summary_payload(self):
+        """Test the summary payload built from grouped queries."""
+        today = date.today()
+        last_year, last_month = shift_month(today.year, today.month, -1)
+        balance_category = Category.objects.create(user=self.user, name='Balance', is_income=True)
+        Income.objects.create(user=self.user, category=self.income_category, amount=Decimal('5000.00'), date=today)
+        Income.objects.create(user=self.user, category=balance_category, amount=Decimal('999.00'), date=today)
+        Expense.objects.create(user=self.user, category=self.expense_category, amount=Decimal('1500.00'), date=today)
+        Expense.objects.create(
+            user=self.user, category=self.expense_category, amount=Decimal('200.00'),
+            date=date(last_year, last_month, 1)
+        )
+        Budget.objects.create(
+            user=self.user, category=self.expense_category, year=today.year, month=today.month,
+            amount=Decimal('3000.00')
+        )
+
+        response = self.client.get(self.summary_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['totalEarning'], Decimal('5000.00'))
+        self.assertEqual(data['totalExpenses'], Decimal('1700.00'))
+        self.assertEqual(data['totalSaving'], Decimal('3300.00'))
+        self.assertEqual(
+            [dict(item) for item in data['incomeCategories']],
+            [{'category': 'Salary', 'totalincome': Decimal('5000.00')}]
+        )
+        self.assertEqual(
+            [dict(item) for item in data['expenseCategories']],
+            [{'category': 'Groceries', 'totalincome': Decimal('1700.00')}]
+        )
+        stats = [dict(item) for item in data['budgetStats']]
+        self.assertEqual(len(stats), 7)
+        self.assertEqual(stats[-1]['date'], today.strftime('%B %Y'))
+        self.assertEqual(stats[-1]['totalBudget'], Decimal('3000.00'))
+        self.assertEqual(stats[-1]['totalExpense'], Decimal('1500.00'))
+        self.assertEqual(stats[-2]['totalBudget'], Decimal('0.00'))
+        self.assertEqual(stats[-2]['totalExpense'], Decimal('200.00'))
+
+    def test_financial_summary_matches_serializer(self):
+        """Test that the unvalidated payload fits FinancialSummarySerializer and renders the same JSON."""
+        today = date.today()
+        Income.objects.create(user=self.user, category=self.income_category, amount=Decimal('5000.50'), date=today)
+        Expense.objects.create(user=self.user, category=self.expense_category, amount=Decimal('0.10'), date=today)
+        Budget.objects.create(
+            user=self.user, category=self.expense_category, year=today.year, month=today.month,
+            amount=Decimal('3000.00')
+        )
+
+        response = self.client.get(self.summary_url)
+
+        serializer = FinancialSummarySerializer(data=response.data['data'])
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(
+            JSONRenderer().render(response.data['data']), JSONRenderer().render(serializer.validated_data)
+        )
+        self.assertEqual(response.json()['data']['totalSaving'], 5000.4)
+
+    def test_financial_summary_query_count(self):
+        """Test that the summary runs a fixed number of queries."""
+        today = date.today()
+        for months_back in range(7):
+            year, month = shift_month(today.year, today.month, -months_back)
+            Expense.objects.create(
+                user=self.user, category=self.expense_category, amount=Decimal('10.00'),
+                date=date(year, month, 1)
+            )
+            Budget.objects.create(
+                user=self.user, category=self.expense_category, year=year, month=month,
+                amount=Decimal('100.00')
+            )
+
+        # ETag change stamp + budgets + monthly expenses + category totals
+        with self.assertNumQueries(4):
+            response = self.client.get(self.summary_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_financial_summary_requires_authentication(self):
         """Test that financial summary requires authentication."""
         self.client.force_authenticate(user=None)
@@ -572,3 +977,1643 @@ class AuthorizationTests(TestCase):
         url = reverse('category-detail', kwargs={'pk': category2.pk})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TransactionTests(TestCase):
+    """Test cases for the unified transaction list endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.transactions_url = reverse('transactions')
+        self.income_category = Category.objects.create(
+            user=self.user,
+            name='Salary',
+            is_income=True
+        )
+        self.expense_category = Category.objects.create(
+            user=self.user,
+            name='Groceries',
+            is_income=False
+        )
+        self.today = date.today()
+
+    def test_transactions_merged_and_ordered(self):
+        """Test that incomes and expenses are merged newest first."""
+        Income.objects.create(
+            user=self.user,
+            category=self.income_category,
+            amount=Decimal('5000.00'),
+            date=self.today - timedelta(days=2)
+        )
+        Expense.objects.create(
+            user=self.user,
+            category=self.expense_category,
+            amount=Decimal('150.00'),
+            date=self.today,
+            note='Weekly groceries'
+        )
+        Expense.objects.create(
+            user=self.user,
+            category=self.expense_category,
+            amount=Decimal('75.50'),
+            date=self.today - timedelta(days=1)
+        )
+
+        response = self.client.get(self.transactions_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = response.data['data']
+        self.assertEqual(payload['count'], 3)
+        rows = payload['data']
+        self.assertEqual([row['amount'] for row in rows], ['150.00', '75.50', '5000.00'])
+        self.assertEqual(rows[0]['category'], 'Groceries')
+        self.assertEqual(rows[0]['note'], 'Weekly groceries')
+        self.assertFalse(rows[0]['is_income'])
+        self.assertTrue(rows[2]['is_income'])
+
+    def test_transactions_filters(self):
+        """Test that filters apply to both sides of the merge."""
+        Income.objects.create(
+            user=self.user,
+            category=self.income_category,
+            amount=Decimal('5000.00'),
+            date=self.today
+        )
+        Expense.objects.create(
+            user=self.user,
+            category=self.expense_category,
+            amount=Decimal('150.00'),
+            date=self.today
+        )
+
+        response = self.client.get(self.transactions_url, {'is_income': 'false'})
+        self.assertEqual(response.data['data']['count'], 1)
+        self.assertEqual(response.data['data']['data'][0]['category'], 'Groceries')
+
+        response = self.client.get(self.transactions_url, {'amount_min': '1000'})
+        self.assertEqual(response.data['data']['count'], 1)
+        self.assertTrue(response.data['data']['data'][0]['is_income'])
+
+        response = self.client.get(self.transactions_url, {'category': 'groc'})
+        self.assertEqual(response.data['data']['count'], 1)
+
+    def test_transactions_pagination(self):
+        """Test that pages are sliced in the database."""
+        for day in range(15):
+            Expense.objects.create(
+                user=self.user,
+                category=self.expense_category,
+                amount=Decimal('10.00') + day,
+                date=self.today - timedelta(days=day)
+            )
+
+        response = self.client.get(self.transactions_url, {'page': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = response.data['data']
+        self.assertEqual(payload['count'], 15)
+        self.assertEqual(len(payload['data']), 5)
+        self.assertEqual(payload['data'][0]['amount'], '20.00')
+        self.assertIsNone(payload['next'])
+        self.assertIsNotNone(payload['previous'])
+
+    def test_transactions_cursor_pagination(self):
+        """Test walking the feed forwards and backwards with cursors."""
+        for day in range(12):
+            Expense.objects.create(
+                user=self.user,
+                category=self.expense_category,
+                amount=Decimal('10.00') + day,
+                date=self.today - timedelta(days=day // 2)
+            )
+            Income.objects.create(
+                user=self.user,
+                category=self.income_category,
+                amount=Decimal('100.00') + day,
+                date=self.today - timedelta(days=day // 2)
+            )
+        expected = self.client.get(self.transactions_url, {'page_size': 100}).data['data']['data']
+
+        seen = []
+        response = self.client.get(self.transactions_url, {'pagination': 'cursor', 'page_size': 5})
+        self.assertEqual(response.data['data']['count'], 24)
+        self.assertIsNone(response.data['data']['previous'])
+        pages = [response]
+        while True:
+            payload = pages[-1].data['data']
+            seen.extend(payload['data'])
+            if payload['next'] is None:
+                break
+            pages.append(self.client.get(payload['next']))
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 5)
+
+        # Walk back one page from the last one
+        previous = self.client.get(pages[-1].data['data']['previous'])
+        self.assertEqual(previous.data['data']['data'], pages[-2].data['data']['data'])
+
+    def test_transactions_cursor_without_count(self):
+        """Test that include_count=false skips the total count."""
+        response = self.client.get(
+            self.transactions_url,
+            {'pagination': 'cursor', 'include_count': 'false'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data['data'])
+
+    def test_transactions_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        response = self.client.get(self.transactions_url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_csv(self):
+        """Test that the CSV export streams every row in feed order."""
+        Income.objects.create(
+            user=self.user,
+            category=self.income_category,
+            amount=Decimal('5000.00'),
+            date=self.today - timedelta(days=1)
+        )
+        expense = Expense.objects.create(
+            user=self.user,
+            category=self.expense_category,
+            amount=Decimal('150.00'),
+            date=self.today,
+            note='Weekly, groceries'
+        )
+
+        response = self.client.get(reverse('transactions-export'), {'format': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('transactions.csv', response['Content-Disposition'])
+        self.assertIn('ETag', response)
+        lines = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(lines[0], ['id', 'date', 'type', 'category', 'amount', 'note'])
+        self.assertEqual(
+            lines[1],
+            [str(expense.id), self.today.isoformat(), 'expense', 'Groceries', '150.00', 'Weekly, groceries']
+        )
+        self.assertEqual(lines[2][2:5], ['income', 'Salary', '5000.00'])
+        self.assertEqual(len(lines), 3)
+
+    def test_export_ndjson_with_filters(self):
+        """Test that the NDJSON export honors the transaction list filters."""
+        for day in range(5):
+            Expense.objects.create(
+                user=self.user,
+                category=self.expense_category,
+                amount=Decimal('10.00') + day,
+                date=self.today - timedelta(days=day)
+            )
+        Income.objects.create(
+            user=self.user,
+            category=self.income_category,
+            amount=Decimal('5000.00'),
+            date=self.today
+        )
+
+        response = self.client.get(
+            reverse('transactions-export'),
+            {'format': 'ndjson', 'is_income': 'false', 'amount_min': '12'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['amount'] for row in rows], ['12.00', '13.00', '14.00'])
+        listed = self.client.get(
+            self.transactions_url, {'is_income': 'false', 'amount_min': '12'}
+        ).data['data']['data']
+        self.assertEqual(rows, [dict(row) for row in listed])
+
+    def test_export_unsupported_format(self):
+        """Test that an unknown export format is rejected."""
+        response = self.client.get(reverse('transactions-export'), {'format': 'xlsx'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.json()['success'])
+
+    def test_export_requires_authentication(self):
+        """Test that the export is not available anonymously."""
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(reverse('transactions-export'), {'format': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ExplainQueriesCommandTests(TestCase):
+    """Test cases for the explain_queries management command."""
+
+    def test_explain_queries_prints_plans(self):
+        """Test that the command prints a plan for every endpoint query."""
+        user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        Category.objects.create(user=user, name='Groceries', is_income=False)
+        out = StringIO()
+
+        call_command('explain_queries', email='test@example.com', endpoint=['budget-management'], stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('=== budget-management', output)
+        self.assertIn('Scan', output)
+
+
+class MonthWindowTests(TestCase):
+    """Test cases for the month window helpers."""
+
+    def test_shift_month_rolls_over_years(self):
+        """Test moving across year boundaries in both directions."""
+        self.assertEqual(shift_month(2025, 1, -1), (2024, 12))
+        self.assertEqual(shift_month(2025, 12, 1), (2026, 1))
+        self.assertEqual(shift_month(2025, 3, -14), (2024, 1))
+        self.assertEqual(shift_month(2025, 6, 0), (2025, 6))
+
+
+class BudgetManagementTests(TestCase):
+    """Test cases for the budget management endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.budget_management_url = reverse('budget-management')
+        self.today = date.today()
+
+    def test_budget_management_payload(self):
+        """Test budget and expense amounts for the current month per category."""
+        groceries = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        Category.objects.create(user=self.user, name='Fuel', is_income=False)
+        Category.objects.create(user=self.user, name='Salary', is_income=True)
+        Budget.objects.create(
+            user=self.user, category=groceries, year=self.today.year, month=self.today.month,
+            amount=Decimal('500.00')
+        )
+        Expense.objects.create(user=self.user, category=groceries, amount=Decimal('120.00'), date=self.today)
+        Expense.objects.create(user=self.user, category=groceries, amount=Decimal('30.00'), date=self.today)
+        last_year, last_month = shift_month(self.today.year, self.today.month, -1)
+        Expense.objects.create(
+            user=self.user, category=groceries, amount=Decimal('999.00'), date=date(last_year, last_month, 1)
+        )
+
+        response = self.client.get(self.budget_management_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([dict(item) for item in response.data['data']], [
+            {'category': 'Fuel', 'budgetAmt': Decimal('0.00'), 'expenseAmt': Decimal('0.00')},
+            {'category': 'Groceries', 'budgetAmt': Decimal('500.00'), 'expenseAmt': Decimal('150.00')},
+        ])
+
+    def test_budget_management_matches_serializer(self):
+        """Test that the unvalidated rows fit BudgetManagementSerializer and render the same JSON."""
+        groceries = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        Category.objects.create(user=self.user, name='Fuel', is_income=False)
+        Expense.objects.create(user=self.user, category=groceries, amount=Decimal('12.30'), date=self.today)
+
+        response = self.client.get(self.budget_management_url)
+
+        serializer = BudgetManagementSerializer(data=response.data['data'], many=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(
+            JSONRenderer().render(response.data['data']), JSONRenderer().render(serializer.validated_data)
+        )
+
+    def test_budget_management_query_count(self):
+        """Test that the query count does not grow with the number of categories."""
+        for index in range(40):
+            category = Category.objects.create(user=self.user, name=f'Category {index}', is_income=False)
+            Budget.objects.create(
+                user=self.user, category=category, year=self.today.year, month=self.today.month,
+                amount=Decimal('100.00')
+            )
+            Expense.objects.create(user=self.user, category=category, amount=Decimal('10.00'), date=self.today)
+
+        # ETag change stamp + the rows query
+        with self.assertNumQueries(2):
+            response = self.client.get(self.budget_management_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']), 40)
+
+
+class MonthlyRollupTests(TestCase):
+    """Test cases for the incrementally maintained monthly rollup."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.groceries = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        self.fuel = Category.objects.create(user=self.user, name='Fuel', is_income=False)
+        self.salary = Category.objects.create(user=self.user, name='Salary', is_income=True)
+
+    def rollup_rows(self):
+        return sorted(
+            MonthlyCategoryTotal.objects.filter(user=self.user).exclude(income_count=0, expense_count=0).values_list(
+                'category__name', 'year', 'month', 'income_total', 'income_count', 'expense_total', 'expense_count'
+            )
+        )
+
+    def test_rollup_follows_api_writes(self):
+        """Test that create, update and delete through the API keep the rollup in sync."""
+        expenses_url = reverse('expense-list')
+        response = self.client.post(expenses_url, {
+            'category_id': self.groceries.id, 'amount': '40.00', 'date': '2025-03-10'
+        }, format='json')
+        expense_id = response.data['data']['id']
+        self.client.post(expenses_url, {
+            'category_id': self.groceries.id, 'amount': '10.00', 'date': '2025-03-11'
+        }, format='json')
+        self.client.post(reverse('income-list'), {
+            'category_id': self.salary.id, 'amount': '500.00', 'date': '2025-03-01'
+        }, format='json')
+
+        self.assertEqual(self.rollup_rows(), [
+            ('Groceries', 2025, 3, Decimal('0.00'), 0, Decimal('50.00'), 2),
+            ('Salary', 2025, 3, Decimal('500.00'), 1, Decimal('0.00'), 0),
+        ])
+
+        # Move one expense to another category and month
+        detail_url = reverse('expense-detail', kwargs={'pk': expense_id})
+        self.client.patch(detail_url, {
+            'category_id': self.fuel.id, 'amount': '45.00', 'date': '2025-04-02'
+        }, format='json')
+        self.assertEqual(self.rollup_rows(), [
+            ('Fuel', 2025, 4, Decimal('0.00'), 0, Decimal('45.00'), 1),
+            ('Groceries', 2025, 3, Decimal('0.00'), 0, Decimal('10.00'), 1),
+            ('Salary', 2025, 3, Decimal('500.00'), 1, Decimal('0.00'), 0),
+        ])
+
+        self.client.delete(detail_url)
+        self.assertEqual(self.rollup_rows(), [
+            ('Groceries', 2025, 3, Decimal('0.00'), 0, Decimal('10.00'), 1),
+            ('Salary', 2025, 3, Decimal('500.00'), 1, Decimal('0.00'), 0),
+        ])
+
+    def test_rebuild_matches_incremental_rollup(self):
+        """Test that rebuilding from raw rows gives the same totals."""
+        Expense.objects.create(user=self.user, category=self.groceries, amount=Decimal('12.50'), date=date(2025, 1, 5))
+        Expense.objects.create(user=self.user, category=self.groceries, amount=Decimal('7.50'), date=date(2025, 1, 6))
+        Income.objects.create(user=self.user, category=self.salary, amount=Decimal('900.00'), date=date(2025, 2, 1))
+        incremental = self.rollup_rows()
+
+        MonthlyCategoryTotal.objects.filter(user=self.user).delete()
+        call_command('rebuild_rollups', email='test@example.com', stdout=StringIO())
+
+        self.assertEqual(self.rollup_rows(), incremental)
+        self.assertEqual(incremental[0], ('Groceries', 2025, 1, Decimal('0.00'), 0, Decimal('20.00'), 2))
+
+
+class RollupConcurrencyTests(TransactionTestCase):
+    """Test cases for rollup maintenance under concurrent writes of the same entry."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.groceries = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        self.expense = Expense.objects.create(user=self.user, category=self.groceries, amount=Decimal('10.00'),
+                                              date=date(2025, 3, 1))
+
+    def expense_total(self):
+        return MonthlyCategoryTotal.objects.get(user=self.user, category=self.groceries).expense_total
+
+    def test_update_after_stale_read(self):
+        """Test that an update waiting on another one removes the values it wrote, not the ones read before."""
+        first = Expense.objects.get(pk=self.expense.pk)
+        second = Expense.objects.get(pk=self.expense.pk)
+        saved, release = threading.Event(), threading.Event()
+
+        def update(entry, amount, hold=False):
+            try:
+                with transaction.atomic():
+                    entry.amount = Decimal(amount)
+                    entry.save()
+                    if hold:
+                        saved.set()
+                        release.wait(5)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=update, args=(first, '20.00', True))
+        holder.start()
+        saved.wait(5)
+        waiter = threading.Thread(target=update, args=(second, '30.00'))
+        waiter.start()
+        time.sleep(0.2)  # let the second update read (and wait for) the row before the first commits
+        release.set()
+        holder.join()
+        waiter.join()
+
+        self.assertEqual(Expense.objects.get(pk=self.expense.pk).amount, Decimal('30.00'))
+        self.assertEqual(self.expense_total(), Decimal('30.00'))
+
+    def test_delete_of_deleted_entry(self):
+        """Test that deleting an entry another request already deleted does not remove it from the rollup twice."""
+        stale = Expense.objects.get(pk=self.expense.pk)
+        Expense.objects.create(user=self.user, category=self.groceries, amount=Decimal('5.00'), date=date(2025, 3, 2))
+        self.expense.delete()
+
+        with transaction.atomic():
+            stale.delete()
+
+        self.assertEqual(self.expense_total(), Decimal('5.00'))
+
+
+class ResponseCacheTests(TestCase):
+    """Test cases for the per-user summary and budget management cache."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        response_cache.stats.reset()
+
+    def test_summary_served_from_cache_until_write(self):
+        """Test that a write through the API invalidates the cached summary."""
+        summary_url = reverse('financial_summary')
+        first = self.client.get(summary_url)
+
+        # Only the ETag change stamp hits the database
+        with self.assertNumQueries(1):
+            second = self.client.get(summary_url)
+        self.assertEqual(second.data, first.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('expense-list'), {
+                'category_id': self.category.id, 'amount': '25.00', 'date': str(date.today())
+            }, format='json')
+
+        third = self.client.get(summary_url)
+        self.assertEqual(third.data['data']['totalExpenses'], Decimal('25.00'))
+        self.assertEqual(response_cache.stats.snapshot()['summary'], {'hits': 1, 'misses': 2, 'hit_rate': 0.3333})
+
+    def test_rebuild_invalidates_cached_summary(self):
+        """Test that rebuilding a drifted rollup replaces the figures cached from it."""
+        Expense.objects.create(user=self.user, category=self.category, amount=Decimal('25.00'), date=date.today())
+        MonthlyCategoryTotal.objects.filter(user=self.user).update(expense_total=Decimal('99.00'))
+        summary_url = reverse('financial_summary')
+        self.assertEqual(self.client.get(summary_url).data['data']['totalExpenses'], Decimal('99.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_rollups', email='test@example.com', stdout=StringIO())
+
+        self.assertEqual(self.client.get(summary_url).data['data']['totalExpenses'], Decimal('25.00'))
+
+    def test_budget_management_cache_is_per_user(self):
+        """Test that cached payloads are never shared between users."""
+        other_user = User.objects.create_user(
+            username='other@example.com',
+            email='other@example.com',
+            password='testpass123'
+        )
+        url = reverse('budget-management')
+        self.client.get(url)
+
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(url)
+
+        self.assertEqual(response.data['data'], [])
+
+    def test_metrics_requires_staff(self):
+        """Test that cache counters are only visible to staff users."""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(reverse('financial_summary'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['responseCache']['summary']['misses'], 1)
+
+    def test_unshared_cache_is_reported(self):
+        """Test that a per-process finance cache raises a system check warning outside DEBUG."""
+        with override_settings(DEBUG=False, FINANCE_CACHE_SHARED=None):
+            self.assertFalse(response_cache.is_shared())
+            self.assertEqual([message.id for message in check_finance_cache_is_shared(None)], ['finance.W001'])
+        with override_settings(DEBUG=False, FINANCE_CACHE_SHARED=True):
+            self.assertEqual(check_finance_cache_is_shared(None), [])
+
+
+class ConditionalGetTests(TestCase):
+    """Test cases for ETag / If-None-Match on the read endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        self.expense = Expense.objects.create(
+            user=self.user, category=self.category, amount=Decimal('10.00'), date=date.today()
+        )
+
+    def test_matching_etag_returns_not_modified(self):
+        """Test that every read endpoint answers a matching If-None-Match with 304."""
+        urls = [
+            reverse('category-list'),
+            reverse('income-list'),
+            reverse('expense-list'),
+            reverse('budget-list'),
+            reverse('financial_summary'),
+            reverse('transactions'),
+            reverse('budget-management'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                etag = response['ETag']
+
+                # Only the change stamp is queried; nothing is built or serialized
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response.content, b'')
+
+    def test_etag_changes_on_write(self):
+        """Test that updates and deletes produce a new ETag."""
+        url = reverse('expense-list')
+        first = self.client.get(url)['ETag']
+
+        self.client.patch(reverse('expense-detail', args=[self.expense.id]), {
+            'category_id': self.category.id, 'amount': '12.00'
+        }, format='json')
+        second = self.client.get(url)['ETag']
+        self.assertNotEqual(first, second)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.delete(reverse('expense-detail', args=[self.expense.id]))
+        self.assertNotEqual(self.client.get(url)['ETag'], second)
+
+    def test_etag_depends_on_user_and_query(self):
+        """Test that ETags differ between users and between query strings."""
+        url = reverse('transactions')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'is_income': 'false'})['ETag'], etag)
+
+        other_user = User.objects.create_user(
+            username='other@example.com',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ListQueryCountTests(TestCase):
+    """Test that list endpoints run a constant number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.income_category = Category.objects.create(user=self.user, name='Salary', is_income=True)
+        self.next_category = 0
+
+    def add_rows(self, count):
+        """Add rows with a category of their own each, so nothing is reused from a cache."""
+        for _ in range(count):
+            self.next_category += 1
+            category = Category.objects.create(user=self.user, name=f'Category {self.next_category}', is_income=False)
+            Expense.objects.create(user=self.user, category=category, amount=Decimal('10.00'), date=date.today())
+            Income.objects.create(user=self.user, category=self.income_category, amount=Decimal('10.00'), date=date.today())
+            Budget.objects.create(
+                user=self.user, category=category, year=2025, month=1, amount=Decimal('100.00')
+            )
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        """Test that related categories are loaded with the rows, not per row."""
+        requests = [
+            (reverse('income-list'), {}),
+            (reverse('expense-list'), {}),
+            (reverse('expense-list'), {'page': 1, 'page_size': 50}),
+            (reverse('budget-list'), {}),
+        ]
+        self.add_rows(1)
+        baseline = [self.count_queries(url, **params) for url, params in requests]
+
+        self.add_rows(10)
+        for (url, params), expected in zip(requests, baseline):
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.count_queries(url, **params), expected)
+
+    def test_retrieve_loads_category_with_row(self):
+        """Test that retrieving an entry does not query its category separately."""
+        self.add_rows(1)
+        expense = Expense.objects.get(user=self.user)
+
+        # Authentication is forced, so the only query is the row joined with its category
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('expense-detail', args=[expense.id]))
+        self.assertEqual(response.data['data']['category']['name'], 'Category 1')
+
+
+class StatementImportTests(TestCase):
+    """Test cases for the CSV/OFX statement import."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.groceries = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        self.salary = Category.objects.create(user=self.user, name='Salary', is_income=True)
+        self.import_url = reverse('statement-import')
+
+    def upload(self, content, name='statement.csv', **options):
+        upload = SimpleUploadedFile(name, content.encode(), content_type='text/csv')
+        return self.client.post(self.import_url, {'file': upload, **options}, format='multipart')
+
+    def run_command(self, content, suffix, *args):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False) as statement:
+            statement.write(content)
+        self.addCleanup(os.remove, statement.name)
+        out = StringIO()
+        call_command('import_statement', statement.name, '--email', 'test@example.com', *args,
+                     stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_import_csv_upload(self):
+        """Test that valid rows are imported and invalid ones reported by line."""
+        content = (
+            'Date,Description,Amount,Category\n'
+            '2025-03-01,Supermarket,-42.50,groceries\n'
+            '2025-03-02,March salary,"3,000.00",Salary\n'
+            '2025-03-03,Unknown,-5.00,Travel\n'
+            '03/04/2025,Bad date,-5.00,Groceries\n'
+            '2025-03-05,Refund,12.00,Groceries\n'
+        )
+        response = self.upload(content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        result = response.data['data']
+        self.assertEqual((result['rows'], result['created'], result['failed']), (5, 2, 3))
+        self.assertEqual([error['line'] for error in result['errors']], [4, 5, 6])
+        expense = Expense.objects.get(user=self.user)
+        self.assertEqual((expense.amount, expense.note, expense.category), (Decimal('42.50'), 'Supermarket', self.groceries))
+        self.assertEqual(Income.objects.get(user=self.user).amount, Decimal('3000.00'))
+        rollup = MonthlyCategoryTotal.objects.get(user=self.user, category=self.groceries)
+        self.assertEqual((rollup.expense_total, rollup.expense_count), (Decimal('42.50'), 1))
+
+    def test_import_reports_non_finite_amounts(self):
+        """Test that NaN and Infinity amounts are row errors rather than failing the import."""
+        content = (
+            'date,amount,category\n'
+            '2025-03-01,NaN,Groceries\n'
+            '2025-03-02,-Infinity,Groceries\n'
+            '2025-03-03,sNaN,Groceries\n'
+            '2025-03-04,-7.00,Groceries\n'
+        )
+        response = self.upload(content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        result = response.data['data']
+        self.assertEqual((result['created'], result['failed']), (1, 3))
+        self.assertEqual([error['line'] for error in result['errors']], [2, 3, 4])
+        self.assertEqual(result['errors'][0]['error'], "Invalid amount 'NaN'.")
+
+    def test_import_rejects_unreadable_statement(self):
+        """Test that a CSV without the required columns is rejected."""
+        response = self.upload('when,what\n2025-03-01,x\n')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('amount', response.data['message'])
+
+    def test_import_query_count_does_not_grow_with_rows(self):
+        """Test that rows are inserted in chunks rather than one by one."""
+        def import_rows(count):
+            # A different day per run, so the second run finds no duplicates
+            content = 'date,amount,category\n' + f'2025-03-{count:02d},-1.00,Groceries\n' * count
+            with CaptureQueriesContext(connection) as context:
+                response = self.upload(content)
+            self.assertEqual(response.data['data']['created'], count)
+            return len(context.captured_queries)
+
+        self.assertEqual(import_rows(3), import_rows(28))
+
+    def test_import_command_reports_chunks(self):
+        """Test the command with a small chunk size and per-chunk progress."""
+        content = 'date,amount,category,type\n' + ''.join(
+            f'2025-01-{day:02d},{day}.00,Groceries,expense\n' for day in range(1, 6)
+        )
+
+        output = self.run_command(content, '.csv', '--chunk-size', '2')
+
+        self.assertEqual(output.count('chunk '), 3)
+        self.assertIn('Imported 5 of 5 row(s)', output)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 5)
+
+    def test_import_ofx_command(self):
+        """Test an SGML OFX statement with a default category created on demand."""
+        content = (
+            'OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250310120000<TRNAMT>-19.99<NAME>Coffee shop</STMTTRN>\n'
+            '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250311<TRNAMT>-5.01<NAME>Bakery<MEMO>Bread</STMTTRN>\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+        )
+
+        self.run_command(content, '.ofx', '--default-category', 'Bank', '--create-categories')
+
+        bank = Category.objects.get(user=self.user, name='Bank')
+        self.assertFalse(bank.is_income)
+        self.assertEqual(
+            list(Expense.objects.filter(user=self.user).order_by('date').values_list('date', 'amount', 'note')),
+            [
+                (date(2025, 3, 10), Decimal('19.99'), 'Coffee shop'),
+                (date(2025, 3, 11), Decimal('5.01'), 'Bakery - Bread'),
+            ]
+        )
+
+
+class DuplicateDetectionTests(TestCase):
+    """Test cases for entry fingerprints and duplicate detection."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.groceries = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+
+    def import_csv(self, content, **options):
+        upload = SimpleUploadedFile('statement.csv', content.encode(), content_type='text/csv')
+        response = self.client.post(reverse('statement-import'), {'file': upload, **options}, format='multipart')
+        return response.data['data']
+
+    def test_fingerprint_normalizes_note_and_amount(self):
+        """Test that saved entries get a fingerprint ignoring note case/spacing and amount format."""
+        expense = Expense.objects.create(
+            user=self.user, category=self.groceries, amount=Decimal('42.5'), date=date(2025, 3, 1),
+            note='  Super   Market '
+        )
+
+        self.assertEqual(expense.fingerprint, entry_fingerprint(self.user.id, date(2025, 3, 1), '42.50', 'super market'))
+        self.assertNotEqual(expense.fingerprint, entry_fingerprint(self.user.id, date(2025, 3, 2), '42.50', 'super market'))
+
+    def test_reimporting_overlapping_statement_skips_duplicates(self):
+        """Test that re-imports only add rows beyond the ones already stored."""
+        rows = '2025-03-01,-3.50,Groceries,Coffee\n' * 2 + '2025-03-02,-20.00,Groceries,Market\n'
+        header = 'date,amount,category,note\n'
+
+        first = self.import_csv(header + rows)
+        second = self.import_csv(header + rows + '2025-03-01,-3.50,Groceries,coffee\n')
+
+        self.assertEqual((first['created'], first['duplicates']), (3, 0))
+        self.assertEqual((second['created'], second['duplicates']), (1, 3))
+        self.assertEqual(second['duplicateLines'], [2, 3, 4])
+        self.assertEqual(Expense.objects.filter(user=self.user, amount=Decimal('3.50')).count(), 3)
+
+        flagged = self.import_csv(header + rows, on_duplicate='flag')
+        self.assertEqual((flagged['created'], flagged['duplicates']), (3, 3))
+
+    def test_bulk_create_skips_duplicates(self):
+        """Test that the bulk endpoint skips stored duplicates unless asked to flag them."""
+        Expense.objects.create(user=self.user, category=self.groceries, amount=Decimal('5.00'), date=date(2025, 3, 1))
+        items = [
+            {'category_id': self.groceries.id, 'amount': '5.00', 'date': '2025-03-01'},
+            {'category_id': self.groceries.id, 'amount': '6.00', 'date': '2025-03-01'},
+        ]
+
+        response = self.client.post(reverse('expense-bulk'), items, format='json')
+        self.assertEqual(response.data['data']['duplicates'], [0])
+        self.assertEqual(len(response.data['data']['created']), 1)
+
+        response = self.client.post(reverse('expense-bulk') + '?on_duplicate=flag', items, format='json')
+        self.assertEqual(response.data['data']['duplicates'], [0, 1])
+        self.assertEqual(len(response.data['data']['created']), 2)
+
+    def test_bulk_update_refreshes_fingerprints(self):
+        """Test that set-based updates keep fingerprints current."""
+        expense = Expense.objects.create(user=self.user, category=self.groceries, amount=Decimal('5.00'), date=date(2025, 3, 1))
+
+        self.client.patch(reverse('expense-bulk'), {'ids': [expense.id], 'data': {'amount': '7.00'}}, format='json')
+
+        expense.refresh_from_db()
+        self.assertEqual(expense.fingerprint, entry_fingerprint(self.user.id, date(2025, 3, 1), '7.00', ''))
+
+    def test_backfill_command(self):
+        """Test that the backfill fills fingerprints of existing rows in batches."""
+        for day in range(1, 6):
+            Expense.objects.create(user=self.user, category=self.groceries, amount=Decimal('1.00'), date=date(2025, 3, day))
+        Expense.objects.update(fingerprint='')
+
+        out = StringIO()
+        call_command('backfill_fingerprints', '--batch-size', '2', stdout=out)
+
+        self.assertIn('Expense: 5 fingerprint(s) backfilled.', out.getvalue())
+        self.assertFalse(Expense.objects.filter(fingerprint='').exists())
+
+
+class AccountExportTests(TestCase):
+    """Test cases for the full-account ZIP archive export."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.groceries = Category.objects.create(user=self.user, name='Groceries', is_income=False)
+        self.salary = Category.objects.create(user=self.user, name='Salary', is_income=True)
+        for day in range(1, 6):
+            Expense.objects.create(
+                user=self.user, category=self.groceries, amount=Decimal('10.00') + day,
+                date=date(2025, 3, day), note=f'Shop, visit {day}'
+            )
+        Income.objects.create(user=self.user, category=self.salary, amount=Decimal('5000.00'), date=date(2025, 3, 1))
+        Budget.objects.create(user=self.user, category=self.groceries, year=2025, month=3, amount=Decimal('300.00'))
+
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='x')
+        other_category = Category.objects.create(user=other, name='Rent', is_income=False)
+        Expense.objects.create(user=other, category=other_category, amount=Decimal('900.00'), date=date(2025, 3, 1))
+
+    def read_csv(self, archive, name):
+        return list(csv.reader(StringIO(archive.read(name).decode())))
+
+    def test_export_archive_endpoint(self):
+        """Test that the archive holds one CSV per model with only the user's rows."""
+        response = self.client.get(reverse('account-export'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()),
+            ['account.json', 'budgets.csv', 'categories.csv', 'expenses.csv', 'incomes.csv']
+        )
+
+        expenses = self.read_csv(archive, 'expenses.csv')
+        self.assertEqual(
+            expenses[0],
+            ['id', 'date', 'category_id', 'category', 'amount', 'note', 'created_at', 'updated_at']
+        )
+        self.assertEqual(len(expenses), 6)
+        self.assertEqual(expenses[1][1:6], ['2025-03-01', str(self.groceries.id), 'Groceries', '11.00', 'Shop, visit 1'])
+        self.assertEqual([row[1] for row in self.read_csv(archive, 'categories.csv')[1:]], ['Groceries', 'Salary'])
+        self.assertEqual(self.read_csv(archive, 'budgets.csv')[1][1:6], ['2025', '3', str(self.groceries.id), 'Groceries', '300.00'])
+
+        account = json.loads(archive.read('account.json'))
+        self.assertEqual(account['user']['email'], 'test@example.com')
+        self.assertEqual(set(account['user']), {'id', 'email', 'username', 'date_joined'})
+        self.assertEqual(
+            account['files'],
+            {'categories.csv': 2, 'incomes.csv': 1, 'expenses.csv': 5, 'budgets.csv': 1}
+        )
+
+    def test_export_archive_streams_in_chunks(self):
+        """Test that small chunks produce several pieces that form a valid archive."""
+        pieces = list(exports.iter_user_archive(self.user, chunk_size=2))
+
+        self.assertGreater(len(pieces), 1)
+        archive = zipfile.ZipFile(BytesIO(b''.join(pieces)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(len(self.read_csv(archive, 'expenses.csv')), 6)
+
+    def test_export_requires_authentication(self):
+        """Test that the archive is not available anonymously."""
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(reverse('account-export'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_user_command(self):
+        """Test that the command writes one archive per user."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        out = StringIO()
+        call_command(
+            'export_user', '--email', 'test@example.com', '--email', 'OTHER@example.com',
+            '--output-dir', directory, stdout=out
+        )
+
+        self.assertIn('Exported 2 user(s)', out.getvalue())
+        with zipfile.ZipFile(os.path.join(directory, exports.archive_filename(self.user))) as archive:
+            self.assertEqual(len(self.read_csv(archive, 'expenses.csv')), 6)
+        self.assertEqual(len(os.listdir(directory)), 2)
+
+    def test_export_user_command_unknown_email(self):
+        """Test that an unknown email is reported."""
+        with self.assertRaises(CommandError):
+            call_command('export_user', '--email', 'nobody@example.com', '--output-dir', tempfile.gettempdir())
+
+
+class RendererTests(TestCase):
+    """Test cases for the orjson-backed JSON renderer."""
+
+    def test_matches_drf_json_renderer(self):
+        """Test that the output is identical to DRF's JSONRenderer."""
+        payload = {
+            'success': True,
+            'data': ReturnList([
+                {'id': 1, 'amount': '12.50', 'total': Decimal('1234.56'), 'date': date(2025, 3, 1),
+                 'created_at': timezone.now(), 'note': 'Caf\u00e9 \u2028 line'},
+            ], serializer=None),
+            'counts': {2025: 3},
+            'message': gettext_lazy('Items retrieved successfully'),
+        }
+
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_values_orjson_cannot_encode_fall_back(self):
+        """Test nested Decimals (through JSONEncoder.default) and integers beyond 64 bits (parent renderer)."""
+        nested = {'data': {'totals': [{'amount': Decimal('0.10')}, {'amount': Decimal('-1E+2')}]}}
+        self.assertEqual(FastJSONRenderer().render(nested), JSONRenderer().render(nested))
+        self.assertEqual(FastJSONRenderer().render(nested), b'{"data":{"totals":[{"amount":0.1},{"amount":-100.0}]}}')
+
+        big = {'data': {'id': 2 ** 70, 'amount': Decimal('1.00')}}
+        self.assertEqual(FastJSONRenderer().render(big), JSONRenderer().render(big))
+
+    def test_indented_output_falls_back(self):
+        """Test that an indent requested through the Accept header is honoured."""
+        content = FastJSONRenderer().render({'a': [1]}, 'application/json; indent=2', {})
+
+        self.assertEqual(content, b'{\n  "a": [\n    1\n  ]\n}')
+
+    def test_api_uses_fast_renderer(self):
+        """Test that API responses are rendered by the configured renderer."""
+        client = APIClient()
+        user = User.objects.create_user(username='test@example.com', email='test@example.com', password='x')
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse('category-list'))
+
+        self.assertEqual(type(response.accepted_renderer).__name__, 'FastJSONRenderer')
+        self.assertTrue(response.json()['success'])
+
+
+class FastListSerializerTests(TestCase):
+    """Test cases for the .values() based list serializers."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.salary = Category.objects.create(user=self.user, name='Salary', is_income=True)
+        self.groceries = Category.objects.create(user=self.user, name='Caf\u00e9 & \u98df\u54c1', is_income=False)
+        amounts = ['0.10', '12.00', '99.99', '1234567.89', '5']
+        for day, amount in enumerate(amounts, start=1):
+            Expense.objects.create(
+                user=self.user, category=self.groceries, amount=Decimal(amount),
+                date=date(2025, 2, day), note='' if day % 2 else f'Note "{day}"\n\u2028'
+            )
+            Income.objects.create(user=self.user, category=self.salary, amount=Decimal(amount), date=date(2025, 2, day))
+
+    def assertSameJSON(self, fast_data, drf_data):
+        self.assertEqual(JSONRenderer().render(fast_data), JSONRenderer().render(drf_data))
+
+    def test_entry_parity(self):
+        """Test that the fast path renders the same JSON as the entry serializers."""
+        for serializer_class, model in ((ExpenseSerializer, Expense), (IncomeSerializer, Income)):
+            queryset = model.objects.filter(user=self.user).order_by('id')
+            fast = FastListSerializer.for_serializer(serializer_class)
+
+            self.assertSameJSON(
+                fast.to_representation(fast.values(queryset)),
+                serializer_class(queryset, many=True).data
+            )
+
+    def test_entry_parity_in_active_timezone(self):
+        """Test that datetimes follow the active timezone like DateTimeField does."""
+        queryset = Expense.objects.filter(user=self.user).order_by('id')
+        fast = FastListSerializer.for_serializer(ExpenseSerializer)
+
+        with timezone.override('Asia/Kolkata'):
+            fast_data = fast.to_representation(fast.values(queryset))
+            drf_data = ExpenseSerializer(queryset, many=True).data
+
+        self.assertSameJSON(fast_data, drf_data)
+        self.assertTrue(fast_data[0]['created_at'].endswith('+05:30'))
+
+    def test_transaction_parity(self):
+        """Test that the fast path renders the same JSON as TransactionSerializer."""
+        view = TransactionView()
+        rows = list(view.merge_entry_querysets(
+            Income.objects.filter(user=self.user), Expense.objects.filter(user=self.user)
+        ))
+
+        self.assertSameJSON(
+            FastListSerializer.for_serializer(TransactionSerializer).to_representation(rows),
+            TransactionSerializer(rows, many=True).data
+        )
+
+    def test_list_endpoints_use_fast_path(self):
+        """Test that list responses in every pagination mode match the serializer output."""
+        queryset = Expense.objects.filter(user=self.user).order_by('-date', '-created_at', '-id')
+        expected = json.loads(JSONRenderer().render(ExpenseSerializer(queryset, many=True).data))
+
+        response = self.client.get(reverse('expense-list'))
+        self.assertEqual(response.json()['data'], expected)
+
+        response = self.client.get(reverse('expense-list'), {'page_size': 2, 'page': 2})
+        self.assertEqual(response.json()['data']['data'], expected[2:4])
+
+        response = self.client.get(reverse('expense-list'), {'pagination': 'cursor', 'page_size': 3})
+        self.assertEqual(response.json()['data']['data'], expected[:3])
+        response = self.client.get(response.json()['data']['next'])
+        self.assertEqual(response.json()['data']['data'], expected[3:])
+
+    def test_method_field_requires_annotation(self):
+        """Test that SerializerMethodFields without a values annotation are rejected."""
+        class LabelSerializer(serializers.Serializer):
+            label = serializers.SerializerMethodField()
+
+        with self.assertRaises(ValueError):
+            FastListSerializer(LabelSerializer)
+
+
+@override_settings(FINANCE_CACHE_SHARED=True)
+class CachedAuthenticationTests(TestCase):
+    """Test cases for the cached JWT user lookup."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.url = reverse('budget-management')
+        user_cache.clear()
+        user_cache.stats.reset()
+
+    def count_user_lookups(self):
+        """Run one request and return (response, number of user row SELECTs)."""
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        return response, sum('"finance_user"."password"' in query['sql'] for query in captured.captured_queries)
+
+    def test_user_row_is_cached(self):
+        """Test that only the first request loads the user row."""
+        response, lookups = self.count_user_lookups()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(lookups, 1)
+
+        for _ in range(3):
+            response, lookups = self.count_user_lookups()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(lookups, 0)
+
+        snapshot = user_cache.snapshot()
+        self.assertEqual((snapshot['hits'], snapshot['misses'], snapshot['size']), (3, 1, 1))
+
+    def test_deactivation_invalidates_cached_user(self):
+        """Test that a deactivated user is rejected right away."""
+        self.count_user_lookups()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        response, lookups = self.count_user_lookups()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(lookups, 1)
+
+    def test_password_change_invalidates_cached_user(self):
+        """Test that the user row is reloaded after a password change."""
+        self.count_user_lookups()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('newpass456')
+            self.user.save()
+
+        response, lookups = self.count_user_lookups()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(lookups, 1)
+
+    def test_login_keeps_cached_user(self):
+        """Test that saves of fields authentication does not read keep the cached row."""
+        self.count_user_lookups()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.user)
+            self.user.first_name = 'Test'
+            self.user.save()
+
+        response, lookups = self.count_user_lookups()
+        self.assertEqual((response.status_code, lookups), (status.HTTP_200_OK, 0))
+
+    def test_logout_invalidates_cached_user(self):
+        """Test that logging out drops the cached user row."""
+        self.count_user_lookups()
+
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response, lookups = self.count_user_lookups()
+        self.assertEqual(lookups, 1)
+
+    def test_stale_entry_expires_after_ttl(self):
+        """Test that a change made without a version bump is seen once the cached row is older than the TTL."""
+        self.count_user_lookups()
+        # Queryset updates send no signals, so the auth version stays the same
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response, lookups = self.count_user_lookups()
+        self.assertEqual((response.status_code, lookups), (status.HTTP_200_OK, 0))
+
+        later = time.monotonic() + user_cache.ttl + 1
+        with mock.patch('finance.authentication.time.monotonic', return_value=later):
+            response, lookups = self.count_user_lookups()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(lookups, 1)
+
+    @override_settings(FINANCE_CACHE_SHARED=False)
+    def test_unshared_cache_loads_user_every_request(self):
+        """Test that the user cache is bypassed when other workers cannot see version bumps."""
+        for _ in range(2):
+            response, lookups = self.count_user_lookups()
+            self.assertEqual((response.status_code, lookups), (status.HTTP_200_OK, 1))
+        self.assertEqual(user_cache.snapshot()['size'], 0)
+
+    def test_cache_is_bounded(self):
+        """Test that the least recently used rows are evicted."""
+        cache = UserCache(max_size=2, ttl=60)
+        for user_id in (1, 2, 3):
+            version, _ = cache.get(user_id)
+            cache.set(user_id, version, object())
+
+        self.assertIsNone(cache.get(1)[1])
+        self.assertIsNotNone(cache.get(3)[1])
+        self.assertEqual(cache.snapshot()['size'], 2)
+
+    def test_metrics_expose_hit_rate(self):
+        """Test that the metrics endpoint reports the user cache counters."""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(reverse('metrics'))
+
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        auth_cache = response.data['data']['authUserCache']
+        self.assertEqual((auth_cache['hits'], auth_cache['misses']), (1, 1))
+        self.assertEqual(auth_cache['hit_rate'], 0.5)
+
+
+
+class UserSessionTests(TestCase):
+    """Test cases for per-device refresh-token sessions."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def login(self, **extra):
+        response = self.client.post(
+            reverse('token_obtain_pair'),
+            {'email': 'test@example.com', 'password': 'testpass123'},
+            format='json',
+            **extra
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['data']
+
+    def test_login_records_session(self):
+        """Test that login records one session per device with its jti and expiry."""
+        data = self.login(HTTP_USER_AGENT='Phone', REMOTE_ADDR='10.0.0.7')
+        self.login(HTTP_USER_AGENT='Laptop')
+
+        refresh = RefreshToken(data['refresh'])
+        session = UserSession.objects.get(jti=refresh['jti'])
+        self.assertEqual(session.user, self.user)
+        self.assertEqual((session.user_agent, session.ip_address), ('Phone', '10.0.0.7'))
+        self.assertEqual(int(session.expires_at.timestamp()), refresh['exp'])
+        self.assertEqual(UserSession.objects.filter(user=self.user).count(), 2)
+
+    def test_login_fetches_user_once(self):
+        """Test that login reads the user row once and does not write it."""
+        with CaptureQueriesContext(connection) as captured:
+            self.login()
+        user_queries = [query['sql'] for query in captured.captured_queries if '"finance_user"' in query['sql']]
+        self.assertEqual(sum(sql.startswith('SELECT') for sql in user_queries), 1)
+        self.assertFalse(any(sql.startswith('UPDATE') for sql in user_queries))
+
+    def test_login_rejects_bad_credentials(self):
+        """Test that wrong passwords, unknown emails and inactive users get 401."""
+        response = self.client.post(reverse('token_obtain_pair'),
+                                    {'email': 'test@example.com', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(reverse('token_obtain_pair'),
+                                    {'email': 'test@example.com', 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(UserSession.objects.exists())
+
+    def test_refresh_rotates_session_in_place(self):
+        """Test that refresh moves the session to the new jti without touching the user row."""
+        data = self.login()
+        session = UserSession.objects.get(user=self.user)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(reverse('token_refresh'), {'refresh': data['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('"finance_user"' in query['sql'] for query in captured.captured_queries))
+
+        new_jti = RefreshToken(response.data['data']['refresh'])['jti']
+        self.assertNotEqual(new_jti, session.jti)
+        self.assertEqual(list(UserSession.objects.values_list('pk', 'jti')), [(session.pk, new_jti)])
+
+    def test_refresh_without_session_creates_one(self):
+        """Test that a refresh token issued before sessions were recorded gets a session."""
+        refresh = RefreshToken.for_user(self.user)
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(UserSession.objects.filter(user=self.user).count(), 1)
+
+    def test_logout_with_token_ends_only_that_session(self):
+        """Test that logout with a refresh token keeps the user's other devices signed in."""
+        phone = self.login()
+        laptop = self.login()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(reverse('logout'), {'refresh_token': phone['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(UserSession.objects.values_list('jti', flat=True)),
+                         [RefreshToken(laptop['refresh'])['jti']])
+
+    def test_purge_sessions_deletes_expired_rows_in_batches(self):
+        """Test that purge_sessions removes only expired sessions."""
+        now = timezone.now()
+        UserSession.objects.bulk_create(
+            [UserSession(user=self.user, jti=f'expired-{index}', expires_at=now - timedelta(hours=index + 1))
+             for index in range(5)]
+            + [UserSession(user=self.user, jti='live', expires_at=now + timedelta(days=1))]
+        )
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as captured:
+            call_command('purge_sessions', '--batch-size', '2', stdout=out)
+        self.assertIn('Deleted 5 expired session(s).', out.getvalue())
+        self.assertEqual(list(UserSession.objects.values_list('jti', flat=True)), ['live'])
+        deletes = [query for query in captured.captured_queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+
+
+@override_settings(FINANCE_CACHE_SHARED=True)
+class RevocationFilterTests(TestCase):
+    """Test cases for refresh-token blacklisting and the in-process revocation filter."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.refresh_url = reverse('token_refresh')
+        revocation_filter.clear()
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.refresh_url, {'refresh': str(token)}, format='json')
+
+    def test_rotated_refresh_token_is_rejected(self):
+        """Test that a refresh token cannot be reused after rotation."""
+        token = RefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(response.data['data']['refresh']).status_code, status.HTTP_200_OK)
+
+    def test_unrevoked_token_skips_blacklist_query(self):
+        """Test that a token missing from the filter is accepted without querying the blacklist."""
+        revocation_filter.rebuild()
+        token = RefreshToken.for_user(self.user)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertFalse(revocation_filter.is_revoked(token['jti']))
+        self.assertEqual(len(captured.captured_queries), 0)
+        self.assertEqual(revocation_filter.snapshot()['db_checks'], 0)
+
+    def test_filter_catches_up_with_other_processes(self):
+        """Test that tokens blacklisted elsewhere are picked up once the revocation version moves."""
+        revocation_filter.rebuild()
+        token = RefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        with self.captureOnCommitCallbacks(execute=True):
+            response_cache.bump_revocation_version_on_commit()
+
+        self.assertTrue(revocation_filter.is_revoked(token['jti']))
+        snapshot = revocation_filter.snapshot()
+        self.assertEqual((snapshot['rebuilds'], snapshot['catch_ups'], snapshot['revoked']), (1, 1, 1))
+
+    def blacklist_elsewhere(self, token):
+        """Blacklist a token as another worker would, without this process's version bump."""
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+
+    @override_settings(FINANCE_CACHE_SHARED=False)
+    def test_unshared_cache_always_checks_database(self):
+        """Test that a token blacklisted behind a stale filter is rejected when the cache is per process."""
+        revocation_filter.rebuild()
+        token = RefreshToken.for_user(self.user)
+        self.blacklist_elsewhere(token)
+
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(revocation_filter.snapshot()['revoked'], 1)
+
+    def test_unreadable_version_checks_database(self):
+        """Test that the filter is not trusted when the revocation version cannot be read."""
+        revocation_filter.rebuild()
+        token = RefreshToken.for_user(self.user)
+        self.blacklist_elsewhere(token)
+
+        with mock.patch.object(response_cache, 'get_revocation_version', side_effect=ConnectionError):
+            with self.assertLogs('finance.revocation', level='WARNING'):
+                self.assertTrue(revocation_filter.is_revoked(token['jti']))
+
+    def test_logout_blacklists_refresh_token(self):
+        """Test that logging out with a refresh token revokes it."""
+        token = RefreshToken.for_user(self.user)
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('logout'), {'refresh_token': str(token)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bloom_filter(self):
+        """Test that the Bloom filter has no false negatives and few false positives."""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(f'jti-{index}')
+        self.assertTrue(all(f'jti-{index}' in bloom for index in range(1000)))
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_purge_tokens_deletes_expired_rows(self):
+        """Test that purge_tokens removes expired outstanding and blacklisted tokens only."""
+        now = timezone.now()
+        expired = OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=self.user, jti=f'expired-{index}', token='x', expires_at=now - timedelta(days=1))
+            for index in range(5)
+        ])
+        live = OutstandingToken.objects.create(user=self.user, jti='live', token='x', expires_at=now + timedelta(days=1))
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in expired[:3]])
+        BlacklistedToken.objects.create(token=live)
+
+        out = StringIO()
+        call_command('purge_tokens', '--batch-size', '2', stdout=out)
+        self.assertIn('Deleted 5 expired outstanding token(s), 3 of them blacklisted.', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+
+@override_settings(FINANCE_PBKDF2_ITERATIONS=2000)
+class PasswordHashingTests(TestCase):
+    """Test cases for the password hashing pool and hasher profile upgrades."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.login_url = reverse('token_obtain_pair')
+
+    def test_pool_rejects_when_saturated(self):
+        """Test that the pool raises Throttled once workers and queue are busy."""
+        pool = HashingPool(workers=1, queue_size=0)
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+            return 'done'
+
+        worker = threading.Thread(target=pool.run, args=(block,))
+        worker.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(Throttled) as raised:
+                pool.run(lambda: None)
+            self.assertEqual(raised.exception.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        finally:
+            release.set()
+            worker.join()
+        self.assertEqual(pool.run(lambda: 'free'), 'free')
+        self.assertEqual(pool.snapshot()['rejected'], 1)
+
+    def test_login_returns_429_when_pool_is_full(self):
+        """Test that login answers 429 with Retry-After instead of queueing more hashing."""
+        User.objects.create_user(username='test@example.com', email='test@example.com', password='testpass123')
+        full = HashingPool(workers=1, queue_size=0)
+        full._slots.acquire()
+
+        with mock.patch.object(passwords, 'pool', full):
+            response = self.client.post(self.login_url, {'email': 'test@example.com', 'password': 'testpass123'},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(response.data['success'])
+
+    @override_settings(FINANCE_CACHE_SHARED=True)
+    def test_limit_is_shared_between_processes(self):
+        """Test that hashes running in other processes (one per sync worker) fill the limit and login gets 429."""
+        User.objects.create_user(username='test@example.com', email='test@example.com', password='testpass123')
+        release = threading.Event()
+        callers = []
+        for _ in range(2):  # each pool stands in for one single-threaded worker process
+            started = threading.Event()
+            caller = threading.Thread(
+                target=HashingPool(workers=1, queue_size=1).run,
+                args=(lambda started=started: started.set() or release.wait(5),),
+            )
+            caller.start()
+            started.wait(5)
+            callers.append(caller)
+        other_process = HashingPool(workers=1, queue_size=1)
+
+        try:
+            with mock.patch.object(passwords, 'pool', other_process):
+                response = self.client.post(self.login_url, {'email': 'test@example.com', 'password': 'testpass123'},
+                                            format='json')
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response['Retry-After'], '1')
+        finally:
+            release.set()
+            for caller in callers:
+                caller.join()
+        self.assertEqual(other_process.run(lambda: 'free'), 'free')
+        self.assertEqual(other_process.snapshot()['rejected'], 1)
+
+    def test_login_rehashes_outdated_password(self):
+        """Test that a password hashed with another profile is rehashed on login, writing only the password."""
+        with override_settings(FINANCE_PBKDF2_ITERATIONS=1000):
+            user = User.objects.create_user(username='test@example.com', email='test@example.com',
+                                            password='testpass123')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(self.login_url, {'email': 'test@example.com', 'password': 'testpass123'},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(user.check_password('testpass123'))
+        updates = [query['sql'] for query in captured.captured_queries
+                   if query['sql'].startswith('UPDATE "finance_user"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "password"', updates[0])
+        self.assertNotIn('"email"', updates[0])
+
+    def test_registration_inserts_hashed_user_once(self):
+        """Test that registration hashes before the INSERT and does not save the row again."""
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(reverse('user_register'),
+                                        {'email': 'new@example.com', 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user_writes = [query['sql'] for query in captured.captured_queries
+                       if query['sql'].startswith(('INSERT INTO "finance_user"', 'UPDATE "finance_user"'))]
+        self.assertEqual(len(user_writes), 1)
+        user = User.objects.get(email='new@example.com')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(user.check_password('testpass123'))
+
+
+@override_settings(
+    FINANCE_THROTTLE_STORE='local',
+    FINANCE_THROTTLE_RATES={'login': '3/min', 'bulk_write': '2/min', 'bulk_write_ip': '100/min'},
+)
+class ThrottleTests(TestCase):
+    """Test cases for the token-bucket throttles."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='test@example.com',
+            email='test@example.com',
+            password='testpass123'
+        )
+        throttling.get_store().clear()
+        throttling.stats.reset()
+
+    def login(self, **extra):
+        return self.client.post(reverse('token_obtain_pair'),
+                                {'email': 'test@example.com', 'password': 'wrong'}, format='json', **extra)
+
+    def test_login_is_limited_per_ip(self):
+        """Test that an address gets 429 with Retry-After once its login bucket is empty."""
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # One token per 20 seconds
+        self.assertIn(int(response['Retry-After']), range(19, 21))
+        self.assertFalse(response.data['success'])
+
+        # Another address has its own bucket
+        self.assertEqual(self.login(REMOTE_ADDR='10.0.0.9').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(throttling.stats.snapshot()['rejected'], {'login': 1})
+
+    def test_bulk_writes_are_limited_per_user(self):
+        """Test that bulk writes share one bucket per user across the bulk routes."""
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='x')
+        self.client.force_authenticate(user=self.user)
+        payload = {'ids': [999999]}
+        self.assertNotEqual(self.client.delete(reverse('expense-bulk'), payload, format='json').status_code,
+                            status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertNotEqual(self.client.delete(reverse('income-bulk'), payload, format='json').status_code,
+                            status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.client.delete(reverse('category-bulk'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.client.force_authenticate(user=other)
+        self.assertNotEqual(self.client.delete(reverse('expense-bulk'), payload, format='json').status_code,
+                            status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_reads_are_not_limited(self):
+        """Test that routes without throttles ignore the buckets."""
+        self.client.force_authenticate(user=self.user)
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('expense-list')).status_code, status.HTTP_200_OK)
+
+    def test_bucket_refills_over_time(self):
+        """Test that tokens come back at the configured rate, up to the bucket size."""
+        store = LocalBucketStore()
+        self.assertEqual([store.consume('key', 2, 1.0, 100.0) for _ in range(3)], [0.0, 0.0, 1.0])
+        self.assertEqual(store.consume('key', 2, 1.0, 100.5), 0.5)
+        self.assertEqual(store.consume('key', 2, 1.0, 101.0), 0.0)
+        self.assertEqual([store.consume('key', 2, 1.0, 200.0) for _ in range(3)], [0.0, 0.0, 1.0])
+
+    @override_settings(FINANCE_THROTTLE_STORE='cache')
+    def test_cache_store_shares_buckets(self):
+        """Test that the cache store keeps buckets in the finance cache."""
+        key = 'finance:throttle:login:ip:10.0.0.20'
+        response_cache.get_cache().delete(key)
+        for _ in range(3):
+            self.login(REMOTE_ADDR='10.0.0.20')
+        self.assertEqual(self.login(REMOTE_ADDR='10.0.0.20').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        tokens, _ = response_cache.get_cache().get(key)
+        self.assertLess(tokens, 1)
@@ -0,0 +1,198 @@
+"""
+Token-bucket rate limiting for the auth and bulk-write endpoints.
+
+Each (scope, client) pair owns a bucket holding up to N tokens that refills
+at N per period (FINANCE_THROTTLE_RATES, e.g. 'login': '10/min'). A request
+takes one token; an empty bucket answers 429 with the seconds until the
+next token in Retry-After. A bucket is two numbers (tokens, last update),
+so every check is O(1), unlike DRF's SimpleRateThrottle which keeps the
+timestamp of every request in the window.
+
+Buckets live in a pluggable store (FINANCE_THROTTLE_STORE):
+    'local'  one dict per worker process, shared by its threads (single host,
+             one worker, or per-worker limits)
+    'cache'  the finance cache (settings.FINANCE_CACHE_ALIAS), shared by every
+             worker using the same backend; the read-update-write is not
+             atomic, so concurrent requests may slip a token through
+    or the dotted path of a class with the same consume() interface.
+
+Throttle classes are attached per route in finance/urls.py. Rejections are
+counted per scope and reported at GET /api/metrics.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from finance.cache import KEY_PREFIX
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'10/min' -> (10 tokens, 60 seconds); same format as DRF's throttle rates."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def take_token(tokens: float, updated_at: float, capacity: int, refill_rate: float,
+               now: float) -> Tuple[float, float]:
+    """Refill a bucket up to now and take one token. Return (tokens left, seconds to wait or 0)."""
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * refill_rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / refill_rate
+
+
+class LocalBucketStore:
+    """Buckets in a dict of this process, least recently used dropped past max_keys."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+
+    def consume(self, key: str, capacity: int, refill_rate: float, now: float) -> float:
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens, wait = take_token(tokens, updated_at, capacity, refill_rate, now)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in the finance cache; an entry expires once its bucket would be full again."""
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'FINANCE_CACHE_ALIAS', 'default')]
+
+    def consume(self, key: str, capacity: int, refill_rate: float, now: float) -> float:
+        tokens, updated_at = self.cache.get(key, (capacity, now))
+        tokens, wait = take_token(tokens, updated_at, capacity, refill_rate, now)
+        self.cache.set(key, (tokens, now), timeout=math.ceil((capacity - tokens) / refill_rate) + 1)
+        return wait
+
+    def clear(self):
+        pass  # entries expire on their own
+
+
+STORES = {
+    'local': LocalBucketStore,
+    'cache': CacheBucketStore,
+}
+_stores: Dict[str, Any] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store():
+    name = getattr(settings, 'FINANCE_THROTTLE_STORE', 'local')
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = (STORES.get(name) or import_string(name))()
+        return _stores[name]
+
+
+class ThrottleStats:
+    """Thread-safe, per-process counts of rejected requests by scope."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rejected = defaultdict(int)
+
+    def record_rejection(self, scope: str):
+        with self._lock:
+            self._rejected[scope] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'store': getattr(settings, 'FINANCE_THROTTLE_STORE', 'local'),
+                'rejected': dict(self._rejected),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._rejected.clear()
+
+
+stats = ThrottleStats()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class; subclasses set scope and get_bucket_key()."""
+    scope: Optional[str] = None
+
+    def get_rate(self) -> Optional[str]:
+        return getattr(settings, 'FINANCE_THROTTLE_RATES', {}).get(self.scope)
+
+    def get_bucket_key(self, request) -> Optional[str]:
+        raise NotImplementedError('.get_bucket_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        rate = self.get_rate()
+        key = self.get_bucket_key(request) if rate else None
+        if key is None:
+            return True
+        capacity, period = parse_rate(rate)
+        wait = get_store().consume(
+            f'{KEY_PREFIX}:throttle:{self.scope}:{key}', capacity, capacity / period, time.time()
+        )
+        if not wait:
+            return True
+        self.retry_after = wait
+        stats.record_rejection(self.scope)
+        return False
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """One bucket per client address (REST_FRAMEWORK['NUM_PROXIES'] decides how X-Forwarded-For is read)."""
+
+    def get_bucket_key(self, request):
+        return f'ip:{self.get_ident(request)}'
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """One bucket per authenticated user; anonymous requests are left to the IP throttles."""
+
+    def get_bucket_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return None
+
+
+class LoginThrottle(IPTokenBucketThrottle):
+    scope = 'login'
+
+
+class RegisterThrottle(IPTokenBucketThrottle):
+    scope = 'register'
+
+
+class RefreshThrottle(IPTokenBucketThrottle):
+    scope = 'refresh'
+
+
+class BulkWriteUserThrottle(UserTokenBucketThrottle):
+    scope = 'bulk_write'
+
+
+class BulkWriteIPThrottle(IPTokenBucketThrottle):
+    scope = 'bulk_write_ip'
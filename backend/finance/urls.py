@@ -4,8 +4,14 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     UserRegisterView, UserDetailView, CategoryViewSet, IncomeViewSet, ExpenseViewSet, BudgetViewSet, 
     FinancialSummaryView, CustomTokenObtainPairView, CustomTokenRefreshView, CustomLogoutView,
-    TransactionView, BudgetManagementView
+    TransactionView, TransactionExportView, BudgetManagementView, StatementImportView, AccountExportView,
+    MetricsView
 )
+from .throttling import (
+    BulkWriteIPThrottle, BulkWriteUserThrottle, LoginThrottle, RefreshThrottle, RegisterThrottle
+)
+
+BULK_WRITE_THROTTLES = [BulkWriteUserThrottle, BulkWriteIPThrottle]
 
 # Create a router for the ViewSets without trailing slashes
 router = DefaultRouter(trailing_slash=False)
@@ -15,6 +21,18 @@ router.register(r'expenses', ExpenseViewSet, basename='expense')
 router.register(r'budgets', BudgetViewSet, basename='budget')
 
 
+def bulk_path(prefix, viewset, basename):
+    """The router's {prefix}/bulk route of a ViewSet, with the bulk-write throttles attached."""
+    return path(
+        f'{prefix}/bulk',
+        viewset.as_view(
+            dict(viewset.bulk.mapping), basename=basename, detail=False,
+            throttle_classes=BULK_WRITE_THROTTLES, **viewset.bulk.kwargs
+        ),
+        name=f'{basename}-bulk'
+    )
+
+
 urlpatterns = [
     # ------------------------------------------------
     # 1. Authentication Endpoints (Open)
@@ -22,18 +40,18 @@ urlpatterns = [
     # Custom registration endpoint using the optimized serializer/view
     path(
         'auth/register', 
-        UserRegisterView.as_view(), 
+        UserRegisterView.as_view(throttle_classes=[RegisterThrottle]), 
         name='user_register'
     ),
     # JWT Token endpoints for login and refresh
     path(
         'auth/login', 
-        CustomTokenObtainPairView.as_view(), 
+        CustomTokenObtainPairView.as_view(throttle_classes=[LoginThrottle]), 
         name='token_obtain_pair'
     ),
     path(
         'auth/refresh', 
-        CustomTokenRefreshView.as_view(), 
+        CustomTokenRefreshView.as_view(throttle_classes=[RefreshThrottle]), 
         name='token_refresh'
     ), 
     path(
@@ -51,6 +69,12 @@ urlpatterns = [
     # ------------------------------------------------
     # 2. Main Application Endpoints (Auth Required)
     # ------------------------------------------------
+    # Bulk writes, matched before the router's own bulk routes to add throttling
+    bulk_path('categories', CategoryViewSet, 'category'),
+    bulk_path('incomes', IncomeViewSet, 'income'),
+    bulk_path('expenses', ExpenseViewSet, 'expense'),
+    bulk_path('budgets', BudgetViewSet, 'budget'),
+
     # Router paths for CRUD operations
     path('', include(router.urls)),
 
@@ -67,9 +91,37 @@ urlpatterns = [
         name='transactions'
     ),
 
+    # Streaming CSV / NDJSON download of the filtered transactions
+    path(
+        'transactions/export',
+        TransactionExportView.as_view(),
+        name='transactions-export'
+    ),
+
     path(
         'budget-management',
         BudgetManagementView.as_view(),
         name='budget-management'
+    ),
+
+    # Bank statement upload (CSV / OFX)
+    path(
+        'imports/statement',
+        StatementImportView.as_view(throttle_classes=BULK_WRITE_THROTTLES),
+        name='statement-import'
+    ),
+
+    # Full-account ZIP archive (one CSV per model)
+    path(
+        'exports/account',
+        AccountExportView.as_view(),
+        name='account-export'
+    ),
+
+    # Staff-only monitoring counters
+    path(
+        'metrics',
+        MetricsView.as_view(),
+        name='metrics'
     )
 ]
\ No newline at end of file
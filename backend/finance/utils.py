@@ -1,9 +1,12 @@
 """
-Utility functions for standardized API responses
+Utility functions for standardized API responses, date windows and entry fingerprints
 """
+import hashlib
+from datetime import date
+from decimal import Decimal
 from rest_framework.response import Response
 from rest_framework import status
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Tuple
 
 
 def success_response(
@@ -73,3 +76,31 @@ def error_response(
     
     return Response(response_data, status=status_code)
 
+
+def shift_month(year: int, month: int, delta: int) -> Tuple[int, int]:
+    """
+    Move a (year, month) pair by delta months, handling year rollover.
+    
+    Example: shift_month(2025, 1, -1) -> (2024, 12)
+    """
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def normalize_note(note: Optional[str]) -> str:
+    """Case-fold a note and collapse its whitespace, for duplicate detection."""
+    return ' '.join((note or '').split()).casefold()
+
+
+def entry_fingerprint(user_id, entry_date, amount, note: Optional[str]) -> str:
+    """
+    Returns the duplicate-detection fingerprint of an Income/Expense entry:
+    sha256 of user, date, amount (2 decimals) and normalized note.
+
+    Example: entry_fingerprint(1, date(2025, 3, 1), Decimal('42.5'), '  Super  Market ')
+             == entry_fingerprint(1, date(2025, 3, 1), Decimal('42.50'), 'super market')
+    """
+    day = entry_date.isoformat() if isinstance(entry_date, date) else str(entry_date)
+    value = Decimal(str(amount)).quantize(Decimal('0.01'))
+    key = f"{user_id}|{day}|{value}|{normalize_note(note)}"
+    return hashlib.sha256(key.encode()).hexdigest()
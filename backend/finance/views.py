@@ -1,36 +1,57 @@
+import csv
+import io
+import logging
 from datetime import date, datetime
-from decimal import Decimal
-from django.db.models import Sum, Q
+from decimal import Decimal, InvalidOperation
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
 from django.db.models.functions import Coalesce
 from calendar import month_name
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import CreateAPIView, RetrieveAPIView, ListAPIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
+from rest_framework.serializers import as_serializer_error
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from finance.models import Budget, Category, Expense, Income
+from finance.models import Budget, Category, Expense, Income, MonthlyCategoryTotal
 from finance.serializers import (
-    BudgetSerializer, CategorySerializer, ExpenseSerializer, FinancialSummarySerializer, 
+    BudgetSerializer, CategorySerializer, ExpenseSerializer,
     IncomeSerializer, UserRegistrationSerializer, CustomTokenObtainPairSerializer,
-    UserDetailSerializer, TransactionSerializer, BudgetManagementSerializer
+    CustomTokenRefreshSerializer,
+    UserDetailSerializer, TransactionSerializer, StatementImportSerializer,
+    FastListSerializer
 )
-from finance.utils import success_response, error_response
+from finance import cache as response_cache
+from finance import exports, importers, passwords, revocation, rollups, sessions, throttling
+from finance.revocation import FilteredRefreshToken, revocation_filter
+from finance.duplicates import DUPLICATE_POLICIES, SKIP, DuplicateFinder
+from finance.authentication import user_cache
+from finance.conditional import ConditionalGetMixin
+from finance.filters import ExpenseFilter, IncomeFilter
+from finance.pagination import EntryPagination, TransactionCursorPagination, TransactionPagination
+from finance.utils import success_response, error_response, shift_month
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class UserRegisterView(CreateAPIView):
     """
     Endpoint for user registration. Uses the custom UserRegistrationSerializer.
     Returns access_token and refresh_token upon successful registration.
-    Stores refresh_token in the User model.
+    Records the refresh token as a device session (finance.sessions).
     This is an OPEN endpoint (AllowAny).
     """
     serializer_class = UserRegistrationSerializer
@@ -42,13 +63,11 @@ class UserRegisterView(CreateAPIView):
         user = serializer.save()
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = FilteredRefreshToken.for_user(user)
         access_token = str(refresh.access_token)
         refresh_token = str(refresh)
         
-        # Store refresh_token in the user model
-        user.refresh_token = refresh_token
-        user.save()
+        sessions.start_session(user.pk, refresh, request)
         
         # Return standardized success response
         return success_response(
@@ -68,94 +87,68 @@ class UserRegisterView(CreateAPIView):
 class CustomTokenObtainPairView(TokenObtainPairView):
     """
     Custom login view that accepts email and password.
-    Stores refresh_token in the User model upon successful authentication.
+    Records the refresh token as a device session upon successful authentication,
+    using the user the serializer already fetched.
     Uses CustomTokenObtainPairSerializer to include username in JWT token.
     Returns access, refresh tokens and user email.
     """
     serializer_class = CustomTokenObtainPairSerializer
     
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        
-        if response.status_code == 200:
-            # Get email from request
-            email = request.data.get('email', '').lower()
-            if email:
-                try:
-                    user = User.objects.get(email=email)
-                    # Extract refresh_token from response
-                    refresh_token = response.data.get('refresh')
-                    if refresh_token:
-                        # Store refresh_token in the user model
-                        user.refresh_token = refresh_token
-                        user.save()
-                    
-                    # Transform response to standardized format
-                    return success_response(
-                        data={
-                            'access': response.data.get('access'),
-                            'refresh': response.data.get('refresh'),
-                            'user': {
-                                'email': user.email
-                            }
-                        },
-                        message='Login successful'
-                    )
-                except User.DoesNotExist:
-                    pass
-        
-        # If response is not 200, return as-is (will be handled by exception handler)
-        return response
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        
+        user = serializer.user
+        sessions.start_session(user.pk, serializer.token, request)
+        
+        # Transform response to standardized format
+        return success_response(
+            data={
+                'access': serializer.validated_data['access'],
+                'refresh': serializer.validated_data['refresh'],
+                'user': {
+                    'email': user.email
+                }
+            },
+            message='Login successful'
+        )
 
 
 class CustomTokenRefreshView(TokenRefreshView):
     """
-    Custom token refresh view that stores the new refresh_token in the User model
-    upon successful token refresh.
+    Custom token refresh view that moves the device session to the rotated
+    refresh token with one UPDATE of the session row.
     """
+    serializer_class = CustomTokenRefreshSerializer
+
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        
-        if response.status_code == 200:
-            # Extract the refresh token from request to get user_id
-            refresh_token_str = request.data.get('refresh')
-            if refresh_token_str:
-                try:
-                    # Decode the refresh token to get user_id
-                    refresh_token = RefreshToken(refresh_token_str)
-                    # Access user_id from token payload
-                    user_id = refresh_token.payload.get('user_id') or refresh_token.get('user_id')
-                    
-                    if user_id:
-                        try:
-                            user = User.objects.get(id=user_id)
-                            # Extract new refresh_token from response
-                            new_refresh_token = response.data.get('refresh')
-                            if new_refresh_token:
-                                # Store new refresh_token in the user model
-                                user.refresh_token = new_refresh_token
-                                user.save()
-                        except User.DoesNotExist:
-                            pass
-                except (TokenError, KeyError, AttributeError):
-                    pass
-            
-            # Transform response to standardized format
-            return success_response(
-                data={
-                    'access': response.data.get('access'),
-                    'refresh': response.data.get('refresh'),
-                },
-                message='Token refreshed successfully'
-            )
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
         
-        # If response is not 200, return as-is (will be handled by exception handler)
-        return response
+        data = serializer.validated_data
+        if 'refresh' in data:
+            sessions.rotate_session(serializer.previous_jti, serializer.user_id, serializer.token, request)
+        
+        # Transform response to standardized format
+        return success_response(
+            data={
+                'access': data.get('access'),
+                'refresh': data.get('refresh'),
+            },
+            message='Token refreshed successfully'
+        )
 
 
 class CustomLogoutView(APIView):
     """
-    Custom logout view that clears the refresh_token from the database.
+    Custom logout view that ends the device session of the given refresh token,
+    or every session of the user when none is given.
     Optionally blacklists the refresh token if provided.
     Requires authentication.
     """
@@ -164,19 +157,24 @@ class CustomLogoutView(APIView):
     def post(self, request, *args, **kwargs):
         user = request.user
         
-        # Clear refresh_token from database
-        user.refresh_token = None
-        user.save()
-        
-        # Optionally blacklist the refresh token if provided
         refresh_token = request.data.get('refresh_token')
+        token = None
         if refresh_token:
             try:
-                token = RefreshToken(refresh_token)
-                token.blacklist()
+                token = FilteredRefreshToken(refresh_token)
             except TokenError:
-                # Token is already blacklisted or invalid, ignore
+                # Token is expired or invalid; end every session instead
                 pass
+        if token is not None and token.get(jwt_settings.USER_ID_CLAIM) != user.pk:
+            token = None
+        
+        sessions.end_sessions(user.pk, jti=token[jwt_settings.JTI_CLAIM] if token is not None else None)
+        # Drop the cached user row (finance.authentication) in every worker
+        response_cache.bump_auth_version(user.pk)
+        
+        # Optionally blacklist the refresh token if provided
+        if token is not None:
+            revocation.blacklist(token)
         
         return success_response(
             message='Successfully logged out. Refresh token cleared.'
@@ -214,75 +212,245 @@ class UserDetailView(RetrieveAPIView):
         )
 
 
-class OwnerModelViewSet(ModelViewSet):
+class OwnerModelViewSet(ConditionalGetMixin, ModelViewSet):
     """
     A base ViewSet that automatically filters the queryset by the current user
     and sets the 'user' field on creation/update.
     Also formats all responses to standardized format.
+    List responses carry an ETag built from the user's rows of etag_models.
+
+    query_plans declares, per action, the related objects the serializer
+    reads, so they are loaded with the rows instead of one query per row:
+        query_plans = {'list': {'select_related': ('category',)}}
+    The 'default' plan applies to actions without their own entry.
+
+    PATCH/DELETE {prefix}/bulk update or delete many owned rows with one
+    set-based statement, see bulk_update() and bulk_destroy().
     """
     permission_classes = [IsAuthenticated]
+    query_plans = {}
+    # Serialize list responses from .values() rows with FastListSerializer
+    fast_list = False
+    bulk_max_items = 1000
+    # Fields PATCH {prefix}/bulk may set; empty disables bulk updates
+    bulk_update_fields = ()
 
     def get_queryset(self):
         """Filters the queryset to only include objects owned by the current user."""
         # Ensure the user is authenticated before filtering (though IsAuthenticated should catch unauth)
         if self.request.user.is_authenticated:
-            return self.queryset.filter(user=self.request.user)
+            return self.apply_query_plan(self.queryset.filter(user=self.request.user))
         # Return an empty queryset for safety if somehow unauthenticated
         return self.queryset.none()
 
+    def apply_query_plan(self, queryset):
+        """Apply the select_related/prefetch_related plan of the current action."""
+        plan = self.query_plans.get(self.action, self.query_plans.get('default', {}))
+        if plan.get('select_related'):
+            queryset = queryset.select_related(*plan['select_related'])
+        if plan.get('prefetch_related'):
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+        return queryset
+
     def perform_create(self, serializer):
         """Sets the user field automatically on creation."""
         # Since IsAuthenticated is used, user is guaranteed to be present
-        serializer.save(user=self.request.user)
+        # Atomic so the rollup maintained by finance.signals commits together with the row
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+            response_cache.bump_data_version_on_commit(self.request.user.pk)
 
     def perform_update(self, serializer):
         """Sets the user field automatically on update (in case it was excluded from data)."""
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+            response_cache.bump_data_version_on_commit(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        """Deletes the instance and invalidates the user's cached responses."""
+        with transaction.atomic():
+            instance.delete()
+            response_cache.bump_data_version_on_commit(self.request.user.pk)
+
+    def perform_bulk_update(self, queryset, changes):
+        """Apply the validated changes to every row of the queryset in one UPDATE."""
+        queryset.update(**changes, updated_at=timezone.now())
+
+    def perform_bulk_destroy(self, queryset):
+        """Delete every row of the queryset."""
+        queryset.delete()
+
+    def get_bulk_ids(self, request):
+        """Return the validated, de-duplicated 'ids' of a bulk request."""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if (not isinstance(ids, list) or not ids
+                or any(isinstance(pk, bool) or not isinstance(pk, int) for pk in ids)):
+            raise ValidationError({'ids': 'Expected a non-empty list of integer ids.'})
+        if len(ids) > self.bulk_max_items:
+            raise ValidationError({'ids': f'At most {self.bulk_max_items} ids can be processed at once.'})
+        return set(ids)
+
+    def lock_bulk_queryset(self, ids):
+        """
+        Lock the user's rows with the given ids.
+        Returns (queryset, missing ids); must run inside a transaction.
+        """
+        queryset = self.queryset.filter(user=self.request.user, pk__in=ids)
+        found = set(queryset.select_for_update().values_list('pk', flat=True))
+        return queryset, sorted(ids - found)
+
+    @action(detail=False, methods=['patch', 'delete'], url_path='bulk', url_name='bulk')
+    def bulk(self, request):
+        """PATCH {prefix}/bulk updates, DELETE {prefix}/bulk deletes the listed ids."""
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+        return self.bulk_update(request)
+
+    def bulk_update(self, request):
+        """
+        Set the same fields on many rows: {"ids": [1, 2], "data": {"category_id": 3}}.
+        The changes are validated by the regular serializer (as a partial update)
+        and applied with a single UPDATE; nothing changes if any id is missing.
+        """
+        if not self.bulk_update_fields:
+            return error_response(
+                'Bulk update is not supported for this resource.',
+                status_code=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+
+        ids = self.get_bulk_ids(request)
+        changes = request.data.get('data')
+        if not isinstance(changes, dict) or not changes:
+            raise ValidationError({'data': 'Expected an object with the fields to update.'})
+        not_allowed = sorted(set(changes) - set(self.bulk_update_fields))
+        if not_allowed:
+            raise ValidationError({'data': f'Fields that cannot be updated in bulk: {", ".join(not_allowed)}.'})
+
+        serializer = self.get_serializer(data=changes, partial=True)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            queryset, missing = self.lock_bulk_queryset(ids)
+            if missing:
+                return error_response({'ids': missing}, message='Some items were not found.',
+                                      status_code=status.HTTP_404_NOT_FOUND)
+            self.perform_bulk_update(queryset, serializer.validated_data)
+            response_cache.bump_data_version_on_commit(request.user.pk)
+
+        return success_response(
+            data={'updated': len(ids)},
+            message='Items updated successfully'
+        )
+
+    def bulk_destroy(self, request):
+        """
+        Delete many rows: {"ids": [1, 2, 3]}.
+        Nothing is deleted if any id is missing or a row is still referenced.
+        """
+        ids = self.get_bulk_ids(request)
+        try:
+            with transaction.atomic():
+                queryset, missing = self.lock_bulk_queryset(ids)
+                if missing:
+                    return error_response({'ids': missing}, message='Some items were not found.',
+                                          status_code=status.HTTP_404_NOT_FOUND)
+                self.perform_bulk_destroy(queryset)
+                response_cache.bump_data_version_on_commit(request.user.pk)
+        except ProtectedError:
+            return error_response(
+                'Some items are still used by other records and cannot be deleted.',
+                status_code=status.HTTP_409_CONFLICT
+            )
+
+        return success_response(
+            data={'deleted': len(ids)},
+            message='Items deleted successfully'
+        )
     
+    def get_fast_list_serializer(self):
+        """Return the FastListSerializer of list actions, or None to use the regular serializer."""
+        if self.fast_list and self.action == 'list':
+            return FastListSerializer.for_serializer(self.get_serializer_class())
+        return None
+
+    def get_paginated_data(self, data):
+        """Return the page of serialized rows with its pagination metadata."""
+        if hasattr(self.paginator, 'get_paginated_data'):
+            return self.paginator.get_paginated_data(data)
+        return self.paginator.get_paginated_response(data).data
+
+    # The actions below follow DRF's mixins, but build the standardized
+    # envelope once from the serializer data instead of re-wrapping the
+    # mixins' Response objects.
+
     def list(self, request, *args, **kwargs):
         """Override list to return standardized response."""
-        response = super().list(request, *args, **kwargs)
+        not_modified = self.check_not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        queryset = self.filter_queryset(self.get_queryset())
+        fast_serializer = self.get_fast_list_serializer()
+        if fast_serializer is not None:
+            queryset = fast_serializer.values(queryset)
+
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        if fast_serializer is not None:
+            data = fast_serializer.to_representation(rows)
+        else:
+            data = self.get_serializer(rows, many=True).data
+        if page is not None:
+            data = self.get_paginated_data(data)
         return success_response(
-            data=response.data,
+            data=data,
             message='Items retrieved successfully'
         )
     
     def create(self, request, *args, **kwargs):
         """Override create to return standardized response."""
-        response = super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
         return success_response(
-            data=response.data,
+            data=serializer.data,
             message='Item created successfully',
             status_code=status.HTTP_201_CREATED
         )
     
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to return standardized response."""
-        response = super().retrieve(request, *args, **kwargs)
+        serializer = self.get_serializer(self.get_object())
         return success_response(
-            data=response.data,
+            data=serializer.data,
             message='Item retrieved successfully'
         )
     
     def update(self, request, *args, **kwargs):
         """Override update to return standardized response."""
-        response = super().update(request, *args, **kwargs)
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        if getattr(instance, '_prefetched_objects_cache', None):
+            # Prefetched relations are stale after the update
+            instance._prefetched_objects_cache = {}
+
         return success_response(
-            data=response.data,
+            data=serializer.data,
             message='Item updated successfully'
         )
     
     def partial_update(self, request, *args, **kwargs):
         """Override partial_update to return standardized response."""
-        response = super().partial_update(request, *args, **kwargs)
-        return success_response(
-            data=response.data,
-            message='Item updated successfully'
-        )
+        kwargs['partial'] = True
+        return self.update(request, *args, **kwargs)
     
     def destroy(self, request, *args, **kwargs):
         """Override destroy to return standardized response."""
-        super().destroy(request, *args, **kwargs)
+        self.perform_destroy(self.get_object())
         return success_response(
             message='Item deleted successfully',
             status_code=status.HTTP_200_OK
@@ -300,6 +468,7 @@ class CategoryViewSet(OwnerModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     pagination_class = None
+    etag_models = (Category,)
 
     def get_queryset(self):
         """
@@ -321,21 +490,167 @@ class CategoryViewSet(OwnerModelViewSet):
 # 2. Income ViewSet
 # ------------------------------------------------------------
 
-class IncomeViewSet(OwnerModelViewSet):
+class EntryViewSet(OwnerModelViewSet):
+    """
+    Shared list behaviour of the Income and Expense ViewSets:
+    - filters from filterset_class (date, date_from, date_to, amount_min, amount_max, category, category_name)
+    - ?ordering= on ordering_fields, newest first by default
+    - opt-in page (?page, ?page_size) and cursor (?pagination=cursor) modes, see EntryPagination
+    - ?count_only=true and HEAD return the total only, also sent as the X-Total-Count header
+    - POST {prefix}/bulk creates many entries at once, see bulk_create()
+    - bulk writes keep the monthly rollup in sync with grouped deltas
+    """
+    pagination_class = EntryPagination
+    ordering_fields = ['date', 'amount', 'created_at', 'id']
+    ordering = ['-date', '-created_at', '-id']
+    count_header = 'X-Total-Count'
+    fast_list = True
+    bulk_update_fields = ('category_id', 'amount', 'date', 'note')
+    # The serializer nests the category
+    query_plans = {
+        'list': {'select_related': ('category',)},
+        'retrieve': {'select_related': ('category',)},
+    }
+
+    def is_count_only(self, request):
+        count_only = request.query_params.get('count_only', '')
+        return request.method == 'HEAD' or count_only.lower() in ['true', '1']
+
+    def list(self, request, *args, **kwargs):
+        """Return the (paginated) list, or only the total for count requests."""
+        if not self.is_count_only(request):
+            return super().list(request, *args, **kwargs)
+
+        not_modified = self.check_not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        count = self.filter_queryset(self.get_queryset()).count()
+        response = success_response(
+            data={'count': count},
+            message='Item count retrieved successfully'
+        )
+        response[self.count_header] = str(count)
+        return response
+
+    def get_owned_categories(self, items):
+        """Load the user's categories referenced by the items, in one query."""
+        category_ids = set()
+        for item in items:
+            category_id = item.get('category_id') if isinstance(item, dict) else None
+            if isinstance(category_id, bool):
+                continue
+            try:
+                category_ids.add(int(category_id))
+            except (TypeError, ValueError):
+                continue
+        return Category.objects.filter(user=self.request.user).in_bulk(category_ids)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk', url_name='bulk')
+    def bulk(self, request):
+        """POST {prefix}/bulk creates entries; PATCH and DELETE as in OwnerModelViewSet."""
+        if request.method == 'POST':
+            return self.bulk_create(request)
+        return super().bulk(request)
+
+    def perform_bulk_update(self, queryset, changes):
+        """Update the rows and move their rollup contribution in one upsert."""
+        deltas = rollups.new_deltas()
+        rollups.add_queryset_delta(deltas, queryset, sign=-1)
+        super().perform_bulk_update(queryset, changes)
+        rollups.add_queryset_delta(deltas, queryset)
+        rollups.apply_deltas(deltas)
+
+        # queryset.update() skips save(), so refresh fingerprints of changed rows here
+        if {'date', 'amount', 'note'} & changes.keys():
+            entries = list(queryset.only('id', 'user_id', 'date', 'amount', 'note'))
+            for entry in entries:
+                entry.fingerprint = entry.compute_fingerprint()
+            queryset.model.objects.bulk_update(entries, ['fingerprint'], batch_size=500)
+
+    def perform_bulk_destroy(self, queryset):
+        """Delete the rows and remove their rollup contribution in one upsert."""
+        deltas = rollups.new_deltas()
+        rollups.add_queryset_delta(deltas, queryset, sign=-1)
+        # queryset.delete() still sends per-row signals; skip their rollup updates
+        with rollups.deferred():
+            super().perform_bulk_destroy(queryset)
+        rollups.apply_deltas(deltas)
+
+    def bulk_create(self, request):
+        """
+        Create many entries from a JSON array.
+        Items are validated with the regular serializer rules, against categories
+        preloaded in one query; valid items are inserted with bulk_create in a
+        single transaction and invalid ones are reported by index.
+        Items matching stored entries (date, amount, note) are skipped and
+        reported as duplicates; ?on_duplicate=flag creates and reports them.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return error_response('Expected a non-empty list of items.')
+        if len(items) > self.bulk_max_items:
+            return error_response(f'At most {self.bulk_max_items} items can be created at once.')
+        on_duplicate = request.query_params.get('on_duplicate', SKIP)
+        if on_duplicate not in DUPLICATE_POLICIES:
+            return error_response(f"on_duplicate must be one of: {', '.join(DUPLICATE_POLICIES)}.")
+
+        serializer_class = self.get_serializer_class()
+        context = {**self.get_serializer_context(), 'categories': self.get_owned_categories(items)}
+        item_serializer = serializer_class(context=context)
+
+        indexes, validated_items, errors = [], [], []
+        for index, item in enumerate(items):
+            try:
+                validated_items.append(item_serializer.run_validation(item))
+                indexes.append(index)
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': as_serializer_error(exc)})
+
+        if not validated_items:
+            return error_response(errors, message='No items were created.')
+
+        model = serializer_class.Meta.model
+        entries = [model(user=request.user, **attrs) for attrs in validated_items]
+        new, duplicates = DuplicateFinder(request.user).split(entries)
+        if on_duplicate == SKIP:
+            entries = [entries[position] for position in new]
+
+        if entries:
+            with transaction.atomic():
+                model.objects.bulk_create(entries, batch_size=500)
+                # bulk_create sends no signals, so maintain the rollup here
+                rollups.record_entries(entries)
+                response_cache.bump_data_version_on_commit(request.user.pk)
+
+        return success_response(
+            data={
+                'created': serializer_class(entries, many=True, context=context).data,
+                'errors': errors,
+                'duplicates': [indexes[position] for position in duplicates],
+            },
+            message=f'{len(entries)} of {len(items)} items created successfully',
+            status_code=status.HTTP_201_CREATED if entries else status.HTTP_200_OK
+        )
+
+
+class IncomeViewSet(EntryViewSet):
     """Allows CRUD operations for Income entries."""
     queryset = Income.objects.all()
     serializer_class = IncomeSerializer
-    pagination_class = None
+    filterset_class = IncomeFilter
+    etag_models = (Income, Category)
 
 # ------------------------------------------------------------
 # 3. Expense ViewSet
 # ------------------------------------------------------------
 
-class ExpenseViewSet(OwnerModelViewSet):
+class ExpenseViewSet(EntryViewSet):
     """Allows CRUD operations for Expense entries."""
     queryset = Expense.objects.all()
     serializer_class = ExpenseSerializer
-    pagination_class = None
+    filterset_class = ExpenseFilter
+    etag_models = (Expense, Category)
 
 
 # ------------------------------------------------------------
@@ -347,6 +662,14 @@ class BudgetViewSet(OwnerModelViewSet):
     queryset = Budget.objects.all()
     serializer_class = BudgetSerializer
     pagination_class = None
+    etag_models = (Budget, Category)
+    # category/year/month are unique per budget, so only the amount is shared
+    bulk_update_fields = ('amount',)
+    # The serializer nests the category
+    query_plans = {
+        'list': {'select_related': ('category',)},
+        'retrieve': {'select_related': ('category',)},
+    }
 
     def get_queryset(self):
         """Allows filtering budgets by year and month."""
@@ -373,7 +696,7 @@ class BudgetViewSet(OwnerModelViewSet):
 # 5. Financial Summary View
 # ------------------------------------------------------------
 
-class FinancialSummaryView(APIView):
+class FinancialSummaryView(ConditionalGetMixin, APIView):
     """
     Calculates and returns the user's financial summary including:
     - Budget stats for last 7 months
@@ -382,88 +705,96 @@ class FinancialSummaryView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    months = 7
+    etag_models = (Income, Expense, Budget, Category)
+
+    def get_etag_extra(self):
+        # The summary window moves with the calendar
+        return (date.today().isoformat(),)
+
     def get(self, request, format=None):
-        user = request.user
+        not_modified = self.check_not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
         today = date.today()
-        
-        # --- 1. Calculate Total Income and Expense (All Time) ---
-        total_income = Income.objects.filter(user=user).exclude(category__name='Balance').aggregate(
-            sum=Coalesce(Sum('amount'), Decimal('0.00'))
-        )['sum']
-        
-        total_expense = Expense.objects.filter(user=user).aggregate(
-            sum=Coalesce(Sum('amount'), Decimal('0.00'))
-        )['sum']
-        
-        total_saving = total_income - total_expense
+        data = response_cache.get_or_build(
+            'summary', request.user.pk, lambda: self.build_summary(request.user, today), today.isoformat()
+        )
+        return success_response(
+            data=data,
+            message='Financial summary retrieved successfully'
+        )
 
-        budget_stats = []
+    def build_summary(self, user, today):
+        """Compute the summary payload for the user."""
         current_year = today.year
         current_month = today.month
         
-        for i in range(7):
-            target_month = current_month - i
-            target_year = current_year
-            
-            # Handle year rollover
-            while target_month <= 0:
-                target_month += 12
-                target_year -= 1
-            
-            total_budget = Budget.objects.filter(
-                user=user,
-                year=target_year,
-                month=target_month
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), Decimal('0.00'))
-            )['sum']
-            
-            # Get total expenses for this month
-            total_expense_month = Expense.objects.filter(
-                user=user,
-                date__year=target_year,
-                date__month=target_month
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), Decimal('0.00'))
-            )['sum']
-            
-            date_str = f"{month_name[target_month]} {target_year}"
-            
-            budget_stats.append({
-                'date': date_str,
-                'totalBudget': total_budget,
-                'totalExpense': total_expense_month,
-            })
+        # (year, month) pairs of the window, oldest to newest
+        window = [shift_month(current_year, current_month, -i) for i in range(self.months - 1, -1, -1)]
         
-        # Reverse to show oldest to newest
-        budget_stats.reverse()
-
-        # --- 3. Calculate Income Categories with Totals ---
-        income_categories = Income.objects.filter(user=user).exclude(category__name='Balance').values('category__name').annotate(
-            totalincome=Coalesce(Sum('amount'), Decimal('0.00'))
-        ).order_by('category__name')
+        # --- 1. Monthly budget totals: one GROUP BY year, month query ---
+        window_filter = Q()
+        for year, month in window:
+            window_filter |= Q(year=year, month=month)
+        budget_totals = {
+            (item['year'], item['month']): item['total']
+            for item in Budget.objects.filter(user=user).filter(window_filter).order_by().values(
+                'year', 'month'
+            ).annotate(total=Sum('amount'))
+        }
         
-        income_categories_list = [
-            {
-                'category': item['category__name'],
-                'totalincome': item['totalincome']
-            }
-            for item in income_categories
-        ]
-
-        expense_categories = Expense.objects.filter(user=user).values('category__name').annotate(
-            totalincome=Coalesce(Sum('amount'), Decimal('0.00'))
-        ).order_by('category__name')
+        # --- 2. Monthly expense totals from the rollup ---
+        expense_totals = {
+            (item['year'], item['month']): item['total']
+            for item in MonthlyCategoryTotal.objects.filter(user=user).filter(window_filter).order_by().values(
+                'year', 'month'
+            ).annotate(total=Sum('expense_total'))
+        }
         
-        expense_categories_list = [
+        budget_stats = [
             {
-                'category': item['category__name'],
-                'totalincome': item['totalincome']
+                'date': f"{month_name[month]} {year}",
+                'totalBudget': budget_totals.get((year, month), Decimal('0.00')),
+                'totalExpense': expense_totals.get((year, month), Decimal('0.00')),
             }
-            for item in expense_categories
+            for year, month in window
         ]
+        
+        # --- 3. Income and expense categories with totals ---
+        # One grouped query over the rollup; the all-time totals are summed from the same rows
+        category_totals = MonthlyCategoryTotal.objects.filter(user=user).order_by('category__name').values(
+            'category__name'
+        ).annotate(
+            income=Sum('income_total'),
+            income_count=Sum('income_count'),
+            expense=Sum('expense_total'),
+            expense_count=Sum('expense_count'),
+        )
+        
+        income_categories_list = []
+        expense_categories_list = []
+        for item in category_totals:
+            if item['income_count'] and item['category__name'] != 'Balance':
+                income_categories_list.append({
+                    'category': item['category__name'],
+                    'totalincome': item['income']
+                })
+            if item['expense_count']:
+                expense_categories_list.append({
+                    'category': item['category__name'],
+                    'totalincome': item['expense']
+                })
+        
+        total_income = sum((item['totalincome'] for item in income_categories_list), Decimal('0.00'))
+        total_expense = sum((item['totalincome'] for item in expense_categories_list), Decimal('0.00'))
+        total_saving = total_income - total_expense
 
-        data = {
+        # Built from trusted aggregates, so returned as is: running it through
+        # FinancialSummarySerializer(data=...) would only re-parse every value.
+        # Decimals are encoded by the renderer (as JSON numbers, as before).
+        return {
             'budgetStats': budget_stats,
             'incomeCategories': income_categories_list,
             'expenseCategories': expense_categories_list,
@@ -471,26 +802,18 @@ class FinancialSummaryView(APIView):
             'totalEarning': total_income,
             'totalExpenses': total_expense,
         }
-        
-        serializer = FinancialSummarySerializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        return success_response(
-            data=serializer.validated_data,
-            message='Financial summary retrieved successfully'
-        )
 
 # ------------------------------------------------------------
 # 6. Transaction List View
 # ------------------------------------------------------------
 
-class TransactionPagination(PageNumberPagination):
-    """Custom pagination for transactions."""
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+# Columns selected from each side of the Income/Expense UNION ALL
+TRANSACTION_COLUMNS = ('id', 'note', 'amount', 'date', 'created_at')
+TRANSACTION_ORDERING = ('-date', '-created_at', '-is_income', '-id')
+TRANSACTION_ORDERING_REVERSED = ('date', 'created_at', 'is_income', 'id')
 
 
-class TransactionView(ListAPIView):
+class TransactionView(ConditionalGetMixin, ListAPIView):
     """
     Endpoint to list all transactions (Income and Expense) with pagination and filtering.
     Supports filtering by:
@@ -502,9 +825,11 @@ class TransactionView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = TransactionSerializer
     pagination_class = TransactionPagination
+    cursor_pagination_class = TransactionCursorPagination
+    etag_models = (Income, Expense, Category)
 
-    def get_queryset(self):
-        """Combine Income and Expense querysets and apply filters."""
+    def get_entry_querysets(self):
+        """Build the filtered Income and Expense querysets that feed the transaction list."""
         user = self.request.user
         
         # Get filter parameters
@@ -517,8 +842,8 @@ class TransactionView(ListAPIView):
         is_income_param = self.request.query_params.get('is_income')
         
         # Build base querysets
-        income_queryset = Income.objects.filter(user=user).exclude(category__name='Balance').select_related('category')
-        expense_queryset = Expense.objects.filter(user=user).select_related('category')
+        income_queryset = Income.objects.filter(user=user).exclude(category__name='Balance')
+        expense_queryset = Expense.objects.filter(user=user)
         
         # Apply date filters
         if date_param:
@@ -556,7 +881,7 @@ class TransactionView(ListAPIView):
                 amount_min_decimal = Decimal(amount_min)
                 income_queryset = income_queryset.filter(amount__gte=amount_min_decimal)
                 expense_queryset = expense_queryset.filter(amount__gte=amount_min_decimal)
-            except (ValueError, TypeError):
+            except (ValueError, TypeError, InvalidOperation):
                 pass
         
         if amount_max:
@@ -564,7 +889,7 @@ class TransactionView(ListAPIView):
                 amount_max_decimal = Decimal(amount_max)
                 income_queryset = income_queryset.filter(amount__lte=amount_max_decimal)
                 expense_queryset = expense_queryset.filter(amount__lte=amount_max_decimal)
-            except (ValueError, TypeError):
+            except (ValueError, TypeError, InvalidOperation):
                 pass
         
         # Apply is_income filter
@@ -575,58 +900,74 @@ class TransactionView(ListAPIView):
             else:
                 income_queryset = income_queryset.none()  # Exclude income
         
-        # Convert to list of dictionaries for unified format
-        transactions = []
-        
-        # Process income transactions
-        for income in income_queryset:
-            transactions.append({
-                'id': income.id,
-                'note': income.note or '',
-                'category': income.category.name,
-                'amount': income.amount,
-                'date': income.date,
-                'is_income': True,
-                '_created_at': income.created_at,  # For sorting only
-            })
-        
-        # Process expense transactions
-        for expense in expense_queryset:
-            transactions.append({
-                'id': expense.id,
-                'note': expense.note or '',
-                'category': expense.category.name,
-                'amount': expense.amount,
-                'date': expense.date,
-                'is_income': False,
-                '_created_at': expense.created_at,  # For sorting only
-            })
-        
-        # Sort by date (most recent first), then by created_at
-        transactions.sort(key=lambda x: (x['date'], x['_created_at']), reverse=True)
-        
-        # Remove the temporary sorting field
-        for transaction in transactions:
-            transaction.pop('_created_at', None)
-        
-        return transactions
+        return income_queryset, expense_queryset
+
+    def merge_entry_querysets(self, income_queryset, expense_queryset, reverse=False, limit=None):
+        """
+        Merge Income and Expense querysets into a single ordered UNION ALL query.
+        When a limit is given, each side is also limited before the merge so
+        that PostgreSQL only reads the top rows of each table.
+        """
+        ordering = TRANSACTION_ORDERING_REVERSED if reverse else TRANSACTION_ORDERING
+        branch_ordering = [field for field in ordering if field.lstrip('-') != 'is_income']
+        
+        # Both sides must select the same columns in the same order
+        income_rows = income_queryset.order_by().values(
+            *TRANSACTION_COLUMNS,
+            category_name=F('category__name'),
+            is_income=Value(True),
+        )
+        expense_rows = expense_queryset.order_by().values(
+            *TRANSACTION_COLUMNS,
+            category_name=F('category__name'),
+            is_income=Value(False),
+        )
+        if limit is not None:
+            income_rows = income_rows.order_by(*branch_ordering)[:limit]
+            expense_rows = expense_rows.order_by(*branch_ordering)[:limit]
+        
+        # Most recent first; is_income and id make the order deterministic
+        return income_rows.union(expense_rows, all=True).order_by(*ordering)
+
+    def get_queryset(self):
+        """
+        Merge Income and Expense into a single ordered UNION ALL query.
+        Filtering, ordering, LIMIT/OFFSET and COUNT all run in PostgreSQL,
+        so fetching a page only touches the rows of that page.
+        """
+        return self.merge_entry_querysets(*self.get_entry_querysets())
+
+    def serialize_rows(self, rows):
+        """Represent UNION ALL rows like TransactionSerializer, without a field object per row."""
+        return FastListSerializer.for_serializer(self.get_serializer_class()).to_representation(rows)
 
     def list(self, request, *args, **kwargs):
         """Override list to return custom response format."""
+        not_modified = self.check_not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        cursor_paginator = self.cursor_pagination_class()
+        if cursor_paginator.is_requested(request):
+            rows = cursor_paginator.paginate(self, request)
+            return success_response(
+                data=cursor_paginator.get_paginated_data(self.serialize_rows(rows)),
+                message='Transactions retrieved successfully'
+            )
+        
         transactions = self.get_queryset()
         
-        # Apply pagination manually since we're working with a list, not a queryset
         page = self.paginate_queryset(transactions)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
+            data = self.serialize_rows(page)
             # Get pagination metadata
             paginator = self.paginator
-            paginated_response = paginator.get_paginated_response(serializer.data)
+            paginated_response = paginator.get_paginated_response(data)
             
             # Return in the required format: { success: boolean, data: [T] }
             return success_response( 
                 data={
-                'data': serializer.data,
+                'data': data,
                 'count': paginated_response.data.get('count'),
                 'next': paginated_response.data.get('next'),
                 'previous': paginated_response.data.get('previous'),
@@ -635,66 +976,197 @@ class TransactionView(ListAPIView):
             )
         
         # If no pagination, return all results
-        serializer = self.get_serializer(transactions, many=True)
         return Response({
             'success': True,
-            'data': serializer.data,
+            'data': self.serialize_rows(transactions),
         })
 
 
+class TransactionExportView(TransactionView):
+    """
+    Streams every transaction matching the TransactionView filters as a file.
+    GET /api/transactions/export?format=csv|ndjson&date_from=2025-01-01
+    Rows come from a server-side cursor, so memory use does not grow with
+    the size of the history.
+    """
+    content_negotiation_class = exports.ExportContentNegotiation
+    chunk_size = exports.DEFAULT_CHUNK_SIZE
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('format', exports.CSV).lower()
+        if export_format not in exports.FORMATS:
+            return error_response(
+                f"Unsupported export format '{export_format}'. Use one of: {', '.join(exports.FORMATS)}."
+            )
+
+        not_modified = self.check_not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        rows = self.get_queryset().iterator(chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(
+            exports.TRANSACTION_STREAMS[export_format](rows),
+            content_type=exports.CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="transactions.{export_format}"'
+        return response
+
+
 # ------------------------------------------------------------
 # 7. Budget Management View
 # ------------------------------------------------------------
 
-class BudgetManagementView(APIView):
+class BudgetManagementView(ConditionalGetMixin, APIView):
     """
     Endpoint to get budget management data for all expense categories.
     Returns budget amount and expense amount for each category for the current month.
     """
     permission_classes = [IsAuthenticated]
+    etag_models = (Expense, Budget, Category)
+
+    def get_etag_extra(self):
+        # Rows cover the current month only
+        return (date.today().isoformat(),)
 
     def get(self, request, format=None):
-        user = request.user
+        not_modified = self.check_not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
         today = date.today()
+        data = response_cache.get_or_build(
+            'budget-management', request.user.pk, lambda: self.build_rows(request.user, today), today.isoformat()
+        )
+        return success_response(
+            data=data,
+            message='Budget management data retrieved successfully'
+        )
+
+    def build_rows(self, user, today):
+        """Compute the budget management rows for the user."""
         current_year = today.year
         current_month = today.month
         
-        # Get all expense categories for this user
-        expense_categories = Category.objects.filter(user=user, is_income=False).order_by('name')
+        # Current month's budget and expense total per category, as correlated subqueries
+        budget_amount = Budget.objects.filter(
+            user=user,
+            category=OuterRef('pk'),
+            year=current_year,
+            month=current_month
+        ).values('amount')[:1]
         
-        budget_management_data = []
+        expense_amount = MonthlyCategoryTotal.objects.filter(
+            user=user,
+            category=OuterRef('pk'),
+            year=current_year,
+            month=current_month
+        ).values('expense_total')[:1]
         
-        for category in expense_categories:
-            # Get budget amount for this category for current month
-            budget = Budget.objects.filter(
-                user=user,
-                category=category,
-                year=current_year,
-                month=current_month
-            ).first()
-            
-            budget_amount = budget.amount if budget else Decimal('0.00')
-            
-            # Calculate total expenses for this category for current month
-            total_expenses = Expense.objects.filter(
-                user=user,
-                category=category,
-                date__year=current_year,
-                date__month=current_month
-            ).aggregate(
-                sum=Coalesce(Sum('amount'), Decimal('0.00'))
-            )['sum']
-            
-            budget_management_data.append({
-                'category': category.name,
-                'budgetAmt': budget_amount,
-                'expenseAmt': total_expenses,
-            })
-        
-        serializer = BudgetManagementSerializer(data=budget_management_data, many=True)
+        # All expense categories for this user in a single query; the rows
+        # already have the BudgetManagementSerializer shape
+        return list(
+            Category.objects.filter(user=user, is_income=False).order_by('name').values(
+                category=F('name'),
+                budgetAmt=Coalesce(Subquery(budget_amount), Decimal('0.00')),
+                expenseAmt=Coalesce(Subquery(expense_amount), Decimal('0.00')),
+            )
+        )
+
+
+# ------------------------------------------------------------
+# 8. Statement Import View
+# ------------------------------------------------------------
+
+class StatementImportView(APIView):
+    """
+    Imports a CSV or OFX bank statement (multipart field 'file') into the
+    user's incomes and expenses. The upload is parsed as a stream and
+    inserted in chunks, each committed in its own transaction; see
+    finance.importers for the accepted columns.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, format=None):
+        serializer = StatementImportSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        
+        options = serializer.validated_data
+        upload = options['file']
+        file_format = options.get('file_format') or importers.detect_format(upload.name)
+
+        def report_progress(result):
+            logger.info(
+                'Statement import for user %s: %s rows read, %s created, %s failed',
+                request.user.pk, result.rows, result.created, result.failed
+            )
+
+        # Large uploads are spooled to a temporary file by Django and read back line by line
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = importers.import_statement(
+                request.user,
+                stream,
+                file_format=file_format,
+                default_category=options.get('default_category'),
+                create_categories=options['create_categories'],
+                date_format=options['date_format'],
+                on_duplicate=options['on_duplicate'],
+                progress=report_progress,
+            )
+        except (importers.StatementError, UnicodeDecodeError, csv.Error) as exc:
+            return error_response(f'Could not read the statement: {exc}')
+        finally:
+            stream.detach()
+
         return success_response(
-            data=serializer.validated_data,
-            message='Budget management data retrieved successfully'
-        )
\ No newline at end of file
+            data=result.as_dict(),
+            message=f'{result.created} of {result.rows} rows imported',
+            status_code=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK
+        )
+
+
+# ------------------------------------------------------------
+# 9. Account Export View
+# ------------------------------------------------------------
+
+class AccountExportView(APIView):
+    """
+    Downloads the user's categories, incomes, expenses and budgets as a ZIP
+    archive with one CSV file per model (see finance.exports). The archive
+    is written while it is sent, from chunked queryset iteration.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        response = StreamingHttpResponse(
+            exports.iter_user_archive(request.user),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{exports.archive_filename(request.user)}"'
+        return response
+
+
+# ------------------------------------------------------------
+# 10. Metrics View
+# ------------------------------------------------------------
+
+class MetricsView(APIView):
+    """
+    Staff-only endpoint exposing in-process cache counters for monitoring
+    (response cache, cached JWT user rows, the refresh-token revocation
+    filter, the password hashing pool and throttle rejections). Counters are
+    per worker process.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return success_response(
+            data={
+                'responseCache': response_cache.stats.snapshot(),
+                'authUserCache': user_cache.snapshot(),
+                'revocationFilter': revocation_filter.snapshot(),
+                'passwordHashing': passwords.pool.snapshot(),
+                'throttles': throttling.stats.snapshot(),
+            },
+            message='Metrics retrieved successfully'
+        )